@@ -2,14 +2,21 @@
 """
 AUDITORIA COMPLETA - Verificação BNCC JSON vs PDF Original
 Cobre EI, EF e EM com verificação de estrutura, contagens e conteúdo.
+
+Uso:
+    python audit_bncc.py                 # auditoria completa (abre o PDF)
+    python audit_bncc.py --somente-json  # só contagens e estrutura, sem importar pdfplumber
 """
 
+import argparse
 import json
-import pdfplumber
 import re
+import sys
 import random
 from collections import defaultdict
 
+from tabela_bncc import SEPARADOR_OBJETOS, tabela_de_arvores
+
 # Regex para códigos
 RE_CODE_EF = re.compile(r'\(?(EF\d{2,3}[A-Z]{2}\d{2,3})\)?')
 RE_CODE_EI = re.compile(r'(EI\d{2}[A-Z]{2}\d{2})')
@@ -83,43 +90,24 @@ def extract_description_from_context(context, code):
 # SAMPLE FUNCTIONS
 # ============================================================================
 
-def sample_ef_skills(data, sample_size=100):
-    """Amostra habilidades do EF com hierarquia completa - recursivo para LP"""
+def sample_ef_skills(data, sample_size=100, tabela=None):
+    """
+    Amostra habilidades do EF com hierarquia completa (linhas EF da tabela de
+    habilidades; a tabela é montada de `data` se não for passada)
+    """
+    if tabela is None:
+        tabela = tabela_de_arvores(ef=data)
     skills = []
-    
-    def collect_recursive(obj, context):
-        """Coleta habilidades recursivamente"""
-        if isinstance(obj, dict):
-            if 'habilidades' in obj:
-                for hab in obj['habilidades']:
-                    skills.append({
-                        'codigo': hab['codigo'],
-                        'descricao': hab['descricao'],
-                        'area': context.get('area', ''),
-                        'componente': context.get('componente', ''),
-                        'ano': context.get('ano', ''),
-                        'unidade': context.get('unidade', ''),
-                        'objetos': obj.get('objetos', [])
-                    })
-            for key, value in obj.items():
-                if key not in ['habilidades', 'objetos', 'codigo', 'descricao', 'anos_aplicaveis']:
-                    # Update context based on key type
-                    new_context = context.copy()
-                    if 'Ano' in str(key):
-                        new_context['ano'] = key
-                    elif key not in ['anos', 'componentes']:
-                        new_context['unidade'] = key
-                    collect_recursive(value, new_context)
-        elif isinstance(obj, list):
-            for item in obj:
-                collect_recursive(item, context)
-    
-    for area, area_data in data.items():
-        if area == "metadata":
-            continue
-        for comp, comp_data in area_data.get('componentes', {}).items():
-            anos = comp_data.get('anos', {})
-            collect_recursive(anos, {'area': area, 'componente': comp})
+    for linha in tabela.linhas(tabela.filtrar(etapa="EF")):
+        skills.append({
+            'codigo': linha['codigo'],
+            'descricao': linha['descricao'],
+            'area': linha['area'],
+            'componente': linha['componente'],
+            'ano': linha['ano'],
+            'unidade': linha['unidade'],
+            'objetos': linha['objeto'].split(SEPARADOR_OBJETOS) if linha['objeto'] else []
+        })
     
     if len(skills) > sample_size:
         skills = random.sample(skills, sample_size)
@@ -219,75 +207,49 @@ def verify_skill(pdf, skill, page_range):
 # COUNT AND STRUCTURE VERIFICATION
 # ============================================================================
 
+def count_ei_sintese(data):
+    """Conta os itens da síntese de aprendizagens do EI (fora da tabela de habilidades)"""
+    return sum(len(v) for v in data.get('sintese_aprendizagens', {}).values())
+
+
 def count_ef_skills(data):
-    """Conta habilidades do EF por componente - recursivo para lidar com LP"""
+    """Conta habilidades do EF por componente (sigla), pelas linhas EF da tabela de habilidades"""
     counts = defaultdict(lambda: {'total': 0, 'unique': set()})
-    
-    def count_recursive(obj):
-        """Conta habilidades recursivamente em qualquer estrutura"""
-        total = 0
-        if isinstance(obj, dict):
-            if 'habilidades' in obj:
-                for h in obj['habilidades']:
-                    code = h['codigo']
-                    match = RE_CODE_EF.match(code)
-                    if match:
-                        sigla = code[4:6]  # Ex: EF01LP01 -> LP
-                        counts[sigla]['total'] += 1
-                        counts[sigla]['unique'].add(code)
-                        total += 1
-            for key, value in obj.items():
-                if key not in ['habilidades', 'objetos', 'codigo', 'descricao', 'anos_aplicaveis']:
-                    total += count_recursive(value)
-        elif isinstance(obj, list):
-            for item in obj:
-                total += count_recursive(item)
-        return total
-    
-    for area, area_data in data.items():
-        if area == "metadata":
-            continue
-        for comp, comp_data in area_data.get('componentes', {}).items():
-            anos = comp_data.get('anos', {})
-            count_recursive(anos)
-    
+    tabela = tabela_de_arvores(ef=data)
+    for linha in tabela.linhas(tabela.filtrar(etapa="EF")):
+        code = linha['codigo']
+        if RE_CODE_EF.match(code):
+            sigla = code[4:6]  # Ex: EF01LP01 -> LP
+            counts[sigla]['total'] += 1
+            counts[sigla]['unique'].add(code)
     return counts
 
 
 def count_em_skills(data):
-    """Conta habilidades do EM por área/componente"""
+    """Conta habilidades do EM por área/componente (TabelaHabilidades.contagens)"""
     counts = {'LGG': 0, 'LP': 0, 'MAT': 0, 'CNT': 0, 'CHS': 0}
-    
-    for area, area_data in data.items():
-        for comp in area_data.get('competencias_especificas', []):
-            for hab in comp.get('habilidades', []):
-                code = hab['codigo']
-                if 'LGG' in code:
-                    counts['LGG'] += 1
-                elif 'MAT' in code:
-                    counts['MAT'] += 1
-                elif 'CNT' in code:
-                    counts['CNT'] += 1
-                elif 'CHS' in code:
-                    counts['CHS'] += 1
-        
-        if 'componentes' in area_data:
-            for comp_name, comp_data in area_data['componentes'].items():
-                for campo, campo_data in comp_data.get('campos_de_atuacao', {}).items():
-                    counts['LP'] += len(campo_data.get('habilidades', []))
-    
+    counts.update(tabela_de_arvores(em=data).contagens().get('EM', {}))
+    counts.pop('total', None)
     return counts
 
+
 def count_ei_items(data):
-    """Conta itens do EI"""
-    obj_count = 0
-    for faixa in data.get('objetivos_aprendizagem', {}).values():
-        for campo in faixa.values():
-            obj_count += len(campo)
-    
-    sintese_count = sum(len(v) for v in data.get('sintese_aprendizagens', {}).values())
-    
-    return {'objetivos': obj_count, 'sintese': sintese_count}
+    """Conta itens do EI (objetivos pela tabela de habilidades)"""
+    objetivos = tabela_de_arvores(ei=data).contagens().get('EI', {}).get('objetivos', 0)
+    return {'objetivos': objetivos, 'sintese': count_ei_sintese(data)}
+
+
+def contagens_auditoria(tabela, ei_data):
+    """
+    Contagens no formato de EXPECTED_COUNTS: as de habilidades/objetivos vêm
+    de TabelaHabilidades.contagens() (operações sobre as colunas); etapas sem
+    linhas contam zero.
+    """
+    contagens = tabela.contagens()
+    ef = contagens.get('EF', {'total_codes': 0})
+    em = contagens.get('EM', {'LGG': 0, 'LP': 0, 'MAT': 0, 'CNT': 0, 'CHS': 0, 'total': 0})
+    ei = {'objetivos': contagens.get('EI', {}).get('objetivos', 0), 'sintese': count_ei_sintese(ei_data)}
+    return {'EF': ef, 'EM': em, 'EI': ei}
 
 # ============================================================================
 # STRUCTURE VERIFICATION
@@ -425,14 +387,11 @@ def verify_ei_structure(data):
 # MAIN AUDIT FUNCTION
 # ============================================================================
 
-def run_audit():
-    print("=" * 80)
-    print("AUDITORIA COMPLETA - BNCC JSON vs PDF Original")
-    print("=" * 80)
-    
-    pdf_path = 'BNCC_EI_EF_110518_versaofinal_site.pdf'
-    pdf = pdfplumber.open(pdf_path)
-    
+def run_json_checks():
+    """
+    Seções 1 e 2 da auditoria (contagens e estrutura), que só leem os JSON.
+    Retorna os dados e os resultados usados no resumo final.
+    """
     # ========================================================================
     # 1. CONTAGENS
     # ========================================================================
@@ -440,9 +399,13 @@ def run_audit():
     print("1. VERIFICAÇÃO DE CONTAGENS")
     print("=" * 60)
     
-    # EF
     ef_data = load_json('bncc_ef.json')
-    ef_counts = count_ef_skills(ef_data)
+    em_data = load_json('bncc_em.json')
+    ei_data = load_json('bncc_ei.json')
+    tabela = tabela_de_arvores(ei_data, ef_data, em_data)
+    contagens = contagens_auditoria(tabela, ei_data)
+    
+    # EF
     
     print("\n--- ENSINO FUNDAMENTAL ---")
     print(f"{'Componente':<15} {'Extraído':<10} {'Esperado':<10} {'Status'}")
@@ -452,7 +415,7 @@ def run_audit():
     for sigla, expected in EXPECTED_COUNTS['EF'].items():
         if sigla == 'total_codes':
             continue
-        extracted = len(ef_counts[sigla]['unique'])
+        extracted = contagens['EF'].get(sigla, 0)
         total_ef += extracted
         status = "✅" if extracted == expected else f"❌ (diff: {extracted - expected})"
         print(f"{sigla:<15} {extracted:<10} {expected:<10} {status}")
@@ -463,8 +426,6 @@ def run_audit():
     print(f"{'TOTAL':<15} {total_ef:<10} {expected_total:<10} {status}")
     
     # EM
-    em_data = load_json('bncc_em.json')
-    em_counts = count_em_skills(em_data)
     
     print("\n--- ENSINO MÉDIO ---")
     print(f"{'Área/Comp':<15} {'Extraído':<10} {'Esperado':<10} {'Status'}")
@@ -472,7 +433,7 @@ def run_audit():
     
     total_em = 0
     for sigla in ['LGG', 'LP', 'MAT', 'CNT', 'CHS']:
-        extracted = em_counts[sigla]
+        extracted = contagens['EM'][sigla]
         expected = EXPECTED_COUNTS['EM'][sigla]
         total_em += extracted
         status = "✅" if extracted == expected else f"❌ (diff: {extracted - expected})"
@@ -484,8 +445,7 @@ def run_audit():
     print(f"{'TOTAL':<15} {total_em:<10} {expected_total:<10} {status}")
     
     # EI
-    ei_data = load_json('bncc_ei.json')
-    ei_counts = count_ei_items(ei_data)
+    ei_counts = contagens['EI']
     
     print("\n--- EDUCAÇÃO INFANTIL ---")
     print(f"{'Item':<20} {'Extraído':<10} {'Esperado':<10} {'Status'}")
@@ -530,6 +490,39 @@ def run_audit():
     else:
         print("  ✅ Estrutura OK")
     
+    return {
+        "ef_data": ef_data, "em_data": em_data, "ei_data": ei_data, "tabela": tabela,
+        "total_ef": total_ef, "total_em": total_em, "ei_counts": ei_counts,
+        "ef_issues": ef_issues, "em_issues": em_issues, "ei_issues": ei_issues,
+    }
+
+
+def json_checks_ok(resultado):
+    return (resultado["total_ef"] == EXPECTED_COUNTS['EF']['total_codes'] and
+            resultado["total_em"] == EXPECTED_COUNTS['EM']['total'] and
+            resultado["ei_counts"]['objetivos'] == EXPECTED_COUNTS['EI']['objetivos'] and
+            not (resultado["ef_issues"] or resultado["em_issues"] or resultado["ei_issues"]))
+
+
+def run_audit(somente_json=False):
+    print("=" * 80)
+    print("AUDITORIA COMPLETA - BNCC JSON vs PDF Original")
+    print("=" * 80)
+    
+    resultado = run_json_checks()
+    if somente_json:
+        ok = json_checks_ok(resultado)
+        print("\n" + ("✅ Contagens e estrutura OK" if ok else "❌ Contagens ou estrutura com problemas"))
+        return 0 if ok else 1
+    
+    ef_data, em_data, ei_data = resultado["ef_data"], resultado["em_data"], resultado["ei_data"]
+    total_ef, total_em, ei_counts = resultado["total_ef"], resultado["total_em"], resultado["ei_counts"]
+    ef_issues, em_issues, ei_issues = resultado["ef_issues"], resultado["em_issues"], resultado["ei_issues"]
+    
+    import pdfplumber  # Só a verificação de conteúdo precisa do PDF
+    pdf_path = 'BNCC_EI_EF_110518_versaofinal_site.pdf'
+    pdf = pdfplumber.open(pdf_path)
+    
     # ========================================================================
     # 3. AMOSTRAGEM DE CONTEÚDO
     # ========================================================================
@@ -539,7 +532,7 @@ def run_audit():
     
     # EF
     print("\n--- ENSINO FUNDAMENTAL ---")
-    ef_skills = sample_ef_skills(ef_data, sample_size=100)
+    ef_skills = sample_ef_skills(ef_data, sample_size=100, tabela=resultado["tabela"])
     print(f"  Amostra: {len(ef_skills)} habilidades")
     
     ef_results = defaultdict(list)
@@ -678,6 +671,11 @@ def run_audit():
     print("=" * 80)
     print("AUDITORIA CONCLUÍDA")
     print("=" * 80)
+    return 0
 
 if __name__ == "__main__":
-    run_audit()
+    parser = argparse.ArgumentParser(description="Auditoria dos JSON da BNCC contra o PDF original.")
+    parser.add_argument("--somente-json", action="store_true",
+                        help="Só contagens e estrutura (não abre o PDF nem importa pdfplumber)")
+    args = parser.parse_args()
+    sys.exit(run_audit(somente_json=args.somente_json))
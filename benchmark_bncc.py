@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK - Tempo, memória e paridade de saída dos extratores BNCC
+Executa extract_ei_final, extract_ef_final e extract_em_final várias vezes sobre
+um PDF (oficial ou sintético), mede o tempo da primeira execução (fria) e a
+mediana/p95 das demais, o pico de memória por etapa e compara as árvores
+produzidas com cópias golden e com EXPECTED_COUNTS.
+
+Os resultados são acrescentados a um histórico JSONL. Códigos de saída:
+    0 - OK
+    1 - diferença de corretude (golden ou contagens)
+    2 - regressão de desempenho acima da tolerância, ou página lida do PDF
+        mais de uma vez na mesma etapa
+
+Uso:
+    python benchmark_bncc.py                                   # PDF oficial, golden = bncc_*.json
+    python benchmark_bncc.py --pdf bncc_sintetico.pdf --atualizar-golden
+    python benchmark_bncc.py --pdf bncc_sintetico.pdf --repeticoes 5 --tolerancia 0.15
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+
+import extrair_bncc
+import audit_bncc
+from gerar_pdf_sintetico import aplicar_layout, caminho_layout
+from tabela_bncc import tabela_de_arvores
+
+ETAPAS = [
+    ("ei", "extract_ei_final", "bncc_ei.json"),
+    ("ef", "extract_ef_final", "bncc_ef.json"),
+    ("em", "extract_em_final", "bncc_em.json"),
+]
+HISTORICO_PADRAO = "bench_history.jsonl"
+
+
+# ============================================================================
+# EXECUÇÃO
+# ============================================================================
+
+@contextlib.contextmanager
+def _contar_leituras(leituras):
+    """Conta em `leituras` as chamadas de registro_pagina por página (cada uma lê a página do PDF)."""
+    original = extrair_bncc.registro_pagina
+
+    def contando(page, page_num, **campos):
+        leituras[page_num] += 1
+        return original(page, page_num, **campos)
+
+    extrair_bncc.registro_pagina = contando
+    try:
+        yield
+    finally:
+        extrair_bncc.registro_pagina = original
+
+
+def _executar_etapas(pdf_path, medir_memoria=False):
+    """
+    Executa as três etapas sobre um PDF recém-aberto e com os caches de
+    memoização zerados (como em main()), para que uma execução não herde os
+    acertos da anterior. Retorna também, por etapa, {página: leituras}.
+    """
+    import pdfplumber
+
+    extrair_bncc.limpar_memoizacao()
+    tempos = {}
+    picos = {}
+    saidas = {}
+    leituras = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        pdf = pdfplumber.open(pdf_path)
+        try:
+            for etapa, funcao, _ in ETAPAS:
+                leituras[etapa] = Counter()
+                if medir_memoria:
+                    tracemalloc.start()
+                inicio = time.perf_counter()
+                with _contar_leituras(leituras[etapa]):
+                    saidas[etapa] = getattr(extrair_bncc, funcao)(pdf)
+                tempos[etapa] = time.perf_counter() - inicio
+                if medir_memoria:
+                    picos[etapa] = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+        finally:
+            extrair_bncc.fechar_pdf(pdf)
+    return tempos, picos, saidas, leituras
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    idx = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[idx]
+
+
+# ============================================================================
+# CORRETUDE
+# ============================================================================
+
+def _diferencas(a, b, caminho="$", limite=10, saida=None):
+    """Lista (até `limite`) os caminhos em que duas árvores JSON divergem."""
+    if saida is None:
+        saida = []
+    if len(saida) >= limite:
+        return saida
+    if type(a) != type(b):
+        saida.append(f"{caminho}: tipo {type(a).__name__} != {type(b).__name__}")
+    elif isinstance(a, dict):
+        if list(a) != list(b):
+            faltando = [k for k in b if k not in a]
+            sobrando = [k for k in a if k not in b]
+            saida.append(f"{caminho}: chaves diferentes (faltando={faltando[:3]}, sobrando={sobrando[:3]})")
+        for k in a:
+            if k in b:
+                _diferencas(a[k], b[k], f"{caminho}[{k!r}]", limite, saida)
+    elif isinstance(a, list):
+        if len(a) != len(b):
+            saida.append(f"{caminho}: {len(a)} itens != {len(b)}")
+        for i, (x, y) in enumerate(zip(a, b)):
+            _diferencas(x, y, f"{caminho}[{i}]", limite, saida)
+    elif a != b:
+        saida.append(f"{caminho}: {str(a)[:60]!r} != {str(b)[:60]!r}")
+    return saida
+
+
+def _contagens(saidas):
+    """Contagens no formato de EXPECTED_COUNTS, pelas colunas da tabela de habilidades (como a auditoria)."""
+    tabela = tabela_de_arvores(saidas["ei"], saidas["ef"], saidas["em"])
+    return audit_bncc.contagens_auditoria(tabela, saidas["ei"])
+
+
+def verificar_contagens(saidas, esperado):
+    problemas = []
+    obtido = _contagens(saidas)
+    for etapa, chaves in esperado.items():
+        for chave, valor in chaves.items():
+            extraido = obtido.get(etapa, {}).get(chave, 0)
+            if extraido != valor:
+                problemas.append(f"{etapa}.{chave}: extraído {extraido}, esperado {valor}")
+    return problemas
+
+
+def verificar_golden(saidas, golden_dir, atualizar=False):
+    problemas = []
+    for etapa, _, arquivo in ETAPAS:
+        caminho = os.path.join(golden_dir, arquivo)
+        # Normaliza via JSON (tuplas -> listas) para comparar com o arquivo salvo
+        produzido = json.loads(json.dumps(saidas[etapa], ensure_ascii=False))
+        if atualizar:
+            os.makedirs(golden_dir, exist_ok=True)
+            with open(caminho, "w", encoding="utf-8") as f:
+                json.dump(produzido, f, ensure_ascii=False, indent=2)
+            continue
+        if not os.path.exists(caminho):
+            problemas.append(f"{arquivo}: golden ausente em {golden_dir} (use --atualizar-golden)")
+            continue
+        with open(caminho, encoding="utf-8") as f:
+            golden = json.load(f)
+        for diff in _diferencas(produzido, golden):
+            problemas.append(f"{arquivo} {diff}")
+    return problemas
+
+
+# ============================================================================
+# HISTÓRICO
+# ============================================================================
+
+def _commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _chave_execucao(pdf_path):
+    """Identifica execuções comparáveis: mesmo PDF (nome + tamanho) e mesma máquina."""
+    return f"{os.path.basename(pdf_path)}:{os.path.getsize(pdf_path)}:{platform.node()}"
+
+
+def _ultima_execucao(historico, chave):
+    if not os.path.exists(historico):
+        return None
+    ultima = None
+    with open(historico, encoding="utf-8") as f:
+        for linha in f:
+            linha = linha.strip()
+            if not linha:
+                continue
+            registro = json.loads(linha)
+            if registro.get("chave") == chave and registro.get("corretude_ok"):
+                ultima = registro
+    return ultima
+
+
+def verificar_regressao(atual, anterior, tolerancia):
+    regressoes = []
+    if not anterior:
+        return regressoes
+    for etapa, stats in atual.items():
+        antes = anterior.get("etapas", {}).get(etapa)
+        if not antes:
+            continue
+        limite = antes["mediana_s"] * (1 + tolerancia)
+        if stats["mediana_s"] > limite:
+            regressoes.append(f"{etapa}: mediana {stats['mediana_s']:.3f}s > {limite:.3f}s "
+                              f"(anterior {antes['mediana_s']:.3f}s, commit {anterior.get('commit')})")
+    return regressoes
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos extratores BNCC com paridade golden.")
+    parser.add_argument("--pdf", default=extrair_bncc.PDF_PATH, help="PDF de entrada (oficial ou sintético)")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Execuções cronometradas")
+    parser.add_argument("--golden-dir", help="Diretório com bncc_ei/ef/em.json de referência "
+                                             "(padrão: '.' para o PDF oficial, <pdf>.golden para sintéticos)")
+    parser.add_argument("--atualizar-golden", action="store_true", help="Grava as saídas como novo golden")
+    parser.add_argument("--historico", default=HISTORICO_PADRAO, help="Arquivo JSONL de histórico")
+    parser.add_argument("--tolerancia", type=float, default=0.10,
+                        help="Regressão aceitável da mediana por etapa (fração, padrão 0.10)")
+    parser.add_argument("--sem-memoria", action="store_true", help="Não mede pico de memória (tracemalloc)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.pdf):
+        print(f"Arquivo PDF não encontrado: {args.pdf}")
+        return 1
+
+    esperado = audit_bncc.EXPECTED_COUNTS
+    golden_dir = args.golden_dir or "."
+    layout_path = caminho_layout(args.pdf)
+    if os.path.exists(layout_path):
+        with open(layout_path, encoding="utf-8") as f:
+            layout = json.load(f)
+        aplicar_layout(layout, extrair_bncc)
+        esperado = layout["expected_counts"]
+        golden_dir = args.golden_dir or os.path.splitext(args.pdf)[0] + ".golden"
+        print(f"Layout sintético: {layout_path}")
+
+    print(f"Benchmark: {args.pdf} ({args.repeticoes} repetições)")
+
+    tempos = {etapa: [] for etapa, _, _ in ETAPAS}
+    saidas = leituras = None
+    for i in range(args.repeticoes):
+        t, _, saidas_i, leituras_i = _executar_etapas(args.pdf)
+        for etapa, valor in t.items():
+            tempos[etapa].append(valor)
+        if saidas is None:
+            saidas, leituras = saidas_i, leituras_i
+        print(f"  Repetição {i + 1}: " + ", ".join(f"{e}={v:.3f}s" for e, v in t.items()))
+
+    picos = {}
+    if not args.sem_memoria:
+        _, picos, _, _ = _executar_etapas(args.pdf, medir_memoria=True)
+
+    # A primeira execução paga o aquecimento do processo (imports do pdfminer,
+    # caches de fontes): vai à parte e fica fora da mediana quando há outras
+    etapas = {}
+    for etapa, valores in tempos.items():
+        quentes = valores[1:] or valores
+        etapas[etapa] = {
+            "primeira_s": valores[0],
+            "mediana_s": statistics.median(quentes),
+            "p95_s": _percentil(quentes, 95),
+            "min_s": min(quentes),
+            "pico_memoria_bytes": picos.get(etapa),
+            "paginas_lidas": len(leituras[etapa]),
+            "releituras": sum(n - 1 for n in leituras[etapa].values()),
+        }
+
+    # Corretude
+    problemas = verificar_golden(saidas, golden_dir, atualizar=args.atualizar_golden)
+    problemas += verificar_contagens(saidas, esperado)
+
+    # Regressão
+    chave = _chave_execucao(args.pdf)
+    anterior = _ultima_execucao(args.historico, chave)
+    regressoes = verificar_regressao(etapas, anterior, args.tolerancia)
+    regressoes += [f"{etapa}: {stats['releituras']} leituras repetidas de páginas do PDF"
+                   for etapa, stats in etapas.items() if stats["releituras"]]
+
+    registro = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _commit_atual(),
+        "chave": chave,
+        "pdf": args.pdf,
+        "repeticoes": args.repeticoes,
+        "python": platform.python_version(),
+        "etapas": etapas,
+        "corretude_ok": not problemas,
+        "problemas": problemas,
+        "regressoes": regressoes,
+    }
+    with open(args.historico, "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    print(f"\n{'Etapa':<6} {'1ª (fria)':>10} {'Mediana':>10} {'p95':>10} {'Pico mem.':>12} "
+          f"{'Páginas':>9} {'Releituras':>11}")
+    print("-" * 75)
+    for etapa, stats in etapas.items():
+        pico = stats["pico_memoria_bytes"]
+        pico_txt = f"{pico / 1e6:.1f} MB" if pico is not None else "-"
+        print(f"{etapa:<6} {stats['primeira_s']:>9.3f}s {stats['mediana_s']:>9.3f}s {stats['p95_s']:>9.3f}s {pico_txt:>12} "
+              f"{stats['paginas_lidas']:>9} {stats['releituras']:>11}")
+
+    if args.atualizar_golden:
+        print(f"\nGolden atualizado em {golden_dir}")
+    if problemas:
+        print("\n❌ Diferenças de corretude:")
+        for p in problemas[:20]:
+            print(f"  {p}")
+        return 1
+    if regressoes:
+        print(f"\n❌ Regressão de desempenho (tolerância {args.tolerancia:.0%}):")
+        for r in regressoes:
+            print(f"  {r}")
+        return 2
+    print("\n✅ Saída idêntica ao golden e sem regressões")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+CORPUS DE TEXTO - Captura e micro-benchmark das funções de normalização
+Registra cada chamada real às funções de limpeza/formatação de texto de
+extrair_bncc.py durante uma extração (incluindo as tabelas inteiras que vão
+para limpar_tabela, as máscaras de itálico das células e o conjunto de
+palavras em itálico da página) num corpus comprimido, e reexecuta esse corpus
+função a função, medindo ns/chamada e o hash das saídas.
+
+Uso:
+    python corpus_texto.py capturar --pdf bncc_sintetico.pdf --saida corpus_texto.jsonl.gz
+    python corpus_texto.py replay corpus_texto.jsonl.gz --salvar-hashes hashes.json
+    python corpus_texto.py replay corpus_texto.jsonl.gz --referencia hashes.json
+
+O formato do corpus é JSONL comprimido com gzip:
+    {"s": 3, "v": ["blog", "podcast"]}         -> definição de conjunto de itálicos
+    {"f": "processar_descricao", "a": [...], "k": {...}}   -> uma chamada
+Conjuntos são referenciados nos argumentos como {"__set__": id}; máscaras de
+itálico (listas de bool) vão como {"__mascara__": [[início, fim], ...]}.
+"""
+
+import argparse
+import contextlib
+import gzip
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+from dataclasses import astuple, is_dataclass
+
+import extrair_bncc
+
+FUNCOES_CORPUS = [
+    "limpar_tabela",
+    "tokenizar_celula",
+    "clean_text_basic",
+    "clean_item_sintese",
+    "processar_descricao",
+    "format_special_chars",
+    "apply_italic_formatting",
+    "mascara_italico",
+    "transportar_mascara",
+    "aplicar_mascara_italico",
+    "_smart_title_case",
+    "parse_campo_name_description",
+    "_format_campo_description",
+]
+
+
+# ============================================================================
+# CAPTURA
+# ============================================================================
+
+class _GravadorCorpus:
+    """Grava chamadas em JSONL/gzip, deduplicando os conjuntos de itálico e compactando as máscaras."""
+
+    def __init__(self, caminho):
+        self.fp = gzip.open(caminho, "wt", encoding="utf-8")
+        self.ids_conjuntos = {}
+        self.mascaras = 0
+        self.chamadas = defaultdict(int)
+
+    def _codificar(self, valor):
+        if isinstance(valor, (set, frozenset)):
+            chave = frozenset(valor)
+            if chave not in self.ids_conjuntos:
+                self.ids_conjuntos[chave] = len(self.ids_conjuntos)
+                self._escrever({"s": self.ids_conjuntos[chave], "v": sorted(chave)})
+            return {"__set__": self.ids_conjuntos[chave]}
+        if isinstance(valor, list) and valor and all(isinstance(v, bool) for v in valor):
+            self.mascaras += 1
+            return {"__mascara__": _spans_mascara(valor), "n": len(valor)}
+        return valor
+
+    def _escrever(self, registro):
+        self.fp.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    def registrar(self, nome, args, kwargs):
+        registro = {"f": nome, "a": [self._codificar(a) for a in args]}
+        if kwargs:
+            registro["k"] = {k: self._codificar(v) for k, v in kwargs.items()}
+        self._escrever(registro)
+        self.chamadas[nome] += 1
+
+    def fechar(self):
+        self.fp.close()
+
+
+@contextlib.contextmanager
+def capturar(caminho, funcoes=FUNCOES_CORPUS, modulo=extrair_bncc):
+    """
+    Substitui temporariamente as funções de texto de `modulo` por versões que
+    registram os argumentos recebidos. Chamadas internas (ex: processar_descricao
+    chamando format_special_chars) também são registradas, como numa execução real.
+    A memoização fica desligada durante a captura, para que acertos de cache não
+    escondam chamadas do corpus.
+    """
+    gravador = _GravadorCorpus(caminho)
+    memoizava = modulo.MEMOIZAR
+    modulo.configurar_memoizacao(False)
+    originais = {nome: getattr(modulo, nome) for nome in funcoes}
+
+    def envolver(nome, funcao):
+        def wrapper(*args, **kwargs):
+            gravador.registrar(nome, args, kwargs)
+            return funcao(*args, **kwargs)
+        wrapper.__wrapped__ = funcao
+        return wrapper
+
+    for nome, funcao in originais.items():
+        setattr(modulo, nome, envolver(nome, funcao))
+    try:
+        yield gravador
+    finally:
+        for nome, funcao in originais.items():
+            setattr(modulo, nome, funcao)
+        modulo.configurar_memoizacao(memoizava)
+        gravador.fechar()
+
+
+def _spans_mascara(mascara):
+    spans, inicio = [], None
+    for i, italico in enumerate(mascara):
+        if italico and inicio is None:
+            inicio = i
+        elif not italico and inicio is not None:
+            spans.append([inicio, i])
+            inicio = None
+    if inicio is not None:
+        spans.append([inicio, len(mascara)])
+    return spans
+
+
+def carregar_corpus(caminho):
+    """Retorna {função: [(args, kwargs), ...]} com os conjuntos reconstruídos."""
+    conjuntos = {}
+    chamadas = defaultdict(list)
+
+    def decodificar(valor):
+        if isinstance(valor, dict) and "__set__" in valor:
+            return conjuntos[valor["__set__"]]
+        if isinstance(valor, dict) and "__mascara__" in valor:
+            mascara = [False] * valor["n"]
+            for inicio, fim in valor["__mascara__"]:
+                mascara[inicio:fim] = [True] * (fim - inicio)
+            return mascara
+        return valor
+
+    with gzip.open(caminho, "rt", encoding="utf-8") as f:
+        for linha in f:
+            registro = json.loads(linha)
+            if "s" in registro:
+                conjuntos[registro["s"]] = set(registro["v"])
+                continue
+            args = tuple(decodificar(a) for a in registro["a"])
+            kwargs = {k: decodificar(v) for k, v in registro.get("k", {}).items()}
+            chamadas[registro["f"]].append((args, kwargs))
+    return chamadas
+
+
+# ============================================================================
+# REPLAY
+# ============================================================================
+
+def _saida_json(obj):
+    # Saídas em dataclass (CelulaEF de tokenizar_celula) entram pela tupla dos campos
+    if is_dataclass(obj):
+        return astuple(obj)
+    raise TypeError(f"Saída do tipo {type(obj).__name__} não é serializável em JSON")
+
+
+def _hash_saidas(saidas):
+    h = hashlib.sha256()
+    for saida in saidas:
+        h.update(json.dumps(saida, ensure_ascii=False, default=_saida_json).encode("utf-8"))
+        h.update(b"\n")
+    return h.hexdigest()[:16]
+
+
+def replay(chamadas, funcoes=None, repeticoes=3, modulo=extrair_bncc):
+    """
+    Reexecuta o corpus em cada função e retorna
+    {função: {"chamadas", "ns_por_chamada", "hash"}}. O tempo é o melhor de
+    `repeticoes` passadas completas.
+    """
+    resultado = {}
+    for nome in funcoes or FUNCOES_CORPUS:
+        lista = chamadas.get(nome, [])
+        if not lista:
+            continue
+        funcao = getattr(modulo, nome)
+        melhor = None
+        saidas = None
+        for _ in range(repeticoes):
+            modulo.limpar_memoizacao()  # Cada passada começa com o cache frio, como uma execução
+            atual = []
+            inicio = time.perf_counter_ns()
+            for args, kwargs in lista:
+                atual.append(funcao(*args, **kwargs))
+            decorrido = time.perf_counter_ns() - inicio
+            if melhor is None or decorrido < melhor:
+                melhor = decorrido
+            saidas = atual
+        resultado[nome] = {
+            "chamadas": len(lista),
+            "ns_por_chamada": melhor / len(lista),
+            "hash": _hash_saidas(saidas),
+        }
+    return resultado
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def _cmd_capturar(args):
+    import pdfplumber
+    from gerar_pdf_sintetico import aplicar_layout, caminho_layout
+
+    if not os.path.exists(args.pdf):
+        print(f"Arquivo PDF não encontrado: {args.pdf}")
+        return 1
+    layout_path = caminho_layout(args.pdf)
+    if os.path.exists(layout_path):
+        with open(layout_path, encoding="utf-8") as f:
+            aplicar_layout(json.load(f), extrair_bncc)
+
+    print(f"Capturando corpus de {args.pdf} -> {args.saida}")
+    with capturar(args.saida) as gravador:
+        with contextlib.redirect_stdout(io.StringIO()):
+            pdf = pdfplumber.open(args.pdf)
+            try:
+                extrair_bncc.extract_ei_final(pdf)
+                extrair_bncc.extract_ef_final(pdf)
+                extrair_bncc.extract_em_final(pdf)
+            finally:
+                extrair_bncc.fechar_pdf(pdf)
+
+    for nome in FUNCOES_CORPUS:
+        print(f"  {nome:<32} {gravador.chamadas.get(nome, 0):>8} chamadas")
+    print(f"  Conjuntos de itálico distintos: {len(gravador.ids_conjuntos)}")
+    print(f"  Máscaras de itálico: {gravador.mascaras}")
+    return 0
+
+
+def _cmd_replay(args):
+    chamadas = carregar_corpus(args.corpus)
+    extrair_bncc.configurar_memoizacao(not args.sem_memoizacao)
+    resultado = replay(chamadas, args.funcoes, args.repeticoes)
+
+    referencia = {}
+    if args.referencia:
+        with open(args.referencia, encoding="utf-8") as f:
+            referencia = json.load(f)
+
+    print(f"{'Função':<32} {'Chamadas':>9} {'ns/chamada':>12} {'Hash':>18}")
+    print("-" * 75)
+    divergentes = []
+    for nome, stats in resultado.items():
+        marca = ""
+        if nome in referencia:
+            if referencia[nome]["hash"] != stats["hash"]:
+                marca = " ❌"
+                divergentes.append(nome)
+            else:
+                antes = referencia[nome]["ns_por_chamada"]
+                marca = f" ✅ {antes / stats['ns_por_chamada']:.2f}x"
+        print(f"{nome:<32} {stats['chamadas']:>9} {stats['ns_por_chamada']:>12.0f} {stats['hash']:>18}{marca}")
+
+    if args.salvar_hashes:
+        with open(args.salvar_hashes, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados salvos em {args.salvar_hashes}")
+    if divergentes:
+        print(f"\n❌ Saídas diferentes da referência: {', '.join(divergentes)}")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corpus e micro-benchmark das funções de texto.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_cap = sub.add_parser("capturar", help="Executa a extração registrando as entradas das funções")
+    p_cap.add_argument("--pdf", default=extrair_bncc.PDF_PATH)
+    p_cap.add_argument("--saida", default="corpus_texto.jsonl.gz")
+
+    p_rep = sub.add_parser("replay", help="Reexecuta o corpus e mede cada função")
+    p_rep.add_argument("corpus")
+    p_rep.add_argument("--funcoes", nargs="+", choices=FUNCOES_CORPUS)
+    p_rep.add_argument("--repeticoes", type=int, default=3)
+    p_rep.add_argument("--referencia", help="JSON de um replay anterior (compara hashes e velocidade)")
+    p_rep.add_argument("--sem-memoizacao", action="store_true", help="Mede as funções sem o cache LRU")
+    p_rep.add_argument("--salvar-hashes", help="Grava os resultados deste replay em JSON")
+
+    args = parser.parse_args()
+    if args.comando == "capturar":
+        return _cmd_capturar(args)
+    return _cmd_replay(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
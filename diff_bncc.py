@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+DIFF - Comparação entre saídas da extração (edições do PDF ou versões do extrator)
+Carrega dois ou mais diretórios com bncc_ei/ef/em.json e compara cada um com o
+seguinte. As árvores são percorridas em paralelo pelas chaves; subárvores com
+o mesmo hash (ver hashes_bncc.py) são puladas sem comparar os registros. Nas
+que mudaram, as habilidades/objetivos são indexados por código e caminho:
+
+    adicionada          código só na versão nova
+    removida            código só na versão antiga
+    movida              mesmo código em outro lugar da árvore (ano, unidade, objeto...)
+    descricao_alterada  mesmo código com outra descrição
+    campos_alterados    mesmo código, caminho e descrição; mudaram outros campos
+                        (ex: anos_aplicaveis, competencias_associadas)
+
+Uso:
+    python diff_bncc.py saida_v1 saida_v2
+    python diff_bncc.py edicao_2017 edicao_2018 edicao_2023 --ndjson diff.ndjson
+    python diff_bncc.py antes depois --ndjson - --falhar-com-diferencas   # CI
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+from hashes_bncc import hashes_subarvores
+
+ARQUIVOS = {"ei": "bncc_ei.json", "ef": "bncc_ef.json", "em": "bncc_em.json"}
+SEPARADOR_CAMINHO = " > "
+SEPARADOR_OBJETOS = " || "  # Mesmo separador da tabela_bncc.py
+TIPOS = ("adicionada", "removida", "movida", "descricao_alterada", "campos_alterados")
+
+
+def carregar_saidas(diretorio, etapas=tuple(ARQUIVOS)):
+    """{etapa: árvore} com os bncc_*.json presentes no diretório."""
+    saidas = {}
+    for etapa in etapas:
+        caminho = os.path.join(diretorio, ARQUIVOS[etapa])
+        if os.path.exists(caminho):
+            with open(caminho, encoding="utf-8") as f:
+                saidas[etapa] = json.load(f)
+    return saidas
+
+
+# ============================================================================
+# ÍNDICE POR CÓDIGO E CAMINHO
+# ============================================================================
+
+def _eh_registro(obj):
+    return isinstance(obj, dict) and "codigo" in obj and "descricao" in obj
+
+
+def _rotulo_item(item):
+    """Rótulo de um item de lista no caminho (grupo de objetos, competência específica)."""
+    if isinstance(item, dict):
+        if "objetos" in item:
+            return SEPARADOR_OBJETOS.join(item["objetos"])
+        if "numero" in item:
+            return f"Competência Específica {item['numero']}"
+    return None
+
+
+def coletar_registros(obj, caminho, ocorrencias):
+    """Acrescenta a `ocorrencias` {código: [(caminho, registro)]} os registros da subárvore."""
+    if _eh_registro(obj):
+        ocorrencias[obj["codigo"]].append((caminho, obj))
+    elif isinstance(obj, dict):
+        for chave, valor in obj.items():
+            if isinstance(valor, (dict, list)):
+                coletar_registros(valor, caminho + (chave,), ocorrencias)
+    elif isinstance(obj, list):
+        for item in obj:
+            if isinstance(item, (dict, list)):
+                rotulo = _rotulo_item(item)
+                coletar_registros(item, caminho + (rotulo,) if rotulo else caminho, ocorrencias)
+
+
+def _descer(a, b, caminho, hashes_a, hashes_b, contexto):
+    """
+    Percorre as duas árvores em paralelo pelas chaves dos dicts. Subárvores com
+    hash igual vão para contexto["inalteradas"]; o resto é coletado por código.
+    """
+    if not isinstance(a, (dict, list)) and not isinstance(b, (dict, list)):
+        return
+    if isinstance(a, (dict, list)) and isinstance(b, (dict, list)) and hashes_a[id(a)] == hashes_b[id(b)]:
+        contexto["inalteradas"].append((caminho, a))
+        return
+    if isinstance(a, dict) and isinstance(b, dict) and not _eh_registro(a) and not _eh_registro(b):
+        contexto["nos_comparados"] += 1
+        for chave in list(a) + [c for c in b if c not in a]:
+            if chave not in b:
+                coletar_registros(a[chave], caminho + (chave,), contexto["antes"])
+            elif chave not in a:
+                coletar_registros(b[chave], caminho + (chave,), contexto["depois"])
+            else:
+                _descer(a[chave], b[chave], caminho + (chave,), hashes_a, hashes_b, contexto)
+        return
+    if isinstance(a, (dict, list)):
+        coletar_registros(a, caminho, contexto["antes"])
+    if isinstance(b, (dict, list)):
+        coletar_registros(b, caminho, contexto["depois"])
+
+
+def _formatar_caminho(caminho):
+    return SEPARADOR_CAMINHO.join(caminho)
+
+
+def _outros_campos(registro):
+    return {k: v for k, v in registro.items() if k not in ("codigo", "descricao", "hash")}
+
+
+# ============================================================================
+# DIFF
+# ============================================================================
+
+def diff_arvores(a, b, etapa, hashes_a=None, hashes_b=None):
+    """
+    Diferenças entre duas árvores da mesma etapa. Retorna (eventos, estatísticas);
+    cada evento é um dict com "tipo" (ver TIPOS), "etapa" e "codigo".
+    """
+    hashes_a = hashes_subarvores(a) if hashes_a is None else hashes_a
+    hashes_b = hashes_subarvores(b) if hashes_b is None else hashes_b
+    contexto = {"antes": defaultdict(list), "depois": defaultdict(list),
+                "inalteradas": [], "nos_comparados": 0}
+    _descer(a, b, (), hashes_a, hashes_b, contexto)
+    antes, depois = contexto["antes"], contexto["depois"]
+
+    # Um código visto só de um lado pode existir numa subárvore inalterada (ex:
+    # habilidade que deixou um dos anos); esse índice só é montado se preciso.
+    inalteradas = None
+
+    def ocorrencias_inalteradas(codigo):
+        nonlocal inalteradas
+        if inalteradas is None:
+            inalteradas = defaultdict(list)
+            for caminho, subarvore in contexto["inalteradas"]:
+                coletar_registros(subarvore, caminho, inalteradas)
+        return inalteradas.get(codigo, [])
+
+    eventos = []
+    for codigo in sorted(set(antes) | set(depois)):
+        oc_a, oc_b = antes.get(codigo, []), depois.get(codigo, [])
+        fixas = ocorrencias_inalteradas(codigo) if not (oc_a and oc_b) else []
+        todas_a, todas_b = oc_a + fixas, oc_b + fixas
+        evento = {"etapa": etapa, "codigo": codigo}
+
+        if not todas_a:
+            eventos.append(dict(evento, tipo="adicionada", descricao=oc_b[0][1]["descricao"],
+                                caminhos=sorted({_formatar_caminho(c) for c, _ in oc_b})))
+            continue
+        if not todas_b:
+            eventos.append(dict(evento, tipo="removida", descricao=oc_a[0][1]["descricao"],
+                                caminhos=sorted({_formatar_caminho(c) for c, _ in oc_a})))
+            continue
+
+        caminhos_a = {_formatar_caminho(c) for c, _ in oc_a}
+        caminhos_b = {_formatar_caminho(c) for c, _ in oc_b}
+        if caminhos_a != caminhos_b:
+            eventos.append(dict(evento, tipo="movida", de=sorted(caminhos_a - caminhos_b),
+                                para=sorted(caminhos_b - caminhos_a)))
+        reg_a, reg_b = todas_a[0][1], todas_b[0][1]
+        if reg_a["descricao"] != reg_b["descricao"]:
+            eventos.append(dict(evento, tipo="descricao_alterada",
+                                antes=reg_a["descricao"], depois=reg_b["descricao"]))
+        elif caminhos_a == caminhos_b:
+            campos_a = [_outros_campos(r) for _, r in oc_a]
+            campos_b = [_outros_campos(r) for _, r in oc_b]
+            if campos_a != campos_b:
+                alterados = sorted({k for ca, cb in zip(campos_a, campos_b)
+                                    for k in set(ca) | set(cb) if ca.get(k) != cb.get(k)})
+                eventos.append(dict(evento, tipo="campos_alterados", campos=alterados or ["ocorrencias"]))
+
+    estatisticas = {
+        "subarvores_puladas": len(contexto["inalteradas"]),
+        "nos_comparados": contexto["nos_comparados"],
+        "registros_comparados": sum(len(v) for v in antes.values()) + sum(len(v) for v in depois.values()),
+    }
+    return eventos, estatisticas
+
+
+def diff_saidas(saidas_a, saidas_b, hashes_a=None, hashes_b=None):
+    """Diff etapa por etapa entre dois conjuntos {etapa: árvore}."""
+    hashes_a = hashes_a or {}
+    hashes_b = hashes_b or {}
+    eventos = []
+    estatisticas = {}
+    for etapa in ARQUIVOS:
+        if etapa not in saidas_a or etapa not in saidas_b:
+            continue
+        ev, est = diff_arvores(saidas_a[etapa], saidas_b[etapa], etapa,
+                               hashes_a.get(etapa), hashes_b.get(etapa))
+        eventos.extend(ev)
+        estatisticas[etapa] = est
+    return eventos, estatisticas
+
+
+# ============================================================================
+# RELATÓRIOS
+# ============================================================================
+
+MARCAS = {"adicionada": "+", "removida": "-", "movida": ">", "descricao_alterada": "~", "campos_alterados": "*"}
+
+
+def _resumir(texto, limite=90):
+    return texto if len(texto) <= limite else texto[:limite - 3] + "..."
+
+
+def imprimir_relatorio(antes, depois, eventos, estatisticas, saida=sys.stdout):
+    print(f"\n=== {antes} → {depois} ===", file=saida)
+    for etapa in ARQUIVOS:
+        do_estagio = [e for e in eventos if e["etapa"] == etapa]
+        if etapa not in estatisticas:
+            continue
+        contagem = {tipo: sum(1 for e in do_estagio if e["tipo"] == tipo) for tipo in TIPOS}
+        est = estatisticas[etapa]
+        print(f"\n{etapa.upper()}: " + ", ".join(f"{n} {tipo}" for tipo, n in contagem.items() if n)
+              + ("" if do_estagio else "sem diferenças")
+              + f"  ({est['subarvores_puladas']} subárvores puladas, "
+              f"{est['registros_comparados']} registros comparados)", file=saida)
+        for e in do_estagio:
+            marca = MARCAS[e["tipo"]]
+            if e["tipo"] in ("adicionada", "removida"):
+                print(f"  {marca} {e['codigo']}  {_resumir(e['descricao'])}", file=saida)
+                for caminho in e["caminhos"]:
+                    print(f"      {caminho}", file=saida)
+            elif e["tipo"] == "movida":
+                print(f"  {marca} {e['codigo']}", file=saida)
+                for caminho in e["de"]:
+                    print(f"      de:   {caminho}", file=saida)
+                for caminho in e["para"]:
+                    print(f"      para: {caminho}", file=saida)
+            elif e["tipo"] == "descricao_alterada":
+                print(f"  {marca} {e['codigo']}", file=saida)
+                print(f"      antes:  {_resumir(e['antes'])}", file=saida)
+                print(f"      depois: {_resumir(e['depois'])}", file=saida)
+            else:
+                print(f"  {marca} {e['codigo']}  campos: {', '.join(e['campos'])}", file=saida)
+
+
+def escrever_ndjson(antes, depois, eventos, saida):
+    """Um evento por linha, com os diretórios comparados em "de_versao"/"para_versao"."""
+    for evento in eventos:
+        saida.write(json.dumps({"de_versao": antes, "para_versao": depois, **evento}, ensure_ascii=False) + "\n")
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara saídas da extração BNCC (cada diretório com o seguinte).")
+    parser.add_argument("diretorios", nargs="+", help="Dois ou mais diretórios com bncc_*.json, em ordem")
+    parser.add_argument("--etapas", nargs="+", choices=list(ARQUIVOS), default=list(ARQUIVOS))
+    parser.add_argument("--ndjson", help="Grava os eventos em NDJSON ('-' para a saída padrão)")
+    parser.add_argument("--falhar-com-diferencas", action="store_true",
+                        help="Código de saída 1 quando houver diferenças")
+    args = parser.parse_args()
+
+    if len(args.diretorios) < 2:
+        parser.error("informe pelo menos dois diretórios")
+    for diretorio in args.diretorios:
+        if not os.path.isdir(diretorio):
+            parser.error(f"diretório não encontrado: {diretorio}")
+
+    ndjson = None
+    if args.ndjson:
+        ndjson = sys.stdout if args.ndjson == "-" else open(args.ndjson, "w", encoding="utf-8")
+    relatorio = sys.stderr if args.ndjson == "-" else sys.stdout
+
+    inicio = time.perf_counter()
+    total = 0
+    # Cada versão é carregada e tem os hashes calculados uma só vez
+    anterior = None
+    try:
+        for diretorio in args.diretorios:
+            saidas = carregar_saidas(diretorio, args.etapas)
+            atual = (diretorio, saidas, {etapa: hashes_subarvores(arvore) for etapa, arvore in saidas.items()})
+            if anterior is not None:
+                eventos, estatisticas = diff_saidas(anterior[1], atual[1], anterior[2], atual[2])
+                total += len(eventos)
+                imprimir_relatorio(anterior[0], diretorio, eventos, estatisticas, relatorio)
+                if ndjson:
+                    escrever_ndjson(anterior[0], diretorio, eventos, ndjson)
+            anterior = atual
+    finally:
+        if ndjson and ndjson is not sys.stdout:
+            ndjson.close()
+
+    print(f"\n{total} diferenças em {len(args.diretorios) - 1} comparações "
+          f"({time.perf_counter() - inicio:.2f}s)", file=relatorio)
+    return 1 if args.falhar_com_diferencas and total else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,30 @@
-import pdfplumber
 import re
+import io
 import json
 import unicodedata
 import os
+import gzip
+import argparse
+import atexit
+import functools
+import sys
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from hashes_bncc import anotar_hashes, salvar_manifesto
+from modelos_bncc import (CompetenciaEspecifica, Habilidade, HabilidadeLP, ObjetivoEI,
+                          campos, habilidades_de_json, json_default, para_json)
+from tabela_bncc import TabelaHabilidades, adicionar_ef, adicionar_ei, adicionar_em
 
 # --- CONFIGURAÇÃO ---
 PDF_PATH = "BNCC_EI_EF_110518_versaofinal_site.pdf"
 EI_PAGE_RANGE = range(35, 60)
 EF_PAGE_RANGE = range(57, 465)  # Includes all EF content incl. Ensino Religioso 9º Ano (page 461)
 EM_PAGE_RANGE = range(460, 600)
+EM_FINAL_PAGE_RANGE = range(480, 600)  # Competências + habilidades (extract_em_final)
+EM_LP_PAGE_RANGE = range(506, 530)  # Tabelas de LP; o fim marca o limite da área de Linguagens
 
 RE_CODE_EI_FULL = re.compile(r"EI(\d{2})([A-Z]{2})\d{2}")
 RE_CODE_EF = re.compile(r"\(?(EF\d{2,3}([A-Z]{2})\d{2,3})\)?") 
@@ -61,6 +77,175 @@ EM_AREA_PAGES = {
     "Ciências Humanas e Sociais Aplicadas": (570, 600)
 }
 
+# --- REGRAS DE CLASSIFICAÇÃO ---
+# As heurísticas de texto ficam aqui como dados (prefixos, trechos e regras
+# em ordem de prioridade) e são compiladas na importação num único regex cada:
+# classificar uma célula é uma só varredura, e uma nova edição do documento se
+# ajusta editando as tabelas, sem tocar nos extratores.
+
+def compilar_detector(regras):
+    """
+    Compila [(nome, (padrão, ...)), ...] num único regex. O detector devolve o
+    nome da primeira regra (na ordem da lista) com algum padrão no texto, o mesmo
+    resultado de uma cadeia de if/elif com `in`, numa só varredura do texto.
+    Os padrões entram em lookahead para que ocorrências sobrepostas sejam vistas.
+    """
+    nomes = [nome for nome, _ in regras]
+    grupos = "|".join(f"(?P<r{i}>{'|'.join(re.escape(p) for p in padroes)})"
+                      for i, (_, padroes) in enumerate(regras))
+    regex = re.compile(f"(?=(?:{grupos}))")
+
+    def detectar(texto, excluir=()):
+        melhor = None
+        for m in regex.finditer(texto):
+            i = int(m.lastgroup[1:])
+            if (melhor is None or i < melhor) and nomes[i] not in excluir:
+                melhor = i
+                if i == 0:
+                    break
+        return nomes[melhor] if melhor is not None else None
+    return detectar
+
+
+def compilar_classificador(inicios=(), trechos=()):
+    """
+    Compila "começa com um dos `inicios` ou contém um dos `trechos`" num único
+    regex; o classificador devolve True/False, como a cadeia de startswith/`in`.
+    """
+    alternativas = [f"\\A(?:{'|'.join(map(re.escape, inicios))})"] if inicios else []
+    alternativas.extend(map(re.escape, trechos))
+    regex = re.compile("|".join(alternativas))
+    return lambda texto: regex.search(texto) is not None
+
+
+# Componente do EF pelo cabeçalho/rodapé (em maiúsculas).
+# Ordem = prioridade: padrões de área com componente específico primeiro
+REGRAS_COMPONENTE_EF = [
+    ("História", ("CIÊNCIAS HUMANAS – HISTÓRIA", "HISTÓRIA –")),
+    ("Geografia", ("CIÊNCIAS HUMANAS – GEOGRAFIA", "GEOGRAFIA –")),
+    ("Ciências", ("CIÊNCIAS DA NATUREZA – CIÊNCIAS", "CIÊNCIAS –")),
+    ("Arte", ("LINGUAGENS – ARTE", "\nARTE –", "\nARTE\n")),
+    ("Educação Física", ("LINGUAGENS – EDUCAÇÃO FÍSICA", "EDUCAÇÃO FÍSICA –")),
+    ("Língua Inglesa", ("LINGUAGENS – LÍNGUA INGLESA", "LÍNGUA INGLESA –")),
+    ("Língua Portuguesa", ("LINGUAGENS – LÍNGUA PORTUGUESA", "LÍNGUA PORTUGUESA –")),
+    ("Ensino Religioso", ("ENSINO RELIGIOSO –", "\nENSINO RELIGIOSO\n")),
+    ("Matemática", ("MATEMÁTICA –", "\nMATEMÁTICA\n")),
+]
+
+# Área do EM pelo texto da página (em maiúsculas)
+REGRAS_AREA_EM = [
+    ("Linguagens e suas Tecnologias", ("LINGUAGENS E SUAS TECNOLOGIAS",)),
+    ("Matemática e suas Tecnologias", ("MATEMÁTICA E SUAS TECNOLOGIAS",)),
+    ("Ciências da Natureza e suas Tecnologias", ("CIÊNCIAS DA NATUREZA E SUAS TECNOLOGIAS",)),
+    ("Ciências Humanas e Sociais Aplicadas", ("CIÊNCIAS HUMANAS E SOCIAIS APLICADAS",)),
+]
+
+# Campo de atuação nas tabelas de LP do EM (coluna 0, em maiúsculas)
+REGRAS_CAMPO_LP_EM = [
+    ("Todos os Campos de Atuação Social", ("TODOS OS CAMPOS",)),
+    ("Campo da Vida Pessoal", ("CAMPO DA VIDA PESSOAL",)),
+    ("Campo de Atuação na Vida Pública", ("CAMPO DE ATUAÇÃO NA VIDA PÚBLICA",)),
+    ("Campo das Práticas de Estudo e Pesquisa", ("CAMPO DAS PRÁTICAS DE ESTUDO",)),
+    ("Campo Jornalístico-Midiático", ("CAMPO JORNALÍSTICO",)),
+    ("Campo Artístico-Literário", ("CAMPO ARTÍSTICO",)),
+]
+
+# Células sem código que continuam a descrição do campo de atuação (EF)
+INICIOS_CONTINUACAO_CAMPO = (
+    "Trata-se", "Considerando", "Essas habilidades", "Para além", "É importante",
+    "Vários são",  # Campo Jornalístico
+    "Diversos também", "Ainda com relação", "Nesse campo",  # Continuação
+    "A formação",  # Campo Artístico-Literário
+)
+TRECHOS_CONTINUACAO_CAMPO = ("vivências significativas", "articulação com todas as áreas")
+
+# Textos (em maiúsculas) que são nome de Campo/Eixo; "Oralidade *considerar..." não é
+INICIOS_CAMPO_EIXO = ("CAMPO", "EIXO", "TODOS")  # "TODOS OS CAMPOS DE ATUAÇÃO"
+TRECHOS_CAMPO_EIXO = ("CAMPO DE ATUAÇÃO", "CAMPOS DE ATUAÇÃO", "CAMPO DAS", "CAMPO DA")
+
+# Sinais de que o nome do campo vem seguido da descrição
+TRECHOS_DESCRICAO_CAMPO = (" – ", " - ", "Trata-se", "O que está")
+
+# Início da descrição do campo, em ordem de preferência (o último é o genérico)
+SEPARADORES_CAMPO = (
+    " – Trata-se",
+    " – O que está",
+    " – Este campo",
+    " – Neste campo",
+    " – Campo de",
+    " – Práticas de",
+    " – ",
+)
+
+# Frases que abrem novo parágrafo na descrição do campo
+INICIOS_PARAGRAFO_CAMPO = (
+    "Trata-se também",
+    "Para além",
+    "Essas habilidades",
+    "Considerando",
+    "Além disso",
+    "É importante",
+    "Nesse sentido",
+    "Dessa forma",
+)
+
+detectar_componente_ef = compilar_detector(REGRAS_COMPONENTE_EF)
+detectar_area_em = compilar_detector(REGRAS_AREA_EM)
+detectar_campo_lp_em = compilar_detector(REGRAS_CAMPO_LP_EM)
+detectar_separador_campo = compilar_detector([(sep, (sep,)) for sep in SEPARADORES_CAMPO])
+eh_continuacao_campo = compilar_classificador(INICIOS_CONTINUACAO_CAMPO, TRECHOS_CONTINUACAO_CAMPO)
+eh_campo_ou_eixo = compilar_classificador(INICIOS_CAMPO_EIXO, TRECHOS_CAMPO_EIXO)
+tem_descricao_campo = compilar_classificador(trechos=TRECHOS_DESCRICAO_CAMPO)
+RE_INICIO_PARAGRAFO_CAMPO = re.compile(f" ({'|'.join(map(re.escape, INICIOS_PARAGRAFO_CAMPO))})")
+
+
+# --- MEMOIZAÇÃO (funções puras de texto) ---
+# As mesmas strings são normalizadas muitas vezes: o campo corrente em cada
+# habilidade × ano, os cabeçalhos de tabela repetidos em toda página. As
+# funções puras marcadas com @memoizar guardam os últimos resultados num LRU
+# de tamanho limitado; configurar_memoizacao(False) volta às originais.
+
+MEMOIZAR = True
+TAMANHO_CACHE_TEXTO = 4096  # Entradas por função
+_MEMOIZADAS = {}  # nome -> (função original, função com cache)
+
+
+def memoizar(tamanho=TAMANHO_CACHE_TEXTO):
+    """Decorador: LRU limitado para uma função pura de argumentos imutáveis."""
+    def decorar(funcao):
+        com_cache = functools.lru_cache(maxsize=tamanho)(funcao)
+        _MEMOIZADAS[funcao.__name__] = (funcao, com_cache)
+        return com_cache if MEMOIZAR else funcao
+    return decorar
+
+
+def configurar_memoizacao(ativa):
+    """Liga/desliga a memoização (troca as funções do módulo) e zera os caches."""
+    global MEMOIZAR
+    MEMOIZAR = ativa
+    limpar_memoizacao()
+    for nome, (funcao, com_cache) in _MEMOIZADAS.items():
+        globals()[nome] = com_cache if ativa else funcao
+
+
+def limpar_memoizacao():
+    for _, com_cache in _MEMOIZADAS.values():
+        com_cache.cache_clear()
+
+
+def resumo_memoizacao():
+    if not MEMOIZAR:
+        return "Memoização: desligada"
+    linhas = ["Memoização (acertos/chamadas):"]
+    for nome, (_, com_cache) in _MEMOIZADAS.items():
+        info = com_cache.cache_info()
+        chamadas = info.hits + info.misses
+        taxa = info.hits / chamadas if chamadas else 0.0
+        linhas.append(f"  {nome:<24} {info.hits:>8}/{chamadas:<8} {taxa:>6.1%}  "
+                      f"({info.currsize}/{info.maxsize} entradas)")
+    return "\n".join(linhas)
+
+
 # --- FUNÇÕES PARA EXTRAÇÃO DE ITÁLICO ---
 
 def build_formatted_text_from_chars(chars):
@@ -159,7 +344,11 @@ def extract_italic_words(page):
     Extrai todas as palavras/frases em itálico de uma página.
     Retorna um set de strings que estão em itálico.
     """
-    chars = page.chars
+    return palavras_italico(page.chars)
+
+
+def palavras_italico(chars):
+    """Palavras em itálico de uma lista de caracteres (os da página ou os de uma célula)."""
     if not chars:
         return set()
     
@@ -235,6 +424,161 @@ def apply_italic_formatting(text, italic_words):
     return result
 
 
+# --- ITÁLICOS POR CÉLULA ---
+# Nas tabelas, os itálicos vêm como trechos [início, fim] no texto de cada
+# célula (o que Table.extract devolve), calculados só com os caracteres dentro
+# da bbox da célula. A limpeza e o recorte das descrições levam a máscara
+# junto (ver transportar_mascara), e os asteriscos entram na posição exata,
+# sem casar as palavras itálicas da página inteira em cada descrição.
+
+TOLERANCIA_TEXTO = {"x_tolerance": 3, "y_tolerance": 3}  # text_settings padrão de extract_tables
+RE_PALAVRA = re.compile(r"\S+")
+# Trocas caractere a caractere feitas por format_special_chars
+_TROCAS_ESPECIAIS = {"º": "o", "ª": "a", "²": "2", "³": "3", "⁴": "4", "⁵": "5", "⁶": "6", "⁷": "7", "⁸": "8", "⁹": "9"}
+
+
+def _eh_italico(char):
+    fontname = char.get("fontname", "")
+    return "Italic" in fontname or "Oblique" in fontname
+
+
+def _dentro(char, bbox):
+    # Mesmo critério de Table.extract: o centro do caractere está na bbox
+    x0, top, x1, bottom = bbox
+    h_mid = (char["x0"] + char["x1"]) / 2
+    v_mid = (char["top"] + char["bottom"]) / 2
+    return x0 <= h_mid < x1 and top <= v_mid < bottom
+
+
+def spans_italico_celula(chars, texto):
+    """
+    Trechos em itálico dos caracteres de uma célula, como [[início, fim], ...]
+    em `texto`. Remonta o texto como pdfplumber.utils.extract_text (palavras
+    agrupadas em linhas) para saber a posição de cada caractere. Cada trecho
+    fica dentro de uma palavra e tem mais de 2 caracteres, como em
+    extract_italic_words. Retorna None se a remontagem não bate com `texto`.
+    """
+    from pdfplumber.utils.clustering import cluster_objects
+    from pdfplumber.utils.text import WordExtractor, get_line_cluster_key
+
+    extrator = WordExtractor(**TOLERANCIA_TEXTO)
+    palavras = extrator.extract_words(chars, return_chars=True)
+    linhas = cluster_objects(palavras, get_line_cluster_key(extrator.line_dir), TOLERANCIA_TEXTO["y_tolerance"])
+    partes, spans, pos = [], [], 0
+    for i, linha in enumerate(linhas):
+        for j, palavra in enumerate(linha):
+            if i or j:
+                partes.append(" " if j else "\n")
+                pos += 1
+            inicio = None
+            for c in palavra["chars"]:
+                if _eh_italico(c):
+                    if inicio is None: inicio = pos
+                elif inicio is not None:
+                    spans.append([inicio, pos]); inicio = None
+                t = extrator.expansions.get(c["text"], c["text"] or "")
+                partes.append(t)
+                pos += len(t)
+            if inicio is not None:
+                spans.append([inicio, pos])
+    if "".join(partes) != texto:
+        return None
+    return [span for span in spans if span[1] - span[0] > 2]
+
+
+def italicos_tabelas(page, tabelas, textos):
+    """
+    Itálicos das células das tabelas de find_tables, a partir dos textos
+    extraídos delas: ([[tabela, linha, coluna, spans], ...], [[tabela, linha,
+    coluna, palavras], ...]). Só as células que contêm algum caractere itálico
+    são remontadas; as que não se deixam remontar (ver spans_italico_celula)
+    ficam com as palavras itálicas da célula, como nos registros por página.
+    """
+    italicos = [c for c in page.chars if _eh_italico(c)]
+    if not italicos:
+        return [], []
+    celulas, sem_alinhamento = [], []
+    for t, tabela in enumerate(tabelas):
+        for r, row in enumerate(tabela.rows):
+            italicos_linha = [c for c in italicos if _dentro(c, row.bbox)]
+            if not italicos_linha:
+                continue
+            chars_linha = None
+            for col, bbox in enumerate(row.cells):
+                if bbox is None or not any(_dentro(c, bbox) for c in italicos_linha):
+                    continue
+                if chars_linha is None:
+                    chars_linha = [c for c in page.chars if _dentro(c, row.bbox)]
+                chars_celula = [c for c in chars_linha if _dentro(c, bbox)]
+                spans = spans_italico_celula(chars_celula, textos[t][r][col])
+                if spans is None:
+                    sem_alinhamento.append([t, r, col, sorted(palavras_italico(chars_celula))])
+                elif spans:
+                    celulas.append([t, r, col, spans])
+    return celulas, sem_alinhamento
+
+
+def mascara_italico(texto, spans):
+    """Máscara por caractere de `texto` (True = itálico) a partir dos trechos."""
+    mascara = [False] * len(texto)
+    for inicio, fim in spans:
+        mascara[inicio:fim] = [True] * (fim - inicio)
+    return mascara
+
+
+def _mesma_palavra(origem, destino):
+    return origem == destino or all(_TROCAS_ESPECIAIS.get(a, a) == _TROCAS_ESPECIAIS.get(b, b) for a, b in zip(origem, destino))
+
+
+def transportar_mascara(origem, mascara, destino):
+    """
+    Máscara de itálico de `destino`, um texto derivado de `origem` só por
+    mudanças de espaçamento, cortes no início e trocas caractere a caractere
+    (clean_text_basic, processar_descricao). As palavras são alinhadas a partir
+    do fim; uma palavra que mudou de tamanho (NFKC) fica inteira em itálico se
+    tinha algum caractere itálico. Retorna None se o alinhamento não fecha.
+    """
+    palavras_origem = [(m.start(), m.end()) for m in RE_PALAVRA.finditer(origem)]
+    palavras_destino = [(m.start(), m.end()) for m in RE_PALAVRA.finditer(destino)]
+    if len(palavras_destino) > len(palavras_origem):
+        return None
+    saida = [False] * len(destino)
+    for k, ((io_, fo), (id_, fd)) in enumerate(zip(reversed(palavras_origem), reversed(palavras_destino))):
+        tamanho = fd - id_
+        primeira = k == len(palavras_destino) - 1
+        if tamanho == fo - io_ or (primeira and tamanho < fo - io_):
+            # Mesma palavra (ou a primeira, cortada à esquerda): alinha pelo fim
+            if not _mesma_palavra(origem[fo - tamanho:fo], destino[id_:fd]):
+                return None
+            saida[id_:fd] = mascara[fo - tamanho:fo]
+        else:
+            saida[id_:fd] = [any(mascara[io_:fo])] * tamanho
+    return saida
+
+
+def aplicar_mascara_italico(texto, mascara):
+    """Envolve em *...* cada trecho itálico de `texto` (sem atravessar espaços)."""
+    if not mascara or not any(mascara):
+        return texto
+    partes = []
+    aberto = False
+    for ch, italico in zip(texto, mascara):
+        italico = italico and not ch.isspace()
+        if italico != aberto:
+            partes.append("*")
+            aberto = italico
+        partes.append(ch)
+    if aberto:
+        partes.append("*")
+    return "".join(partes)
+
+
+def palavras_mascara(texto, mascara):
+    """Conjunto de palavras itálicas (alternativa a transportar_mascara quando o alinhamento falha)."""
+    return {texto[m.start():m.end()] for m in RE_PALAVRA.finditer(texto)
+            if any(mascara[m.start():m.end()]) and m.end() - m.start() > 2}
+
+
 def parse_campo_name_description(raw_text):
     """
     Separa nome de Campo/Eixo da sua descrição e aplica formatação inteligente.
@@ -251,60 +595,43 @@ def parse_campo_name_description(raw_text):
     - Exceção: primeira palavra sempre maiúscula
     - Hífens: preservar capitalização em cada parte
     """
+    nome, descricao = _partes_campo(raw_text)
+    return {"nome": nome, "descricao": descricao}
+
+
+@memoizar()
+def _partes_campo(raw_text):
+    """(nome, descrição) de parse_campo_name_description; em tupla para o cache não ser alterado por quem chama."""
     if not raw_text:
-        return {"nome": "", "descricao": ""}
+        return "", ""
     
     # Só processa se for realmente um Campo/Eixo
     # Textos como "Oralidade *considerar..." não são campos
-    upper_text = raw_text.upper()
-    is_campo_or_eixo = (
-        upper_text.startswith("CAMPO") or 
-        upper_text.startswith("EIXO") or
-        upper_text.startswith("TODOS") or  # "TODOS OS CAMPOS DE ATUAÇÃO"
-        "CAMPO DE ATUAÇÃO" in upper_text or
-        "CAMPOS DE ATUAÇÃO" in upper_text or  # plural
-        "CAMPO DAS" in upper_text or
-        "CAMPO DA" in upper_text
-    )
-    
-    if not is_campo_or_eixo:
+    if not eh_campo_ou_eixo(raw_text.upper()):
         # Retorna texto original sem parsing
-        return {"nome": raw_text, "descricao": ""}
+        return raw_text, ""
     
     # Caso simples: Campo sem descrição (ex: "TODOS OS CAMPOS DE ATUAÇÃO")
     # Verifica se tem separador de descrição
-    has_separator = any(sep in raw_text for sep in [" – ", " - ", "Trata-se", "O que está"])
-    if not has_separator:
-        return {"nome": _smart_title_case(raw_text), "descricao": ""}
-    
-    # Identificadores de início de descrição
-    separadores = [
-        " – Trata-se",
-        " – O que está",
-        " – Este campo",
-        " – Neste campo",
-        " – Campo de",
-        " – Práticas de",
-        " – ",  # Fallback genérico
-    ]
+    if not tem_descricao_campo(raw_text):
+        return _smart_title_case(raw_text), ""
     
     nome_raw = raw_text
     descricao = ""
     
-    # Tenta encontrar o separador
-    for sep in separadores:
-        if sep in raw_text:
-            parts = raw_text.split(sep, 1)
-            nome_raw = parts[0].strip()
-            if len(parts) > 1:
-                # Reconstrói o início da descrição
-                if sep != " – ":
-                    # Recoloca o início que foi perdido no split
-                    inicio = sep.replace(" – ", "").strip()
-                    descricao = inicio + parts[1]
-                else:
-                    descricao = parts[1].strip()
-            break
+    # Separador de início da descrição (SEPARADORES_CAMPO, em ordem de preferência)
+    sep = detectar_separador_campo(raw_text)
+    if sep:
+        parts = raw_text.split(sep, 1)
+        nome_raw = parts[0].strip()
+        if len(parts) > 1:
+            # Reconstrói o início da descrição
+            if sep != " – ":
+                # Recoloca o início que foi perdido no split
+                inicio = sep.replace(" – ", "").strip()
+                descricao = inicio + parts[1]
+            else:
+                descricao = parts[1].strip()
     
     # Aplica Title Case inteligente ao nome
     nome_formatado = _smart_title_case(nome_raw)
@@ -312,12 +639,10 @@ def parse_campo_name_description(raw_text):
     # Formata a descrição com quebras de linha inteligentes
     descricao_formatada = _format_campo_description(descricao) if descricao else ""
     
-    return {
-        "nome": nome_formatado,
-        "descricao": descricao_formatada
-    }
+    return nome_formatado, descricao_formatada
 
 
+@memoizar()
 def _smart_title_case(text):
     """
     Aplica Title Case inteligente, mantendo preposições e artigos em minúsculo.
@@ -393,20 +718,8 @@ def _format_campo_description(text):
     # Adiciona quebra antes de marcadores de lista
     text = re.sub(r'\s*[-–•]\s+', '\n- ', text)
     
-    # Adiciona quebra antes de frases que começam novo parágrafo
-    paragraph_starters = [
-        'Trata-se também',
-        'Para além',
-        'Essas habilidades',
-        'Considerando',
-        'Além disso',
-        'É importante',
-        'Nesse sentido',
-        'Dessa forma',
-    ]
-    
-    for starter in paragraph_starters:
-        text = text.replace(f' {starter}', f'\n\n{starter}')
+    # Adiciona quebra antes de frases que começam novo parágrafo (INICIOS_PARAGRAFO_CAMPO)
+    text = RE_INICIO_PARAGRAFO_CAMPO.sub(r'\n\n\1', text)
     
     # Remove quebras duplicadas
     text = re.sub(r'\n{3,}', '\n\n', text)
@@ -418,6 +731,7 @@ def _format_campo_description(text):
 
 # --- UTILITÁRIOS ---
 
+@memoizar()
 def clean_text_basic(text):
     if not text: return ""
     text = unicodedata.normalize("NFKC", text)
@@ -426,6 +740,40 @@ def clean_text_basic(text):
     lines = [re.sub(r'[ \t]+', ' ', line).strip() for line in lines]
     return '\n'.join(line for line in lines if line)
 
+# Limpeza por tabela: as células são unidas por SEPARADOR_CELULAS e passam
+# juntas pelo NFKC e pela limpeza de espaços de clean_text_basic (substituições
+# sobre o texto da tabela inteira, não por linha de cada célula). O separador
+# é de uso privado: não é espaço e não se compõe no NFKC. Tabelas com o
+# separador no texto ou com espaços incomuns (\r, \v, U+2028...) voltam à
+# limpeza célula a célula.
+SEPARADOR_CELULAS = "\ue000"
+RE_ESPACOS = re.compile(r" [ \t]+|\t[ \t]*")  # Sequências de espaço/tab que não são um espaço simples
+# Espaços (str.isspace) que sobram do NFKC além de espaço, tab e \n
+RE_OUTROS_ESPACOS = re.compile("[\r\x0b\x0c\x1c-\x1f\x85\u1680\u2028\u2029]")
+# Linhas vazias no início/fim da célula e entre linhas
+RE_QUEBRAS_ANTES = re.compile(r"\n+\ue000")
+RE_QUEBRAS_DEPOIS = re.compile(r"\ue000\n+")
+RE_LINHAS_VAZIAS = re.compile(r"\n\n+")
+
+def limpar_tabela(table):
+    """
+    clean_text_basic de todas as células de uma tabela numa só passada.
+    Retorna a matriz de textos limpos ("" nas células vazias).
+    """
+    textos = [cell for row in table if row for cell in row if cell]
+    junto = unicodedata.normalize("NFKC", SEPARADOR_CELULAS + SEPARADOR_CELULAS.join(textos) + SEPARADOR_CELULAS)
+    if junto.count(SEPARADOR_CELULAS) != len(textos) + 1 or RE_OUTROS_ESPACOS.search(junto):
+        return [[clean_text_basic(cell) if cell else "" for cell in row] if row else [] for row in table]
+    junto = RE_ESPACOS.sub(" ", junto)
+    # Com os espaços já colapsados, o strip de cada linha é tirar um espaço encostado nas bordas
+    for borda, troca in ((" " + SEPARADOR_CELULAS, SEPARADOR_CELULAS), (SEPARADOR_CELULAS + " ", SEPARADOR_CELULAS),
+                         (" \n", "\n"), ("\n ", "\n")):
+        junto = junto.replace(borda, troca)
+    junto = RE_QUEBRAS_DEPOIS.sub(SEPARADOR_CELULAS, RE_QUEBRAS_ANTES.sub(SEPARADOR_CELULAS, junto))
+    junto = RE_LINHAS_VAZIAS.sub("\n", junto)
+    limpos = iter(junto.split(SEPARADOR_CELULAS)[1:-1])
+    return [[next(limpos) if cell else "" for cell in row] if row else [] for row in table]
+
 def clean_item_sintese(text):
     if not text: return ""
     text = unicodedata.normalize("NFKC", text)
@@ -512,37 +860,658 @@ def expandir_anos_ef(codigo_bncc):
     if not anos: return [f"Ano {digits}"]
     return [f"{a}º Ano" for a in anos]
 
+# --- DETECÇÃO DE COMPONENTE/ÁREA (cabeçalhos) ---
+
+# Faixas da página (fração da altura) onde ficam os cabeçalhos e rodapés com o
+# nome do componente/área. No EF só elas são lidas como texto.
+FAIXA_CABECALHO = 0.12
+FAIXA_RODAPE = 0.08
+
+
+def texto_cabecalho(page):
+    """
+    Texto das faixas de cabeçalho e rodapé, sem extrair a página inteira.
+    Filtra só os caracteres das faixas (page.crop recorta todos os objetos da
+    página e sai mais caro que o próprio extract_text da página inteira).
+    As faixas vêm entre quebras de linha, para que os padrões de linha inteira
+    ("\nARTE\n") casem também com um título que é a única linha da faixa.
+    """
+    limite_topo = page.bbox[1] + page.height * FAIXA_CABECALHO
+    limite_rodape = page.bbox[3] - page.height * FAIXA_RODAPE
+    topo = page.filter(lambda obj: obj["object_type"] == "char" and obj["bottom"] <= limite_topo)
+    rodape = page.filter(lambda obj: obj["object_type"] == "char" and obj["top"] >= limite_rodape)
+    return "\n" + "\n".join([topo.extract_text() or "", rodape.extract_text() or ""]) + "\n"
+
+
+def texto_componente_ef(page):
+    """
+    Texto de onde sai o componente do EF: as faixas de cabeçalho/rodapé ou,
+    se nelas nenhum componente é detectado (ex: título "MATEMÁTICA – ..." no
+    meio da página), o texto da página inteira.
+    """
+    faixas = texto_cabecalho(page)
+    if detectar_componente_ef(faixas.upper()):
+        return faixas
+    return page.extract_text() or ""
+
+
+def divergencias_cabecalho(pdf, page_range=None):
+    """
+    Páginas do EF em que o componente detectado pelas faixas (texto_componente_ef)
+    difere do detectado no texto da página inteira: [(página, faixas, página inteira)].
+    """
+    acessor = paginas(pdf)
+    divergencias = []
+    for page_num in page_range or paginas_etapa("ef"):
+        if page_num >= len(acessor):
+            break
+        page = acessor[page_num]
+        pelas_faixas = detectar_componente_ef(texto_componente_ef(page).upper())
+        pela_pagina = detectar_componente_ef((page.extract_text() or "").upper())
+        if pelas_faixas != pela_pagina:
+            divergencias.append((page_num, pelas_faixas, pela_pagina))
+    return divergencias
+
+
+# --- REGISTROS DE PÁGINA (captura e replay) ---
+
+TABLE_SETTINGS_LINES = {"vertical_strategy": "lines", "horizontal_strategy": "lines"}
+
+
+def registro_pagina(page, page_num, texto=False, cabecalho=False, tabelas=False, italicos=False):
+    """
+    Extrai de uma página apenas o que os construtores de árvore consomem:
+    texto corrido (ou só o das faixas de cabeçalho/rodapé, ver
+    texto_componente_ef), tabelas
+    (estratégia "lines") e os trechos em itálico de cada célula
+    ([tabela, linha, coluna, spans], ver italicos_tabelas; as células cujo
+    texto não se deixa remontar vão em "italicos_palavras", com as palavras).
+    O registro é um dict serializável em JSON, o que permite gravá-lo e
+    reexecutar as heurísticas sem o PDF.
+    """
+    registro = {"pagina": page_num}
+    if texto:
+        registro["texto"] = page.extract_text() or ""
+    if cabecalho:
+        registro["cabecalho"] = texto_componente_ef(page)
+    if tabelas or italicos:
+        # Mesmo resultado de page.extract_tables, mantendo as bboxes das células
+        encontradas = page.find_tables(TABLE_SETTINGS_LINES)
+        textos = [tabela.extract(**TOLERANCIA_TEXTO) for tabela in encontradas]
+        if tabelas:
+            registro["tabelas"] = textos
+        if italicos:
+            registro["italicos_celulas"], palavras = italicos_tabelas(page, encontradas, textos)
+            if palavras:
+                registro["italicos_palavras"] = palavras
+    return registro
+
+
+def coletar_registros(pdf):
+    """Coleta os registros das três etapas ({"ei": [...], "ef": [...], "em": [...]})."""
+    return {etapa: list(registros_etapa(pdf, etapa)) for etapa in ("ei", "ef", "em")}
+
+
+def gravar_registros(caminho, registros_por_etapa):
+    """Grava os registros em JSONL comprimido (uma página por linha, com a etapa)."""
+    with gzip.open(caminho, "wt", encoding="utf-8") as f:
+        for etapa, registros in registros_por_etapa.items():
+            for registro in registros:
+                f.write(json.dumps({"etapa": etapa, **registro}, ensure_ascii=False) + "\n")
+
+
+def carregar_registros(caminho):
+    """Carrega registros gravados por gravar_registros, agrupados por etapa."""
+    registros_por_etapa = {"ei": [], "ef": [], "em": []}
+    with gzip.open(caminho, "rt", encoding="utf-8") as f:
+        for linha in f:
+            registro = json.loads(linha)
+            registros_por_etapa.setdefault(registro.pop("etapa"), []).append(registro)
+    return registros_por_etapa
+
+
+# --- ACESSO ÀS PÁGINAS (LRU) ---
+# O pdfplumber guarda o layout de cada página acessada (caracteres, linhas,
+# retângulos) até o PDF ser fechado. O acesso pelas PaginasLRU mantém
+# residentes só as últimas CAPACIDADE_PAGINAS páginas usadas e fecha as
+# demais; uma página despejada que volte a ser pedida é reparseada.
+
+CAPACIDADE_PAGINAS = 8  # Páginas com layout residente por PDF; 0 = sem limite
+
+
+class PaginasLRU:
+    """Páginas de um PDF com LRU de capacidade configurável e contadores de acertos/faltas/despejos."""
+
+    def __init__(self, pdf, capacidade=None):
+        self._pdf = weakref.ref(pdf)  # O acessor vive no próprio PDF: sem referência forte de volta
+        self.capacidade = CAPACIDADE_PAGINAS if capacidade is None else capacidade
+        self._residentes = OrderedDict()  # page_num -> Page, da menos à mais recente
+        self.acertos = self.faltas = self.despejos = 0
+
+    @property
+    def pdf(self):
+        return self._pdf()
+
+    def __len__(self):
+        return len(self.pdf.pages)
+
+    def __getitem__(self, page_num):
+        page = self._residentes.get(page_num)
+        if page is not None:
+            self._residentes.move_to_end(page_num)
+            self.acertos += 1
+            return page
+        self.faltas += 1
+        page = self.pdf.pages[page_num]
+        self._residentes[page_num] = page
+        while self.capacidade and len(self._residentes) > self.capacidade:
+            _, antiga = self._residentes.popitem(last=False)
+            antiga.close()  # Descarta o layout em cache da página
+            self.despejos += 1
+        return page
+
+    def estatisticas(self):
+        return {"acertos": self.acertos, "faltas": self.faltas, "despejos": self.despejos,
+                "residentes": len(self._residentes), "capacidade": self.capacidade}
+
+    def liberar(self):
+        """Fecha e solta as páginas residentes."""
+        while self._residentes:
+            _, page = self._residentes.popitem()
+            page.close()
+
+
+ATRIBUTO_ACESSOR = "_paginas_lru"  # Onde o acessor fica guardado no objeto do PDF
+
+
+def paginas(pdf):
+    """
+    Acesso LRU às páginas do PDF (um por documento aberto, compartilhado entre
+    as etapas). O acessor é guardado no próprio PDF, e não num registro global,
+    para ser coletado junto com ele; fechar_pdf o solta ao fechar o documento.
+    """
+    acessor = getattr(pdf, ATRIBUTO_ACESSOR, None)
+    if acessor is None:
+        acessor = PaginasLRU(pdf)
+        setattr(pdf, ATRIBUTO_ACESSOR, acessor)
+    return acessor
+
+
+def fechar_pdf(pdf):
+    """Fecha o PDF e solta o acessor de páginas (e o layout das páginas residentes)."""
+    acessor = pdf.__dict__.pop(ATRIBUTO_ACESSOR, None)
+    if acessor is not None:
+        acessor.liberar()
+    pdf.close()
+
+
+def resumo_paginas(pdf):
+    e = paginas(pdf).estatisticas()
+    capacidade = e["capacidade"] or "sem limite"
+    return (f"Páginas: {e['faltas']} lidas, {e['acertos']} reaproveitadas, {e['despejos']} despejadas "
+            f"(capacidade {capacidade})")
+
+
+# --- LEITURA EM PARALELO (produtor/consumidor) ---
+# Com WORKERS > 1, processos leem as páginas (layout, tabelas, itálicos) e o
+# processo principal monta a árvore à medida que a próxima página em ordem
+# chega, em vez de esperar a leitura de todas.
+
+WORKERS = 1  # Processos de leitura; 1 = leitura sequencial no processo principal
+JANELA_POR_WORKER = 4  # Páginas em andamento por worker (despachadas e ainda não consumidas)
+COMPARTILHAR_PDF = True  # Workers abrem o PDF de um buffer em memória compartilhada, não do disco
+
+_PDFS_COMPARTILHADOS = {}  # caminho -> (SharedMemory, tamanho)
+
+
+def _caminho_pdf(pdf):
+    return getattr(pdf.stream, "name", PDF_PATH)
+
+
+class _LeitorMemoria(io.RawIOBase):
+    """Arquivo somente leitura sobre um memoryview: o pdfminer lê dele sem copiar o buffer inteiro."""
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, destino):
+        n = max(0, min(len(destino), len(self._buffer) - self._pos))
+        destino[:n] = self._buffer[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._buffer)}[whence]
+        self._pos = max(0, base + pos)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+
+def pdf_compartilhado(caminho):
+    """
+    Carrega os bytes do PDF uma vez numa área de memória compartilhada e
+    retorna a fonte que os workers recebem ("shm", nome, tamanho). A área é
+    liberada ao fim do processo.
+    """
+    if caminho not in _PDFS_COMPARTILHADOS:
+        from multiprocessing import shared_memory
+        tamanho = os.path.getsize(caminho)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, tamanho))
+        with open(caminho, "rb") as f, shm.buf[:tamanho] as destino:
+            f.readinto(destino)
+        if not _PDFS_COMPARTILHADOS:
+            atexit.register(liberar_pdfs_compartilhados)
+        _PDFS_COMPARTILHADOS[caminho] = (shm, tamanho)
+    shm, tamanho = _PDFS_COMPARTILHADOS[caminho]
+    return ("shm", shm.name, tamanho)
+
+
+def liberar_pdfs_compartilhados():
+    while _PDFS_COMPARTILHADOS:
+        _, (shm, _) = _PDFS_COMPARTILHADOS.popitem()
+        shm.close()
+        shm.unlink()
+
+
+def _rss_pico_kb():
+    import resource
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico // 1024 if sys.platform == "darwin" else pico  # macOS informa em bytes
+
+
+def _worker_registros(fonte, tarefas, resultados, criado_em):
+    """
+    Lê as páginas pedidas em `tarefas` até receber None; devolve (página,
+    registro, erro). `fonte` é o caminho do PDF ou ("shm", nome, tamanho). Ao
+    sair, envia (None, medidas, None) com o tempo de início e o pico de RSS.
+    """
+    import pdfplumber
+    shm = visao = None
+    if isinstance(fonte, tuple):
+        from multiprocessing import shared_memory
+        _, nome, tamanho = fonte
+        shm = shared_memory.SharedMemory(name=nome)
+        visao = shm.buf[:tamanho]
+        arquivo = io.BufferedReader(_LeitorMemoria(visao))
+    else:
+        arquivo = open(fonte, "rb")
+    try:
+        try:
+            pdf = pdfplumber.open(arquivo)
+            acessor = paginas(pdf)
+            len(acessor)  # Xref e árvore de páginas: uma vez por worker
+        except Exception as e:
+            resultados.put((None, None, f"{type(e).__name__}: {e}"))
+            return
+        inicio = time.time() - criado_em
+        while True:
+            tarefa = tarefas.get()
+            if tarefa is None:
+                break
+            page_num, campos = tarefa
+            try:
+                registro = registro_pagina(acessor[page_num], page_num, **campos)
+            except Exception as e:
+                resultados.put((page_num, None, f"{type(e).__name__}: {e}"))
+            else:
+                resultados.put((page_num, registro, None))
+        fechar_pdf(pdf)
+    finally:
+        arquivo.close()
+        if shm is not None:
+            visao.release()
+            shm.close()
+    resultados.put((None, {"inicio": inicio, "rss_kb": _rss_pico_kb()}, None))
+
+
+def _tamanho_fila(fila):
+    try:
+        return fila.qsize()
+    except NotImplementedError:  # macOS
+        return 0
+
+
+def iter_registros_paralelo(caminho, tarefas, workers=None, janela=None):
+    """
+    Registros das `tarefas` [(página, campos)] lidos por `workers` processos,
+    entregues na ordem das tarefas (buffer de reordenação). No máximo `janela`
+    páginas ficam em andamento: se quem consome atrasa, os workers deixam de
+    receber páginas, então a memória fica limitada. Com COMPARTILHAR_PDF, os
+    bytes do PDF são lidos uma vez e os workers os abrem da memória
+    compartilhada. Ao fim imprime a profundidade da fila, o tempo em que o
+    consumidor ficou parado, o tempo de início dos workers e o RSS somado deles.
+    """
+    import multiprocessing
+    import queue
+    workers = workers or WORKERS
+    janela = janela or JANELA_POR_WORKER * workers
+    tarefas = list(tarefas)
+    posicao = {page_num: i for i, (page_num, _) in enumerate(tarefas)}
+    fonte = pdf_compartilhado(caminho) if COMPARTILHAR_PDF else caminho
+    fila_tarefas = multiprocessing.Queue()
+    resultados = multiprocessing.Queue()
+    processos = [multiprocessing.Process(target=_worker_registros,
+                                         args=(fonte, fila_tarefas, resultados, time.time()),
+                                         daemon=True) for _ in range(workers)]
+    for processo in processos:
+        processo.start()
+
+    prontos = {}  # Buffer de reordenação: posição -> registro
+    despachadas = entregues = 0
+    parado = 0.0
+    profundidades = []
+    try:
+        while entregues < len(tarefas):
+            while despachadas < len(tarefas) and despachadas - entregues < janela:
+                fila_tarefas.put(tarefas[despachadas])
+                despachadas += 1
+            if entregues not in prontos:
+                inicio = time.perf_counter()
+                page_num, registro, erro = resultados.get()
+                parado += time.perf_counter() - inicio
+                if page_num is None:
+                    raise RuntimeError(f"Falha ao abrir o PDF no worker: {erro}")
+                if erro:
+                    raise RuntimeError(f"Falha ao ler a página {page_num}: {erro}")
+                prontos[posicao[page_num]] = registro
+                continue
+            # Páginas lidas à espera do consumidor (buffer + fila de resultados)
+            profundidades.append(len(prontos) + _tamanho_fila(resultados))
+            registro = prontos.pop(entregues)
+            entregues += 1
+            yield registro
+    finally:
+        for _ in processos:
+            fila_tarefas.put(None)
+        medidas = []  # Enviadas por cada worker ao sair
+        while len(medidas) < len(processos):
+            try:
+                page_num, dados, _ = resultados.get(timeout=5)
+            except queue.Empty:
+                break
+            if page_num is None and dados:
+                medidas.append(dados)
+        for processo in processos:
+            processo.join(timeout=5)
+            if processo.is_alive():
+                processo.terminate()
+        if profundidades:
+            print(f"  Pipeline: {entregues}/{len(tarefas)} páginas, {workers} workers, "
+                  f"fila média {sum(profundidades) / len(profundidades):.1f} (máx. {max(profundidades)}, "
+                  f"janela {janela}), consumidor parado {parado:.2f}s")
+        if medidas:
+            origem = "da memória compartilhada" if COMPARTILHAR_PDF else "do disco"
+            rss = [m["rss_kb"] / 1024 for m in medidas]
+            print(f"  Workers (PDF {origem}): início médio {sum(m['inicio'] for m in medidas) / len(medidas):.2f}s, "
+                  f"RSS somado {sum(rss):.0f} MB (máx. {max(rss):.0f} MB)")
+
+
+# --- CHECKPOINTS (retomada de execuções longas) ---
+
+CHECKPOINT_DIR = ".checkpoints_bncc"
+CHECKPOINT_A_CADA = 25  # Páginas processadas entre dois checkpoints
+
+
+def salvar_checkpoint(caminho, dados):
+    """
+    Grava o checkpoint de forma atômica (arquivo temporário + rename).
+    `caminho` também pode ser uma função, que recebe uma cópia dos dados (usado
+    pela re-extração incremental para guardar vários checkpoints por etapa).
+    """
+    if callable(caminho):
+        caminho(json.loads(json.dumps(dados, ensure_ascii=False, default=json_default)))
+        return
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, default=json_default)
+    os.replace(temporario, caminho)
+
+
+def carregar_checkpoint(caminho, etapa):
+    """
+    Retorna o último checkpoint da etapa, ou None. O checkpoint é
+    {"etapa", "concluida": True, "saida"} ao fim da etapa, ou
+    {"etapa", "concluida": False, "proxima_pagina", "estado", ...} durante ela.
+    """
+    if not caminho or not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding="utf-8") as f:
+        dados = json.load(f)
+    if dados.get("etapa") != etapa:
+        return None
+    return dados
+
+# --- EVENTOS DE PÁGINA ---
+# Cada registro de página vira uma sequência de eventos tipados (classificação
+# das tabelas e do texto), e cada etapa aplica os eventos à sua árvore. Assim
+# leitura, classificação e montagem ficam separadas: quem consome o fluxo pode
+# parar no meio, filtrar eventos ou repassá-los a outro processo.
+
+@dataclass(slots=True)
+class ComponentDetected:
+    """Componente (EF) ou área (EM) identificado no cabeçalho/texto da página."""
+    nome: str
+    page: int
+
+
+@dataclass(slots=True)
+class ContextTable:
+    """Tabela de contexto do EF: linhas (campo, unidade, objeto)."""
+    rows: list
+    page: int
+
+
+@dataclass(slots=True)
+class ContextLabel:
+    """Rótulo solto que atualiza o contexto: "unidade"/"objeto" (EF), "campo"/"praticas" (LP do EM)."""
+    tipo: str
+    text: str
+
+
+@dataclass(slots=True)
+class CampoContinuation:
+    """
+    Célula que continua a descrição do campo de atuação (EF). Sem campo atual,
+    vale como rótulo (`rotulo`: "unidade", "objeto" ou None).
+    """
+    text: str
+    rotulo: str | None = None
+
+
+@dataclass(slots=True)
+class SkillRow:
+    """Início de uma linha de dados da tabela de habilidades do EF (índice na tabela)."""
+    index: int
+
+
+@dataclass(slots=True)
+class SkillCell:
+    """
+    Habilidade/objetivo numa célula de tabela, com a descrição já tratada.
+    `row` é a linha na tabela de habilidades do EF (None nas tabelas mistas).
+    """
+    code: str
+    text: str
+    page: int
+    col: int
+    sigla: str = ""
+    row: int | None = None
+    competencias: tuple = ()  # Competências associadas (LP do EM)
+
+
+@dataclass(slots=True)
+class SynthesisRow:
+    """Linha da síntese de aprendizagens da EI: campo (sigla ou None) e itens."""
+    campo: str | None
+    itens: list
+    page: int
+
+
+@dataclass(slots=True)
+class CompetencyHeading:
+    """Competência específica do EM (número e texto) no topo da página."""
+    numero: int
+    text: str
+
+
+@dataclass(slots=True)
+class SkillStart:
+    """Habilidade do EM no texto corrido; a descrição pode continuar nas SkillLine seguintes."""
+    code: str
+    sigla: str
+    text: str
+    page: int
+
+
+@dataclass(slots=True)
+class SkillLine:
+    text: str
+
+
+@dataclass(slots=True)
+class SkillEnd:
+    """Título de competência: encerra a habilidade aberta."""
+
+
+@dataclass(slots=True)
+class PageEnd:
+    page: int
+
+
+def paginas_etapa(etapa):
+    """Faixa de páginas de uma etapa (lida na hora, pois o lote troca as faixas por documento)."""
+    if etapa == "ei":
+        return EI_PAGE_RANGE
+    if etapa == "ef":
+        return EF_PAGE_RANGE
+    return range(min(EM_FINAL_PAGE_RANGE.start, EM_LP_PAGE_RANGE.start),
+                 max(EM_FINAL_PAGE_RANGE.stop, EM_LP_PAGE_RANGE.stop))
+
+
+def paginas_da_etapa(etapa, page_range=None):
+    """[(página, campos do registro)] na ordem em que a etapa consome as páginas."""
+    page_range = paginas_etapa(etapa) if page_range is None else page_range
+    if etapa == "ei":
+        return [(p, {"tabelas": True}) for p in page_range]
+    if etapa == "ef":
+        return [(p, {"cabecalho": True, "tabelas": True, "italicos": True}) for p in page_range]
+    # EM: texto nas páginas de competências/habilidades, tabelas nas de LP
+    texto, tabelas = set(EM_FINAL_PAGE_RANGE), set(EM_LP_PAGE_RANGE)
+    return [(p, {"texto": p in texto, "tabelas": p in tabelas})
+            for p in sorted(texto | tabelas) if p in page_range]
+
+
+def registros_etapa(pdf, etapa, page_range=None):
+    """Registros de página de uma etapa, com os campos que os eventos dela consomem."""
+    acessor = paginas(pdf)
+    tarefas = [(p, campos) for p, campos in paginas_da_etapa(etapa, page_range) if p < len(acessor)]
+    if WORKERS > 1:
+        return iter_registros_paralelo(_caminho_pdf(pdf), tarefas)
+    return (registro_pagina(acessor[p], p, **campos) for p, campos in tarefas)
+
+
+def iter_page_events(pdf, page_range=None, *, etapa, registros=None):
+    """
+    Eventos tipados de uma etapa ("ei", "ef" ou "em"), página a página, com um
+    PageEnd ao fim de cada uma. Sem `registros`, lê as páginas do PDF sob
+    demanda (faixa da etapa por padrão); com eles, usa só os de `page_range`.
+    """
+    eventos_pagina = {"ei": eventos_pagina_ei, "ef": eventos_pagina_ef, "em": eventos_pagina_em}[etapa]
+    if registros is None:
+        registros = registros_etapa(pdf, etapa, page_range)
+    elif page_range is not None:
+        registros = (r for r in registros if r["pagina"] in page_range)
+    for registro in registros:
+        yield from eventos_pagina(registro)
+        yield PageEnd(registro["pagina"])
+
+
 # --- EXTRATORES ---
 
-def extract_ei_final(pdf):
+def separar_itens_sintese(texto_bruto_celula):
+    if not texto_bruto_celula: return []
+    texto = unicodedata.normalize("NFKC", texto_bruto_celula)
+    linhas = texto.split('\n')
+    itens = []
+    buffer_atual = []
+    for linha in linhas:
+        linha_limpa = linha.strip()
+        if not linha_limpa: continue
+        eh_bullet = linha_limpa.startswith(('•', '-', '·'))
+        comeca_maiuscula = linha_limpa[0].isupper()
+        if not buffer_atual: buffer_atual.append(linha_limpa)
+        elif eh_bullet:
+            itens.append(" ".join(buffer_atual)); buffer_atual = [linha_limpa]
+        elif comeca_maiuscula:
+            itens.append(" ".join(buffer_atual)); buffer_atual = [linha_limpa]
+        else: buffer_atual.append(linha_limpa)
+    if buffer_atual: itens.append(" ".join(buffer_atual))
+    itens_finais = []
+    for it in itens:
+        limpo = clean_item_sintese(it)
+        if len(limpo) > 5:
+            if not limpo.endswith('.'): limpo += "."
+            itens_finais.append(limpo)
+    return itens_finais
+
+
+def eventos_pagina_ei(registro):
+    """Eventos de uma página da EI: SkillCell por objetivo e SynthesisRow por linha da síntese."""
+    page = registro["pagina"]
+    for table in registro["tabelas"]:
+        for row, limpas in zip(table, limpar_tabela(table)):  # Tabela limpa de uma vez
+            row_cells_clean = [c for c, bruta in zip(limpas, row) if bruta]
+            row_str = "".join(row_cells_clean).upper()
+            tem_codigo = False
+            for cell in row_cells_clean:
+                if "EI" in cell and RE_CODE_EI_FULL.search(cell): tem_codigo = True; break
+            if tem_codigo:
+                for col_idx, cleaned in enumerate(limpas):
+                    if not row[col_idx] or col_idx > 2: continue
+                    matches = list(RE_CODE_EI_FULL.finditer(cleaned))
+                    for i, match in enumerate(matches):
+                        start = match.end()
+                        end = matches[i+1].start() if (i + 1) < len(matches) else len(cleaned)
+                        desc = processar_descricao(cleaned[start:end], "")
+                        yield SkillCell(match.group(0), desc, page, col_idx, match.group(2))
+            elif len(row) == 2:
+                if "SÍNTESE" in row_str and len(row_cells_clean) < 3: continue
+                col_campo_clean = limpas[0]
+                # Remove newlines para comparação com nomes de campos
+                col_campo_normalized = col_campo_clean.replace('\n', ' ').upper()
+                campo = None
+                for sigla, nome in CAMPOS_EXPERIENCIA.items():
+                    if nome.upper() in col_campo_normalized: campo = sigla; break
+                yield SynthesisRow(campo, separar_itens_sintese(row[1] if row[1] else ""), page)
+
+
+def aplicar_evento_ei(output, estado, evento):
+    """Aplica um evento da EI à saída; a síntese continua no último campo visto."""
+    if isinstance(evento, SkillCell):
+        faixa = evento.code[:4]
+        if faixa in output["objetivos_aprendizagem"] and evento.sigla in CAMPOS_EXPERIENCIA:
+            output["objetivos_aprendizagem"][faixa][evento.sigla].append(ObjetivoEI(sys.intern(evento.code), evento.text))
+    elif isinstance(evento, SynthesisRow):
+        if evento.campo:
+            estado["ultimo_campo_sintese"] = evento.campo
+        if estado["ultimo_campo_sintese"] and evento.itens:
+            output["sintese_aprendizagens"][estado["ultimo_campo_sintese"]].extend(evento.itens)
+
+
+def extract_ei_final(pdf=None, registros=None, checkpoint=None, retomar=False, tabela=None):
     # (Código Original Mantido - Educação Infantil)
+    # Com `tabela` (TabelaHabilidades), os objetivos extraídos entram nela como linhas
     print("--- Processando Educação Infantil ---")
-    def separar_itens_sintese(texto_bruto_celula):
-        if not texto_bruto_celula: return []
-        texto = unicodedata.normalize("NFKC", texto_bruto_celula)
-        linhas = texto.split('\n')
-        itens = []
-        buffer_atual = []
-        for linha in linhas:
-            linha_limpa = linha.strip()
-            if not linha_limpa: continue
-            eh_bullet = linha_limpa.startswith(('•', '-', '·'))
-            comeca_maiuscula = linha_limpa[0].isupper()
-            if not buffer_atual: buffer_atual.append(linha_limpa)
-            elif eh_bullet:
-                itens.append(" ".join(buffer_atual)); buffer_atual = [linha_limpa]
-            elif comeca_maiuscula:
-                itens.append(" ".join(buffer_atual)); buffer_atual = [linha_limpa]
-            else: buffer_atual.append(linha_limpa)
-        if buffer_atual: itens.append(" ".join(buffer_atual))
-        itens_finais = []
-        for it in itens:
-            limpo = clean_item_sintese(it)
-            if len(limpo) > 5:
-                if not limpo.endswith('.'): limpo += "."
-                itens_finais.append(limpo)
-        return itens_finais
-
     output = {
         "metadata": {
             "etapa": "Educação Infantil",
@@ -561,46 +1530,38 @@ def extract_ei_final(pdf):
         },
         "sintese_aprendizagens": {k: [] for k in CAMPOS_EXPERIENCIA}
     }
-    col_map_obj = {0: "EI01", 1: "EI02", 2: "EI03"}
-    ultimo_campo_sintese = None
-
-    for page_num in EI_PAGE_RANGE:
-        if page_num >= len(pdf.pages): break
-        page = pdf.pages[page_num]
-        tables = page.extract_tables({"vertical_strategy": "lines", "horizontal_strategy": "lines"})
-        for table in tables:
-            for row in table:
-                row_cells_clean = [clean_text_basic(c) for c in row if c]
-                row_str = "".join(row_cells_clean).upper()
-                tem_codigo = False
-                for cell in row_cells_clean:
-                    if "EI" in cell and RE_CODE_EI_FULL.search(cell): tem_codigo = True; break
-                if tem_codigo:
-                    for col_idx, cell_text in enumerate(row):
-                        if not cell_text or col_idx not in col_map_obj: continue
-                        cleaned = clean_text_basic(cell_text)
-                        matches = list(RE_CODE_EI_FULL.finditer(cleaned))
-                        for i, match in enumerate(matches):
-                            codigo = match.group(0)
-                            faixa = "EI" + match.group(1)
-                            sigla = match.group(2)
-                            start = match.end()
-                            end = matches[i+1].start() if (i + 1) < len(matches) else len(cleaned)
-                            desc = processar_descricao(cleaned[start:end], "")
-                            if faixa in output["objetivos_aprendizagem"] and sigla in CAMPOS_EXPERIENCIA:
-                                output["objetivos_aprendizagem"][faixa][sigla].append({"codigo": codigo, "descricao": desc})
-                elif "SÍNTESE" in row_str or len(row) == 2:
-                    if "SÍNTESE" in row_str and len(row_cells_clean) < 3: continue
-                    if len(row) == 2:
-                        col_campo_clean = clean_text_basic(row[0] if row[0] else "")
-                        # Remove newlines para comparação com nomes de campos
-                        col_campo_normalized = col_campo_clean.replace('\n', ' ').upper()
-                        for sigla, nome in CAMPOS_EXPERIENCIA.items():
-                            if nome.upper() in col_campo_normalized: ultimo_campo_sintese = sigla; break
-                        col_texto_raw = row[1] if row[1] else ""
-                        if ultimo_campo_sintese and col_texto_raw:
-                            novos = separar_itens_sintese(col_texto_raw)
-                            output["sintese_aprendizagens"][ultimo_campo_sintese].extend(novos)
+    estado = {"ultimo_campo_sintese": None}
+    inicio = EI_PAGE_RANGE.start
+
+    dados = carregar_checkpoint(checkpoint, "ei") if retomar else None
+    if dados and dados["concluida"]:
+        print("  Etapa já concluída no checkpoint; reutilizando a saída.")
+        if tabela is not None:
+            adicionar_ei(tabela, dados["saida"])
+        return dados["saida"]
+    if dados:
+        output = dados["arvore"]
+        estado = dados["estado"]
+        inicio = dados["proxima_pagina"]
+        print(f"  Retomando do checkpoint a partir da página {inicio}")
+
+    faixa = range(inicio, EI_PAGE_RANGE.stop) if dados or registros is None else None
+    processadas = 0
+    for evento in iter_page_events(pdf, faixa, etapa="ei", registros=registros):
+        aplicar_evento_ei(output, estado, evento)
+        if isinstance(evento, PageEnd):
+            processadas += 1
+            if checkpoint and processadas % CHECKPOINT_A_CADA == 0:
+                salvar_checkpoint(checkpoint, {
+                    "etapa": "ei", "concluida": False,
+                    "proxima_pagina": evento.page + 1,
+                    "arvore": output, "estado": estado,
+                })
+    output = anotar_hashes(para_json(output))
+    if tabela is not None:
+        adicionar_ei(tabela, output)
+    if checkpoint:
+        salvar_checkpoint(checkpoint, {"etapa": "ei", "concluida": True, "saida": output})
     return output
 
 def extract_competencias_ef(pdf, page_range):
@@ -745,15 +1706,8 @@ def extract_competencias_ef(pdf, page_range):
     
     return competencias
 
-def extract_ef_final(pdf):
-    """
-    Extrai Ensino Fundamental com contexto correto de Unidade Temática e Objetos de Conhecimento.
-    
-    Estratégia: O PDF alterna entre tabelas de "contexto" (Unidades/Objetos) e tabelas de "habilidades".
-    Precisamos armazenar o contexto da tabela anterior para aplicar às habilidades.
-    """
-    print("--- Processando Ensino Fundamental (Estrutura Completa) ---")
-    
+def nova_arvore_ef(pdf=None):
+    """Inicializa a árvore do EF com a estrutura fixa (áreas, componentes e competências)."""
     # 1. Extração Prévia de Competências
     competencias_map = extract_competencias_ef(pdf, EF_PAGE_RANGE)
     
@@ -796,610 +1750,650 @@ def extract_ef_final(pdf):
                     "competencias_especificas_componente": comp_competencias,
                     "anos": {}
                 }
+    return tree
 
 
-    # ========================================================================
-    # CONTEXTO GLOBAL - Variáveis de estado entre páginas/tabelas
-    # ========================================================================
-    current_comp = None
-    current_area = None
-    
-    # Contexto de Campo/Unidade/Objeto (persistem entre tabelas da mesma página)
-    context_unidades = []  # Lista de (campo, unidade, objeto)
-    last_campo = ""  # Campo de Atuação (LP)
-    last_unidade = ""
-    last_objeto = ""
-    
-    # Dicionário para acumular continuações de descrições de campos
-    # (aplicado ao campos_metadata no final do processamento)
-    campo_desc_extra = {}  # {campo_nome_parseado: [lista de continuações]}
-    
-    # ========================================================================
-    # FUNÇÕES AUXILIARES
-    # ========================================================================
-    def is_valid_label(text):
-        """Valida se o texto é um label válido de Unidade/Objeto."""
-        if not text or len(text) < 3: return False
-        if len(text) > 300: return False
-        if RE_CODE_EF.search(text): return False
-        upper = text.upper().strip()
-        headers = ['HABILIDADES', 'UNIDADE TEMÁTICA', 'UNIDADES TEMÁTICAS', 
-                   'OBJETOS DE CONHECIMENTO', 'OBJETO DE CONHECIMENTO',
-                   'PRÁTICAS DE LINGUAGEM', 'CAMPO DE ATUAÇÃO']
-        if upper in headers: return False
-        if text.isupper() and ' ' not in text and len(text) < 15: return False
-        return True
-    
-    def is_context_table(header_str):
-        """Detecta se é uma tabela de contexto (Unidades/Objetos, sem habilidades)."""
-        has_unidade = "UNIDADE" in header_str or "CAMPO" in header_str or "PRÁTICA" in header_str
-        has_objeto = "OBJETO" in header_str or "CONHECIMENTO" in header_str
-        no_habilidade = "HABILIDADES" not in header_str
-        return (has_unidade or has_objeto) and no_habilidade
-    
-    def is_skills_table(header_str, table):
-        """Detecta se é uma tabela de habilidades."""
-        if "HABILIDADES" in header_str:
-            return True
-        # Também verifica se a tabela contém códigos de habilidade
-        for row in table[:5]:
-            for cell in row:
-                if cell and RE_CODE_EF.search(str(cell)):
-                    return True
-        return False
-    
-    def extract_context_from_table(table, num_cols):
-        """
-        Extrai contexto (Unidade, Objeto) de uma tabela, um par por linha.
-        Para LP: detecta estrutura hierárquica Campo → Prática → Objeto.
-        Retorna lista de tuplas (unidade, objeto) para correspondência com linhas de habilidade.
-        """
-        result = []
-        last_campo = ""  # Campo de Atuação (LP)
-        last_pratica = ""  # Prática de Linguagem (LP)
-        last_unidade = ""  # Unidade Temática (outros componentes)
-        
-        for row in table[1:]:  # Skip header
-            if not row or not any(c for c in row if c):
-                continue
-            
-            # Primeira coluna: pode ser Campo, Prática, ou Unidade Temática
-            col0 = clean_text_basic(row[0]) if len(row) > 0 and row[0] else ""
-            # Segunda coluna: Objetos de Conhecimento
-            col1 = clean_text_basic(row[1]) if len(row) > 1 and row[1] else ""
-            # Terceira coluna (às vezes vazia)
-            col2 = clean_text_basic(row[2]) if len(row) > 2 and row[2] else ""
-            
-            # Detecta se col0 é um Campo de Atuação (LP) ou Eixo (Inglês)
-            # LP: "CAMPO DA VIDA COTIDIANA – ...", "TODOS OS CAMPOS DE ATUAÇÃO"
-            # Inglês: "EIXO ORALIDADE – Práticas de...", "EIXO ESCRITA – ..."
-            # EXCLUI: notas com asterisco (ex: "Oralidade *Considerar...")
-            is_nota = "*" in col0 and col0.index("*") < 50  # Asterisco no início = nota
-            is_campo = (
-                not is_nota and
-                ("CAMPO" in col0.upper() or "EIXO" in col0.upper()) and 
-                ("–" in col0 or ":" in col0 or "TODOS" in col0.upper() or len(col0) > 40)
-            )
-            
-            # Detecta se col0 é uma Prática de Linguagem (LP)
-            is_pratica = not is_campo and not is_nota and is_valid_label(col0) and any(p in col0 for p in [
-                "Leitura", "Escrita", "Oralidade", "Análise", "Produção"
-            ])
-            
-            # Função para limpar newlines das unidades
-            def clean_label(s):
-                return re.sub(r'\s+', ' ', s.replace('\n', ' ')).strip()
-            
-            # Atualiza contexto hierárquico
-            if is_campo:
-                last_campo = clean_label(col0)
-                last_pratica = ""  # Reset prática quando muda campo
-            elif is_pratica:
-                # Separa nome da prática de observações (ex: "Oralidade *Considerar...")
-                pratica_text = clean_label(col0)
-                if "*" in pratica_text:
-                    parts = pratica_text.split("*", 1)
-                    pratica_nome = parts[0].strip()
-                    pratica_nota = "*" + parts[1].strip() if len(parts) > 1 else ""
-                    # Armazena nota de prática em metadata (se disponível)
-                    # Nota: praticas_metadata seria criado no add_skill_to_tree
-                else:
-                    pratica_nome = pratica_text
-                last_pratica = pratica_nome
-            elif is_valid_label(col0):
-                # Outros componentes: col0 é Unidade Temática
-                last_unidade = clean_label(col0)
-            
-            # Determina Objeto (pode estar em col1 ou col2)
-            obj_raw = col1 if is_valid_label(col1) else (col2 if is_valid_label(col2) else "")
-            
-            # Para LP/Inglês: usa Prática ou Unidade como segundo nível
-            # Para outros: usa Unidade Temática diretamente
-            # Prioridade: last_pratica > last_unidade > last_campo (fallback)
-            if last_pratica:
-                unidade_final = last_pratica
-            elif last_unidade:
-                unidade_final = last_unidade
-            else:
-                unidade_final = last_campo if last_campo else "Conteúdos"
-            # Processa objetos da célula - podem ser múltiplos objetos separados por newline
-            # Usa "||" como separador para indicar objetos distintos na mesma linha
-            if obj_raw:
-                linhas = [l.strip() for l in obj_raw.split('\n') if l.strip()]
-                
-                if len(linhas) == 1:
-                    # Único objeto
-                    obj = linhas[0]
-                    if is_valid_label(obj) and len(obj) > 5:
-                        result.append((last_campo, unidade_final, obj))
-                else:
-                    # Múltiplas linhas - detectar se são objetos separados ou continuação
-                    # Heurísticas mais robustas para identificar continuação vs novo objeto
-                    objetos_finais = []
-                    buffer = linhas[0]
-                    
-                    # Palavras que indicam continuação na próxima linha
-                    palavras_finais_continuacao = {
-                        'do', 'da', 'dos', 'das', 'de', 'no', 'na', 'nos', 'nas',
-                        'e', 'ou', 'como', 'entre', 'sobre', 'para', 'por', 'com',
-                        'ao', 'aos', 'à', 'às', 'em', 'que', 'o', 'a', 'os', 'as',
-                        'seu', 'sua', 'seus', 'suas', 'um', 'uma', 'uns', 'umas'
-                    }
-                    
-                    for i in range(1, len(linhas)):
-                        linha = linhas[i]
-                        
-                        # Analisa buffer anterior
-                        buffer_palavras = buffer.rstrip().split()
-                        ultima_palavra = buffer_palavras[-1].lower().rstrip('.,;:/') if buffer_palavras else ''
-                        buffer_termina_incompleto = buffer.rstrip().endswith((',', '-', '–', ':', '/'))
-                        buffer_termina_com_prep = ultima_palavra in palavras_finais_continuacao
-                        
-                        # Analisa linha atual
-                        primeiro_char = linha[0] if linha else ''
-                        primeira_palavra = linha.split()[0].lower() if linha.split() else ''
-                        palavras_linha = linha.split()
-                        
-                        # Preposições que indicam continuação se a linha é muito curta
-                        preps = {'no', 'na', 'nos', 'nas', 'do', 'da', 'dos', 'das', 'de', 'e'}
-                        
-                        # Heurística baseada em proporção de tamanho:
-                        # - Linha muito curta (<20 chars) após buffer longo (>30 chars) 
-                        # - E contém preposição → provavelmente continua o anterior
-                        # Ex: "Solar no Universo" (17 chars) após "..do Sistema" (45+ chars)
-                        linha_parece_continuacao = False
-                        if len(linha) < 20 and len(buffer) > 30:
-                            # Verifica se contém preposição
-                            palavras_lower = {w.lower() for w in palavras_linha}
-                            if palavras_lower & preps:
-                                linha_parece_continuacao = True
-                        
-                        # Detecta se é CONTINUAÇÃO:
-                        # 1. Buffer termina com preposição/artigo (frase incompleta)
-                        # 2. Buffer termina com pontuação incompleta
-                        # 3. Linha começa com minúscula
-                        # 4. Linha muito curta com preposição (completa frase anterior)
-                        eh_continuacao = (
-                            buffer_termina_com_prep or
-                            buffer_termina_incompleto or
-                            not primeiro_char.isupper() or
-                            primeiro_char in '•–-(' or
-                            linha_parece_continuacao
-                        )
-                        if eh_continuacao:
-                            buffer += ' ' + linha
-                        else:
-                            # Novo objeto
-                            objetos_finais.append(buffer)
-                            buffer = linha
-                    
-                    if buffer:
-                        objetos_finais.append(buffer)
-                    
-                    # Junta objetos válidos com separador || (preserva 1:1 com linha)
-                    # Limpa "/" que foi usado como marcador de continuação
-                    objs_validos = []
-                    for o in objetos_finais:
-                        # Remove "/" do final ou entre palavras (ex: "grafias/ Acentuação" -> "grafias/Acentuação")
-                        o_limpo = o.replace('/ ', '/').rstrip('/').strip()
-                        if is_valid_label(o_limpo) and len(o_limpo) > 5:
-                            objs_validos.append(o_limpo)
-                    if objs_validos:
-                        # Retorna tupla de 3: (campo, pratica/unidade, objeto)
-                        # Para LP: campo é o Campo de Atuação, pratica é a Prática de Linguagem
-                        # Para outros: campo fica vazio, unidade é usada
-                        result.append((last_campo, unidade_final, "||".join(objs_validos)))
-        
-        return result
-    
-    def add_skill_to_tree(code, desc, sigla_comp, campo_key, unidade_key, objeto_key):
-        """
-        Adiciona uma habilidade à árvore com a estrutura correta.
-        Para LP: ano → campo de atuação → prática → objetos + habilidades
-        Para outros: ano → unidade temática → objetos + habilidades
-        """
-        if sigla_comp not in MAPA_EF_ESTRUTURA:
-            return
+def novo_estado_ef():
+    """
+    Estado do EF que atravessa páginas/tabelas. Separado da árvore para que a
+    passagem possa consumir registros de página (PDF ou replay) um a um.
+    """
+    return {
+        "current_comp": None,
+        "current_area": None,
+        "context_unidades": [],  # Lista de (campo, unidade, objeto)
+        "last_campo": "",  # Campo de Atuação (LP)
+        "last_unidade": "",
+        "last_objeto": "",
+        "campo_desc_extra": {},  # {campo_nome_parseado: [lista de continuações]}
+        "contexto_linha": ("", "", ""),  # (campo, unidade, objeto) da linha de habilidades atual
+    }
+
+
+def is_valid_label(text, codigos=None):
+    """
+    Valida se o texto é um label válido de Unidade/Objeto. `codigos`: os de
+    uma CelulaEF com esse texto, para não varrer o texto com RE_CODE_EF de novo.
+    """
+    if not text or len(text) < 3: return False
+    if len(text) > 300: return False
+    if (RE_CODE_EF.search(text) if codigos is None else codigos): return False
+    upper = text.upper().strip()
+    headers = ['HABILIDADES', 'UNIDADE TEMÁTICA', 'UNIDADES TEMÁTICAS', 
+               'OBJETOS DE CONHECIMENTO', 'OBJETO DE CONHECIMENTO',
+               'PRÁTICAS DE LINGUAGEM', 'CAMPO DE ATUAÇÃO']
+    if upper in headers: return False
+    if text.isupper() and ' ' not in text and len(text) < 15: return False
+    return True
+
+
+def is_context_table(header_str):
+    """Detecta se é uma tabela de contexto (Unidades/Objetos, sem habilidades)."""
+    has_unidade = "UNIDADE" in header_str or "CAMPO" in header_str or "PRÁTICA" in header_str
+    has_objeto = "OBJETO" in header_str or "CONHECIMENTO" in header_str
+    no_habilidade = "HABILIDADES" not in header_str
+    return (has_unidade or has_objeto) and no_habilidade
+
+
+def is_skills_table(header_str, celulas):
+    """Detecta se é uma tabela de habilidades (`celulas`: a tabela tokenizada, ver tokenizar_tabela)."""
+    if "HABILIDADES" in header_str:
+        return True
+    # Também verifica se a tabela contém códigos de habilidade
+    return any(celula.codigos for row in celulas[:5] for celula in row)
+
+
+def extract_context_from_table(table, num_cols, celulas=None):
+    """
+    Extrai contexto (Unidade, Objeto) de uma tabela, um par por linha.
+    Para LP: detecta estrutura hierárquica Campo → Prática → Objeto.
+    Retorna lista de tuplas (unidade, objeto) para correspondência com linhas de habilidade.
+    `celulas`: a tabela já tokenizada (tokenizar_tabela), se disponível.
+    """
+    celulas = tokenizar_tabela(table) if celulas is None else celulas
+    result = []
+    last_campo = ""  # Campo de Atuação (LP)
+    last_pratica = ""  # Prática de Linguagem (LP)
+    last_unidade = ""  # Unidade Temática (outros componentes)
+    
+    for row, celulas_linha in zip(table[1:], celulas[1:]):  # Skip header
+        if not row or not any(c for c in row if c):
+            continue
         
-        info = MAPA_EF_ESTRUTURA[sigla_comp]
-        comp_name = info["componente"]
-        area_name = info["area"]
+        # Primeira coluna: pode ser Campo, Prática, ou Unidade Temática
+        c0 = celulas_linha[0] if len(row) > 0 else CELULA_VAZIA
+        # Segunda coluna: Objetos de Conhecimento
+        c1 = celulas_linha[1] if len(row) > 1 else CELULA_VAZIA
+        # Terceira coluna (às vezes vazia)
+        c2 = celulas_linha[2] if len(row) > 2 else CELULA_VAZIA
+        col0, col1, col2 = c0.texto, c1.texto, c2.texto
         
-        # LP e Inglês têm 4 níveis: ano → campo/eixo → prática/unidade → objetos
-        is_4_levels = comp_name in ["Língua Portuguesa", "Língua Inglesa"]
+        # Detecta se col0 é um Campo de Atuação (LP) ou Eixo (Inglês)
+        # LP: "CAMPO DA VIDA COTIDIANA – ...", "TODOS OS CAMPOS DE ATUAÇÃO"
+        # Inglês: "EIXO ORALIDADE – Práticas de...", "EIXO ESCRITA – ..."
+        # EXCLUI: notas com asterisco (ex: "Oralidade *Considerar...")
+        is_nota = "*" in col0 and col0.index("*") < 50  # Asterisco no início = nota
+        is_campo = (
+            not is_nota and
+            ("CAMPO" in col0.upper() or "EIXO" in col0.upper()) and 
+            ("–" in col0 or ":" in col0 or "TODOS" in col0.upper() or len(col0) > 40)
+        )
         
-        anos_list = expandir_anos_ef(code)
+        # Detecta se col0 é uma Prática de Linguagem (LP)
+        is_pratica = not is_campo and not is_nota and is_valid_label(col0, c0.codigos) and any(p in col0 for p in [
+            "Leitura", "Escrita", "Oralidade", "Análise", "Produção"
+        ])
         
-        # Defaults para campo (LP/Inglês) ou unidade (outros)
-        if is_4_levels:
-            if comp_name == "Língua Portuguesa":
-                if not campo_key:
-                    campo_key = "Todos os campos de atuação"
-                if not unidade_key:
-                    unidade_key = "Práticas de linguagem"
-            elif comp_name == "Língua Inglesa":
-                if not campo_key:
-                    campo_key = "Eixo oralidade"
-                if not unidade_key:
-                    unidade_key = "Interação discursiva"
-        else:
-            if not unidade_key:
-                defaults = {
-                    "Arte": "Artes integradas", "Educação Física": "Brincadeiras e jogos",
-                    "Matemática": "Números",
-                    "Ciências": "Vida e evolução", "Geografia": "O sujeito e seu lugar no mundo",
-                    "História": "Mundo pessoal: meu lugar no mundo",
-                    "Ensino Religioso": "Identidades e alteridades"
-                }
-                unidade_key = defaults.get(comp_name, "Conteúdos")
+        # Função para limpar newlines das unidades
+        def clean_label(s):
+            return re.sub(r'\s+', ' ', s.replace('\n', ' ')).strip()
         
-        # Divide objetos que foram separados por || (múltiplos objetos na mesma célula)
-        if not objeto_key or len(objeto_key.strip()) < 5:
-            objetos = ["Habilidades gerais"]
-        else:
-            obj_limpo = objeto_key.strip()
-            if obj_limpo.upper() in ['HABILIDADES', 'OBJETOS DE CONHECIMENTO', 'OBJETO DE CONHECIMENTO']:
-                objetos = ["Habilidades gerais"]
-            elif "||" in obj_limpo:
-                # Múltiplos objetos separados por ||
-                objetos = [o.strip() for o in obj_limpo.split("||") if o.strip()]
+        # Atualiza contexto hierárquico
+        if is_campo:
+            last_campo = clean_label(col0)
+            last_pratica = ""  # Reset prática quando muda campo
+        elif is_pratica:
+            # Separa nome da prática de observações (ex: "Oralidade *Considerar...")
+            pratica_text = clean_label(col0)
+            if "*" in pratica_text:
+                parts = pratica_text.split("*", 1)
+                pratica_nome = parts[0].strip()
+                pratica_nota = "*" + parts[1].strip() if len(parts) > 1 else ""
+                # Armazena nota de prática em metadata (se disponível)
+                # Nota: praticas_metadata seria criado no add_skill_to_tree
             else:
-                objetos = [obj_limpo]
+                pratica_nome = pratica_text
+            last_pratica = pratica_nome
+        elif is_valid_label(col0, c0.codigos):
+            # Outros componentes: col0 é Unidade Temática
+            last_unidade = clean_label(col0)
         
-        for ano in anos_list:
-            base = tree[area_name]["componentes"][comp_name]["anos"]
-            if ano not in base:
-                base[ano] = {}
+        # Determina Objeto (pode estar em col1 ou col2)
+        obj_raw = col1 if is_valid_label(col1, c1.codigos) else (col2 if is_valid_label(col2, c2.codigos) else "")
+        
+        # Para LP/Inglês: usa Prática ou Unidade como segundo nível
+        # Para outros: usa Unidade Temática diretamente
+        # Prioridade: last_pratica > last_unidade > last_campo (fallback)
+        if last_pratica:
+            unidade_final = last_pratica
+        elif last_unidade:
+            unidade_final = last_unidade
+        else:
+            unidade_final = last_campo if last_campo else "Conteúdos"
+        # Processa objetos da célula - podem ser múltiplos objetos separados por newline
+        # Usa "||" como separador para indicar objetos distintos na mesma linha
+        if obj_raw:
+            linhas = [l.strip() for l in obj_raw.split('\n') if l.strip()]
             
-            if is_4_levels:
-                # LP/Inglês: 4 níveis - ano → campo/eixo → prática/unidade → grupos
-                # Parseia campo_key para separar nome de descrição
-                parsed_campo = parse_campo_name_description(campo_key)
-                campo_nome = parsed_campo["nome"] or "Campo não especificado"
-                campo_descricao = parsed_campo["descricao"]
-                
-                # Inicializa campos_metadata se necessário
-                comp_base = tree[area_name]["componentes"][comp_name]
-                if "campos_metadata" not in comp_base:
-                    comp_base["campos_metadata"] = {}
-                
-                # Armazena descrição do campo (evita duplicatas)
-                if campo_nome not in comp_base["campos_metadata"] and campo_descricao:
-                    comp_base["campos_metadata"][campo_nome] = campo_descricao
+            if len(linhas) == 1:
+                # Único objeto
+                obj = linhas[0]
+                if is_valid_label(obj, ()) and len(obj) > 5:  # Trecho de obj_raw, que não tem código
+                    result.append((last_campo, unidade_final, obj))
+            else:
+                # Múltiplas linhas - detectar se são objetos separados ou continuação
+                # Heurísticas mais robustas para identificar continuação vs novo objeto
+                objetos_finais = []
+                buffer = linhas[0]
                 
-                # Usa nome limpo como chave
-                if campo_nome not in base[ano]:
-                    base[ano][campo_nome] = {}
+                # Palavras que indicam continuação na próxima linha
+                palavras_finais_continuacao = {
+                    'do', 'da', 'dos', 'das', 'de', 'no', 'na', 'nos', 'nas',
+                    'e', 'ou', 'como', 'entre', 'sobre', 'para', 'por', 'com',
+                    'ao', 'aos', 'à', 'às', 'em', 'que', 'o', 'a', 'os', 'as',
+                    'seu', 'sua', 'seus', 'suas', 'um', 'uma', 'uns', 'umas'
+                }
                 
-                if unidade_key not in base[ano][campo_nome]:
-                    base[ano][campo_nome][unidade_key] = []
+                for i in range(1, len(linhas)):
+                    linha = linhas[i]
+                    
+                    # Analisa buffer anterior
+                    buffer_palavras = buffer.rstrip().split()
+                    ultima_palavra = buffer_palavras[-1].lower().rstrip('.,;:/') if buffer_palavras else ''
+                    buffer_termina_incompleto = buffer.rstrip().endswith((',', '-', '–', ':', '/'))
+                    buffer_termina_com_prep = ultima_palavra in palavras_finais_continuacao
+                    
+                    # Analisa linha atual
+                    primeiro_char = linha[0] if linha else ''
+                    primeira_palavra = linha.split()[0].lower() if linha.split() else ''
+                    palavras_linha = linha.split()
+                    
+                    # Preposições que indicam continuação se a linha é muito curta
+                    preps = {'no', 'na', 'nos', 'nas', 'do', 'da', 'dos', 'das', 'de', 'e'}
+                    
+                    # Heurística baseada em proporção de tamanho:
+                    # - Linha muito curta (<20 chars) após buffer longo (>30 chars) 
+                    # - E contém preposição → provavelmente continua o anterior
+                    # Ex: "Solar no Universo" (17 chars) após "..do Sistema" (45+ chars)
+                    linha_parece_continuacao = False
+                    if len(linha) < 20 and len(buffer) > 30:
+                        # Verifica se contém preposição
+                        palavras_lower = {w.lower() for w in palavras_linha}
+                        if palavras_lower & preps:
+                            linha_parece_continuacao = True
+                    
+                    # Detecta se é CONTINUAÇÃO:
+                    # 1. Buffer termina com preposição/artigo (frase incompleta)
+                    # 2. Buffer termina com pontuação incompleta
+                    # 3. Linha começa com minúscula
+                    # 4. Linha muito curta com preposição (completa frase anterior)
+                    eh_continuacao = (
+                        buffer_termina_com_prep or
+                        buffer_termina_incompleto or
+                        not primeiro_char.isupper() or
+                        primeiro_char in '•–-(' or
+                        linha_parece_continuacao
+                    )
+                    if eh_continuacao:
+                        buffer += ' ' + linha
+                    else:
+                        # Novo objeto
+                        objetos_finais.append(buffer)
+                        buffer = linha
                 
-                target_list = base[ano][campo_nome][unidade_key]
-            else:
-                # Outros: 3 níveis - ano → unidade → grupos
-                if unidade_key not in base[ano]:
-                    base[ano][unidade_key] = []
+                if buffer:
+                    objetos_finais.append(buffer)
                 
-                target_list = base[ano][unidade_key]
+                # Junta objetos válidos com separador || (preserva 1:1 com linha)
+                # Limpa "/" que foi usado como marcador de continuação
+                objs_validos = []
+                for o in objetos_finais:
+                    # Remove "/" do final ou entre palavras (ex: "grafias/ Acentuação" -> "grafias/Acentuação")
+                    o_limpo = o.replace('/ ', '/').rstrip('/').strip()
+                    if is_valid_label(o_limpo, ()) and len(o_limpo) > 5:
+                        objs_validos.append(o_limpo)
+                if objs_validos:
+                    # Retorna tupla de 3: (campo, pratica/unidade, objeto)
+                    # Para LP: campo é o Campo de Atuação, pratica é a Prática de Linguagem
+                    # Para outros: campo fica vazio, unidade é usada
+                    result.append((last_campo, unidade_final, "||".join(objs_validos)))
+    
+    return result
+
+
+def add_skill_to_tree(tree, code, desc, sigla_comp, campo_key, unidade_key, objeto_key):
+    """
+    Adiciona uma habilidade à árvore com a estrutura correta.
+    Para LP: ano → campo de atuação → prática → objetos + habilidades
+    Para outros: ano → unidade temática → objetos + habilidades
+    """
+    if sigla_comp not in MAPA_EF_ESTRUTURA:
+        return
+    
+    info = MAPA_EF_ESTRUTURA[sigla_comp]
+    comp_name = info["componente"]
+    area_name = info["area"]
+    
+    # LP e Inglês têm 4 níveis: ano → campo/eixo → prática/unidade → objetos
+    is_4_levels = comp_name in ["Língua Portuguesa", "Língua Inglesa"]
+    
+    code = sys.intern(code)
+    anos_list = expandir_anos_ef(code)
+    # Um único registro para todos os anos em que a habilidade aparece
+    habilidade = Habilidade(code, desc, tuple(anos_list))
+    
+    # Defaults para campo (LP/Inglês) ou unidade (outros)
+    if is_4_levels:
+        if comp_name == "Língua Portuguesa":
+            if not campo_key:
+                campo_key = "Todos os campos de atuação"
+            if not unidade_key:
+                unidade_key = "Práticas de linguagem"
+        elif comp_name == "Língua Inglesa":
+            if not campo_key:
+                campo_key = "Eixo oralidade"
+            if not unidade_key:
+                unidade_key = "Interação discursiva"
+    else:
+        if not unidade_key:
+            defaults = {
+                "Arte": "Artes integradas", "Educação Física": "Brincadeiras e jogos",
+                "Matemática": "Números",
+                "Ciências": "Vida e evolução", "Geografia": "O sujeito e seu lugar no mundo",
+                "História": "Mundo pessoal: meu lugar no mundo",
+                "Ensino Religioso": "Identidades e alteridades"
+            }
+            unidade_key = defaults.get(comp_name, "Conteúdos")
+    
+    # Divide objetos que foram separados por || (múltiplos objetos na mesma célula)
+    if not objeto_key or len(objeto_key.strip()) < 5:
+        objetos = ["Habilidades gerais"]
+    else:
+        obj_limpo = objeto_key.strip()
+        if obj_limpo.upper() in ['HABILIDADES', 'OBJETOS DE CONHECIMENTO', 'OBJETO DE CONHECIMENTO']:
+            objetos = ["Habilidades gerais"]
+        elif "||" in obj_limpo:
+            # Múltiplos objetos separados por ||
+            objetos = [o.strip() for o in obj_limpo.split("||") if o.strip()]
+        else:
+            objetos = [obj_limpo]
+    
+    for ano in anos_list:
+        base = tree[area_name]["componentes"][comp_name]["anos"]
+        if ano not in base:
+            base[ano] = {}
+        
+        if is_4_levels:
+            # LP/Inglês: 4 níveis - ano → campo/eixo → prática/unidade → grupos
+            # Parseia campo_key para separar nome de descrição
+            parsed_campo = parse_campo_name_description(campo_key)
+            campo_nome = sys.intern(parsed_campo["nome"] or "Campo não especificado")
+            campo_descricao = parsed_campo["descricao"]
             
-            # Procura grupo existente com exatamente os mesmos objetos
-            objetos_set = tuple(sorted(objetos))  # Para comparação
-            grupo_existente = None
+            # Inicializa campos_metadata se necessário
+            comp_base = tree[area_name]["componentes"][comp_name]
+            if "campos_metadata" not in comp_base:
+                comp_base["campos_metadata"] = {}
             
-            for grupo in target_list:
-                if tuple(sorted(grupo.get("objetos", []))) == objetos_set:
-                    grupo_existente = grupo
-                    break
+            # Armazena descrição do campo (evita duplicatas)
+            if campo_nome not in comp_base["campos_metadata"] and campo_descricao:
+                comp_base["campos_metadata"][campo_nome] = campo_descricao
             
-            if grupo_existente is None:
-                # Cria novo grupo
-                grupo_existente = {"objetos": objetos, "habilidades": []}
-                target_list.append(grupo_existente)
+            # Usa nome limpo como chave
+            unidade_key = sys.intern(unidade_key)
+            if campo_nome not in base[ano]:
+                base[ano][campo_nome] = {}
             
-            # Adiciona habilidade ao grupo (sem duplicar)
-            if not any(s['codigo'] == code for s in grupo_existente["habilidades"]):
-                grupo_existente["habilidades"].append({
-                    "codigo": code, 
-                    "descricao": desc,
-                    "anos_aplicaveis": anos_list  # Lista de todos os anos onde essa habilidade se aplica
-                })
-    
-    # ========================================================================
-    # LOOP PRINCIPAL DE EXTRAÇÃO
-    # ========================================================================
-    
-    for page_num in EF_PAGE_RANGE:
-        if page_num >= len(pdf.pages):
-            break
+            if unidade_key not in base[ano][campo_nome]:
+                base[ano][campo_nome][unidade_key] = []
+            
+            target_list = base[ano][campo_nome][unidade_key]
+        else:
+            # Outros: 3 níveis - ano → unidade → grupos
+            unidade_key = sys.intern(unidade_key)
+            if unidade_key not in base[ano]:
+                base[ano][unidade_key] = []
+            
+            target_list = base[ano][unidade_key]
         
-        page = pdf.pages[page_num]
-        text_page = page.extract_text() or ""
-        text_upper = text_page.upper()
+        # Procura grupo existente com exatamente os mesmos objetos
+        objetos_set = tuple(sorted(objetos))  # Para comparação
+        grupo_existente = None
         
-        # Extrai palavras em itálico da página para formatação Markdown
-        page_italic_words = extract_italic_words(page)
+        for grupo in target_list:
+            if tuple(sorted(grupo.get("objetos", []))) == objetos_set:
+                grupo_existente = grupo
+                break
         
-        # Detecta componente atual pela página
-        # PRIORIDADE 1: Padrões de área com componente específico
-        detected_comp = None
+        if grupo_existente is None:
+            # Cria novo grupo
+            grupo_existente = {"objetos": objetos, "habilidades": []}
+            target_list.append(grupo_existente)
         
-        # Check área patterns primeiro (mais específicos)
-        if "CIÊNCIAS HUMANAS – HISTÓRIA" in text_upper or "HISTÓRIA –" in text_upper:
-            detected_comp = "História"
-        elif "CIÊNCIAS HUMANAS – GEOGRAFIA" in text_upper or "GEOGRAFIA –" in text_upper:
-            detected_comp = "Geografia"
-        elif "CIÊNCIAS DA NATUREZA – CIÊNCIAS" in text_upper or "CIÊNCIAS –" in text_upper:
-            detected_comp = "Ciências"
-        elif "LINGUAGENS – ARTE" in text_upper or "\nARTE –" in text_upper or "\nARTE\n" in text_upper:
-            detected_comp = "Arte"
-        elif "LINGUAGENS – EDUCAÇÃO FÍSICA" in text_upper or "EDUCAÇÃO FÍSICA –" in text_upper:
-            detected_comp = "Educação Física"
-        elif "LINGUAGENS – LÍNGUA INGLESA" in text_upper or "LÍNGUA INGLESA –" in text_upper:
-            detected_comp = "Língua Inglesa"
-        elif "LINGUAGENS – LÍNGUA PORTUGUESA" in text_upper or "LÍNGUA PORTUGUESA –" in text_upper:
-            detected_comp = "Língua Portuguesa"
-        elif "ENSINO RELIGIOSO –" in text_upper or "\nENSINO RELIGIOSO\n" in text_upper:
-            detected_comp = "Ensino Religioso"
-        elif "MATEMÁTICA –" in text_upper or "\nMATEMÁTICA\n" in text_upper:
-            detected_comp = "Matemática"
+        # Adiciona habilidade ao grupo (sem duplicar)
+        if not any(s.codigo == code for s in grupo_existente["habilidades"]):
+            grupo_existente["habilidades"].append(habilidade)
+
+
+def is_year_subheader(row, celulas):
+    """Sub-header com apenas labels de anos (1º ANO, 2º ANO, etc.), sem habilidades."""
+    text = ' '.join(str(c) if c else '' for c in row).strip().upper()
+    # Se a linha contém apenas combinações de "Nº ANO" sem códigos EF
+    return (bool(re.search(r'^\d+º?\s*ANO', text)) and 
+            not any(celula.codigos for celula in celulas) and
+            len(text) < 50)
+
+
+@dataclass(frozen=True, slots=True)
+class CelulaEF:
+    """
+    Célula de tabela do EF limpa e tokenizada uma vez: `codigos` traz
+    (código, sigla, início, fim) de cada casamento de RE_CODE_EF em `texto`.
+    """
+    texto: str
+    codigos: tuple = ()
+
+
+CELULA_VAZIA = CelulaEF("")
+
+
+@memoizar()
+def tokenizar_celula(texto):
+    """CelulaEF de uma célula já limpa ("" vira CELULA_VAZIA); RE_CODE_EF roda uma vez."""
+    if not texto:
+        return CELULA_VAZIA
+    codigos = tuple((m.group(1), m.group(2), m.start(), m.end()) for m in RE_CODE_EF.finditer(texto))
+    return CelulaEF(texto, codigos)
+
+
+def tokenizar_tabela(table):
+    """A tabela com cada célula trocada pela sua CelulaEF (limpeza de uma vez, por limpar_tabela)."""
+    return [[tokenizar_celula(texto) for texto in row] for row in limpar_tabela(table)]
+
+
+def _celulas_habilidade(celula, page, col, row, italicos):
+    """
+    Um SkillCell por código da célula; a descrição vai até o próximo código.
+    `italicos` é a máscara de itálico de celula.texto (registros com spans por
+    célula), um conjunto de palavras itálicas (as da célula, quando ela não tem
+    spans, ou as da página inteira, em registros antigos) ou None.
+    """
+    cell_text = celula.texto
+    codigos = celula.codigos
+    for i, (code, sigla, _, start_pos) in enumerate(codigos):
+        end_pos = codigos[i+1][2] if i+1 < len(codigos) else len(cell_text)
+        trecho = cell_text[start_pos:end_pos]
+        if isinstance(italicos, list):
+            desc = processar_descricao(trecho, code)
+            mascara_trecho = italicos[start_pos:end_pos]
+            if any(mascara_trecho):
+                mascara = transportar_mascara(trecho, mascara_trecho, desc)
+                if mascara is not None:
+                    desc = aplicar_mascara_italico(desc, mascara)
+                else:
+                    desc = apply_italic_formatting(desc, palavras_mascara(trecho, mascara_trecho))
+        else:
+            desc = processar_descricao(trecho, code, italicos)
+        yield SkillCell(code, desc, page, col, sigla, row)
+
+
+def eventos_pagina_ef(registro):
+    """
+    Eventos de um registro de página do EF (cabeçalho, tabelas e itálicos):
+    componente detectado, tabelas de contexto, rótulos soltos, continuações de
+    descrição de campo e células de habilidade.
+    """
+    page = registro["pagina"]
+    
+    # Componente pelo cabeçalho/rodapé (registros gravados antes do recorte
+    # trazem o texto da página inteira)
+    cabecalho = registro["cabecalho"] if "cabecalho" in registro else registro["texto"]
+    detected_comp = detectar_componente_ef(cabecalho.upper())
+    if detected_comp:
+        yield ComponentDetected(detected_comp, page)
+    
+    # Itálicos por célula para formatação Markdown (registros gravados antes
+    # dos spans trazem só as palavras em itálico da página inteira)
+    if "italicos_celulas" in registro:
+        spans_celulas = {(t, r, c): spans for t, r, c, spans in registro["italicos_celulas"]}
+        palavras_celulas = {(t, r, c): set(palavras) for t, r, c, palavras in registro.get("italicos_palavras", [])}
+    else:
+        spans_celulas = None
+        page_italic_words = set(registro["italicos"])
+
+    def italicos(t, r, c, cell_text):
+        if spans_celulas is None:
+            return page_italic_words
+        if (t, r, c) in palavras_celulas:
+            return palavras_celulas[(t, r, c)]  # Célula sem spans: palavras itálicas da célula
+        spans = spans_celulas.get((t, r, c))
+        if not spans:
+            return None
+        bruto = registro["tabelas"][t][r][c]
+        mascara = mascara_italico(bruto, spans)
+        if bruto == cell_text:
+            return mascara
+        transportada = transportar_mascara(bruto, mascara, cell_text)
+        return transportada if transportada is not None else palavras_mascara(bruto, mascara)
+    
+    for t_idx, table in enumerate(registro["tabelas"]):
+        if not table or len(table) < 2:
+            continue
+        celulas = tokenizar_tabela(table)  # Cada célula é limpa e varrida por códigos uma vez
         
-        if detected_comp:
-            # Encontra área correspondente
-            for sigla, info in MAPA_EF_ESTRUTURA.items():
-                if info["componente"] == detected_comp:
-                    if current_comp != detected_comp:
-                        # Mudou de componente, reseta contexto
-                        context_unidades = []
-                        last_unidade = ""
-                        last_objeto = ""
-                    current_comp = detected_comp
-                    current_area = info["area"]
-                    break
+        # Analisa header
+        header_row = [celula.texto.upper() for celula in celulas[0]]
+        header_str = " ".join(header_row)
+        num_cols = len(table[0])
         
-        # Extrai tabelas
-        tables = page.extract_tables({"vertical_strategy": "lines", "horizontal_strategy": "lines"})
+        # Skip competências
+        if "COMPETÊNCIAS" in header_str or "COMPETÊNCIA" in header_str:
+            continue
         
-        for table in tables:
-            if not table or len(table) < 2:
-                continue
-            
-            # Analisa header
-            header_row = [clean_text_basic(c).upper() if c else "" for c in table[0]]
-            header_str = " ".join(header_row)
-            num_cols = len(table[0])
-            
-            # Skip competências
-            if "COMPETÊNCIAS" in header_str or "COMPETÊNCIA" in header_str:
-                continue
+        # ============================================
+        # TABELA DE CONTEXTO (Unidades/Objetos)
+        # ============================================
+        if is_context_table(header_str):
+            new_context = extract_context_from_table(table, num_cols, celulas)
+            if new_context:
+                yield ContextTable(new_context, page)  # Lista de tuplas (campo, unidade, objeto)
+            continue
+        
+        # ============================================
+        # TABELA DE HABILIDADES
+        # ============================================
+        if is_skills_table(header_str, celulas):
+            # Processa cada linha de dados (pula header)
+            # (com o índice da linha na tabela, que localiza os itálicos da célula)
+            data_rows = [(linha, r) for linha, r in enumerate(table[1:], 1) if r and any(c for c in r if c)]
             
-            # ============================================
-            # TABELA DE CONTEXTO (Unidades/Objetos)
-            # ============================================
-            if is_context_table(header_str):
-                new_context = extract_context_from_table(table, num_cols)
-                if new_context:
-                    context_unidades = new_context  # Lista de tuplas (campo, unidade, objeto)
-                    # Atualiza last_campo/last_unidade/last_objeto para ÚLTIMA entrada
-                    # (o contexto mais recente será usado para habilidades seguintes)
-                    for c, u, o in context_unidades:
-                        if c:
-                            last_campo = c
-                        if u:
-                            last_unidade = u
-                        if o:
-                            last_objeto = o
-                continue
+            # Filtra sub-headers que contêm apenas labels de anos (1º ANO, 2º ANO, etc.)
+            # Essas linhas não contêm habilidades e causam deslocamento no mapeamento
+            data_rows = [(linha, r) for linha, r in data_rows if not is_year_subheader(r, celulas[linha])]
             
-            # ============================================
-            # TABELA DE HABILIDADES
-            # ============================================
-            if is_skills_table(header_str, table):
-                # Processa cada linha de dados (pula header)
-                data_rows = [r for r in table[1:] if r and any(c for c in r if c)]
-                
-                # Filtra sub-headers que contêm apenas labels de anos (1º ANO, 2º ANO, etc.)
-                # Essas linhas não contêm habilidades e causam deslocamento no mapeamento
-                def is_year_subheader(row):
-                    text = ' '.join(str(c) if c else '' for c in row).strip().upper()
-                    # Se a linha contém apenas combinações de "Nº ANO" sem códigos EF
-                    return (bool(re.search(r'^\d+º?\s*ANO', text)) and 
-                            not RE_CODE_EF.search(text) and
-                            len(text) < 50)
-                
-                data_rows = [r for r in data_rows if not is_year_subheader(r)]
+            # MAPEAMENTO POSICIONAL: Row N da tabela de habilidades corresponde
+            # a Row N da tabela de contexto (podem estar em páginas diferentes)
+            for row_idx, (linha, row) in enumerate(data_rows):
+                yield SkillRow(row_idx)
                 
-                # MAPEAMENTO POSICIONAL: Row N da tabela de habilidades corresponde
-                # a Row N da tabela de contexto (podem estar em páginas diferentes)
-                # context_unidades persiste da última tabela de contexto processada
-                
-                for row_idx, row in enumerate(data_rows):
-                    if not row:
+                # Processa cada célula que pode conter habilidades
+                for col_idx, celula in enumerate(celulas[linha]):
+                    if not row[col_idx]:
                         continue
                     
-                    # Determina contexto para esta linha usando mapeamento 1:1
-                    if context_unidades and row_idx < len(context_unidades):
-                        row_campo, row_unidade, row_objeto = context_unidades[row_idx]
-                    else:
-                        # Fallback: usa último contexto conhecido
-                        row_campo = last_campo
-                        row_unidade = last_unidade
-                        row_objeto = last_objeto
+                    cell_text = celula.texto
                     
-                    # Processa cada célula que pode conter habilidades
-                    for col_idx, cell in enumerate(row):
-                        if not cell:
-                            continue
-                        
-                        cell_text = clean_text_basic(cell)
-                        
-                        # Verifica se a célula contém códigos de habilidade
-                        if not RE_CODE_EF.search(cell_text):
-                            # Detecta continuação de descrição de Campo (qualquer coluna)
-                            # (texto longo sem código EF que parece descrição)
-                            if (len(cell_text) > 80 and 
-                                  (cell_text.startswith("Trata-se") or 
-                                   cell_text.startswith("Considerando") or
-                                   cell_text.startswith("Essas habilidades") or
-                                   cell_text.startswith("Para além") or
-                                   cell_text.startswith("É importante") or
-                                   cell_text.startswith("Vários são") or  # Campo Jornalístico
-                                   cell_text.startswith("Diversos também") or  # Continuação
-                                   cell_text.startswith("Ainda com relação") or  # Continuação
-                                   cell_text.startswith("Nesse campo") or  # Continuação
-                                   cell_text.startswith("A formação") or  # Campo Artístico-Literário
-                                   "vivências significativas" in cell_text or
-                                   "articulação com todas as áreas" in cell_text) and
-                                  last_campo):
-                                # Acumula continuação para aplicar no final
-                                parsed = parse_campo_name_description(last_campo)
-                                campo_nome = parsed["nome"]
-                                continuation = _format_campo_description(cell_text)
-                                if campo_nome not in campo_desc_extra:
-                                    campo_desc_extra[campo_nome] = []
-                                campo_desc_extra[campo_nome].append(continuation)
-                            # Pode ser label de Unidade/Objeto na primeira coluna
-                            elif col_idx == 0 and is_valid_label(cell_text):
-                                # Atualiza contexto para próximas linhas sem contexto
-                                if len(cell_text) < 50:
-                                    last_unidade = cell_text
-                                else:
-                                    last_objeto = cell_text
-                            continue
-                        
-                        # Extrai todos os códigos da célula
-                        matches = list(RE_CODE_EF.finditer(cell_text))
-                        
-                        for i, match in enumerate(matches):
-                            code = match.group(1)
-                            sigla_comp = match.group(2)
-                            
-                            # Extrai descrição
-                            start_pos = match.end()
-                            end_pos = matches[i+1].start() if i+1 < len(matches) else len(cell_text)
-                            desc = processar_descricao(cell_text[start_pos:end_pos], code, page_italic_words)
-                            
-                            # Usa contexto da linha ou fallback
-                            add_skill_to_tree(code, desc, sigla_comp,
-                                            row_campo if row_campo else last_campo,
-                                            row_unidade if row_unidade else last_unidade, 
-                                            row_objeto if row_objeto else last_objeto)
-                
-                
-                continue
-            
-            # ============================================
-            # TABELA MISTA (3+ colunas com Unidade/Objeto/Habilidade)
-            # ============================================
-            if num_cols >= 3:
-                for row in table[1:]:
-                    if not row or len(row) < 3:
+                    # Verifica se a célula contém códigos de habilidade
+                    if not celula.codigos:
+                        # Pode ser label de Unidade/Objeto na primeira coluna
+                        rotulo = None
+                        if col_idx == 0 and is_valid_label(cell_text, celula.codigos):
+                            rotulo = "unidade" if len(cell_text) < 50 else "objeto"
+                        # Detecta continuação de descrição de Campo (qualquer coluna)
+                        # (texto longo sem código EF que parece descrição)
+                        if len(cell_text) > 80 and eh_continuacao_campo(cell_text):
+                            yield CampoContinuation(cell_text, rotulo)
+                        elif rotulo:
+                            yield ContextLabel(rotulo, cell_text)
                         continue
                     
-                    col0 = clean_text_basic(row[0]) if row[0] else ""
-                    col1 = clean_text_basic(row[1]) if row[1] else ""
-                    col2 = clean_text_basic(row[2]) if len(row) > 2 and row[2] else ""
-                    
-                    # Atualiza contexto
-                    if is_valid_label(col0):
-                        last_unidade = col0
-                    if is_valid_label(col1):
-                        last_objeto = col1
-                    
-                    # Procura habilidades na última coluna (ou em col2)
-                    skill_text = col2 if RE_CODE_EF.search(col2) else ""
-                    if not skill_text:
-                        # Tenta col1 se col2 não tem código
-                        if RE_CODE_EF.search(col1):
-                            skill_text = col1
-                            last_objeto = ""  # col1 era habilidade, não objeto
-                    
-                    if not skill_text:
-                        continue
-                    
-                    matches = list(RE_CODE_EF.finditer(skill_text))
-                    for i, match in enumerate(matches):
-                        code = match.group(1)
-                        sigla_comp = match.group(2)
-                        start_pos = match.end()
-                        end_pos = matches[i+1].start() if i+1 < len(matches) else len(skill_text)
-                        desc = processar_descricao(skill_text[start_pos:end_pos], code, page_italic_words)
-                        
-                        add_skill_to_tree(code, desc, sigla_comp, last_campo, last_unidade, last_objeto)
-            
-            # ============================================
-            # TABELA 2 COLUNAS
-            # ============================================
-            elif num_cols == 2:
-                for row in table[1:]:
-                    if not row or len(row) < 2:
-                        continue
-                    
-                    col0 = clean_text_basic(row[0]) if row[0] else ""
-                    col1 = clean_text_basic(row[1]) if row[1] else ""
-                    
-                    # Col0 pode ser Unidade/Objeto label
-                    if is_valid_label(col0) and not RE_CODE_EF.search(col0):
-                        last_unidade = col0
-                    
-                    # Col1 geralmente tem as habilidades
-                    if not RE_CODE_EF.search(col1):
-                        continue
-                    
-                    matches = list(RE_CODE_EF.finditer(col1))
-                    for i, match in enumerate(matches):
-                        code = match.group(1)
-                        sigla_comp = match.group(2)
-                        start_pos = match.end()
-                        end_pos = matches[i+1].start() if i+1 < len(matches) else len(col1)
-                        desc = processar_descricao(col1[start_pos:end_pos], code, page_italic_words)
-                        
-                        add_skill_to_tree(code, desc, sigla_comp, last_campo, last_unidade, last_objeto)
+                    yield from _celulas_habilidade(celula, page, col_idx, row_idx,
+                                                   italicos(t_idx, linha, col_idx, cell_text))
+            continue
+        
+        # ============================================
+        # TABELA MISTA (3+ colunas com Unidade/Objeto/Habilidade)
+        # ============================================
+        if num_cols >= 3:
+            for linha, row in enumerate(table[1:], 1):
+                if not row or len(row) < 3:
+                    continue
+                
+                c0, c1, c2 = celulas[linha][:3]
+                
+                # Atualiza contexto
+                if is_valid_label(c0.texto, c0.codigos):
+                    yield ContextLabel("unidade", c0.texto)
+                if is_valid_label(c1.texto, c1.codigos):
+                    yield ContextLabel("objeto", c1.texto)
+                
+                # Procura habilidades na última coluna (ou em col2)
+                if c2.codigos:
+                    yield from _celulas_habilidade(c2, page, 2, None, italicos(t_idx, linha, 2, c2.texto))
+                elif c1.codigos:
+                    # Tenta col1 se col2 não tem código
+                    yield ContextLabel("objeto", "")  # col1 era habilidade, não objeto
+                    yield from _celulas_habilidade(c1, page, 1, None, italicos(t_idx, linha, 1, c1.texto))
+        
+        # ============================================
+        # TABELA 2 COLUNAS
+        # ============================================
+        elif num_cols == 2:
+            for linha, row in enumerate(table[1:], 1):
+                if not row or len(row) < 2:
+                    continue
+                
+                c0, c1 = celulas[linha][:2]
+                
+                # Col0 pode ser Unidade/Objeto label
+                if not c0.codigos and is_valid_label(c0.texto, c0.codigos):
+                    yield ContextLabel("unidade", c0.texto)
+                
+                # Col1 geralmente tem as habilidades
+                if c1.codigos:
+                    yield from _celulas_habilidade(c1, page, 1, None, italicos(t_idx, linha, 1, c1.texto))
+
+
+def resolver_evento_ef(estado, evento):
+    """
+    Atualiza o contexto do EF com o evento. Para habilidades e continuações de
+    campo, retorna a operação sobre a árvore, já com o contexto resolvido:
+    ("habilidade", código, descrição, sigla, campo, unidade, objeto) ou
+    ("campo_desc", nome do campo, continuação). Os demais eventos retornam None.
+    """
+    if isinstance(evento, SkillCell):
+        if evento.row is not None:
+            # Contexto da linha (tabela de contexto ou último conhecido)
+            row_campo, row_unidade, row_objeto = estado["contexto_linha"]
+        else:
+            row_campo = row_unidade = row_objeto = ""
+        return ("habilidade", evento.code, evento.text, evento.sigla,
+                row_campo if row_campo else estado["last_campo"],
+                row_unidade if row_unidade else estado["last_unidade"],
+                row_objeto if row_objeto else estado["last_objeto"])
+    elif isinstance(evento, SkillRow):
+        # Mapeamento 1:1 com a última tabela de contexto; fora dela, último contexto conhecido
+        context_unidades = estado["context_unidades"]
+        if context_unidades and evento.index < len(context_unidades):
+            estado["contexto_linha"] = context_unidades[evento.index]
+        else:
+            estado["contexto_linha"] = (estado["last_campo"], estado["last_unidade"], estado["last_objeto"])
+    elif isinstance(evento, ContextLabel):
+        estado["last_" + evento.tipo] = evento.text
+    elif isinstance(evento, ContextTable):
+        estado["context_unidades"] = evento.rows
+        # Atualiza last_campo/last_unidade/last_objeto para ÚLTIMA entrada
+        # (o contexto mais recente será usado para habilidades seguintes)
+        for c, u, o in evento.rows:
+            if c:
+                estado["last_campo"] = c
+            if u:
+                estado["last_unidade"] = u
+            if o:
+                estado["last_objeto"] = o
+    elif isinstance(evento, CampoContinuation):
+        if estado["last_campo"]:
+            # Acumula continuação para aplicar no final
+            campo_nome = parse_campo_name_description(estado["last_campo"])["nome"]
+            return ("campo_desc", campo_nome, _format_campo_description(evento.text))
+        elif evento.rotulo:
+            estado["last_" + evento.rotulo] = evento.text
+    elif isinstance(evento, ComponentDetected):
+        # Encontra área correspondente
+        for sigla, info in MAPA_EF_ESTRUTURA.items():
+            if info["componente"] == evento.nome:
+                if estado["current_comp"] != evento.nome:
+                    # Mudou de componente, reseta contexto
+                    estado["context_unidades"] = []
+                    estado["last_unidade"] = ""
+                    estado["last_objeto"] = ""
+                estado["current_comp"] = evento.nome
+                estado["current_area"] = info["area"]
+                break
+    return None
 
+
+def aplicar_operacao_ef(tree, campo_desc_extra, operacao):
+    if operacao[0] == "habilidade":
+        add_skill_to_tree(tree, *operacao[1:])
+    else:
+        _, campo_nome, continuation = operacao
+        campo_desc_extra.setdefault(campo_nome, []).append(continuation)
+
+
+def aplicar_evento_ef(tree, estado, evento):
+    """Aplica um evento do EF à árvore, atualizando o estado de contexto entre páginas."""
+    operacao = resolver_evento_ef(estado, evento)
+    if operacao:
+        aplicar_operacao_ef(tree, estado["campo_desc_extra"], operacao)
+
+
+def finalizar_arvore_ef(tree, estado, tabela=None):
+    """
+    Converte os registros para o formato JSON, passa as habilidades para a
+    tabela colunar (`tabela`, ou uma só para o resumo), imprime o resumo da
+    extração a partir dela e aplica as continuações de descrição de campos.
+    """
+    tree = para_json(tree)
+    tabela = TabelaHabilidades() if tabela is None else tabela
+    adicionar_ef(tabela, tree)
+    
     # ========================================================================
     # RELATÓRIO FINAL
     # ========================================================================
     print("\n--- Resumo da Extração EF ---")
     total_all = 0
     for area, area_data in tree.items():
-        for comp, comp_data in area_data["componentes"].items():
-            total_skills = 0
-            unique_codes = set()
-            def count_skills(obj):
-                nonlocal total_skills
-                if isinstance(obj, dict):
-                    if 'codigo' in obj: 
-                        total_skills += 1
-                        unique_codes.add(obj['codigo'])
-                    for v in obj.values(): count_skills(v)
-                elif isinstance(obj, list):
-                    for item in obj: count_skills(item)
-            count_skills(comp_data["anos"])
-            print(f"  {comp}: {total_skills} habilidades ({len(unique_codes)} códigos únicos)")
-            total_all += len(unique_codes)
+        for comp in area_data["componentes"]:
+            linhas = tabela.filtrar(etapa="EF", area=area, componente=comp)
+            unicos = len(tabela.codigos_unicos(linhas))
+            print(f"  {comp}: {len(linhas)} habilidades ({unicos} códigos únicos)")
+            total_all += unicos
     
     print(f"\n  TOTAL: {total_all} códigos únicos extraídos")
     
     # Aplica continuações de descrições de campos acumuladas
+    campo_desc_extra = estado["campo_desc_extra"]
     if campo_desc_extra:
         for area_name, area_data in tree.items():
             if "componentes" not in area_data:
@@ -1414,35 +2408,392 @@ def extract_ef_final(pdf):
                             existing = existing + "\n\n" + cont
                         comp_data["campos_metadata"][campo_nome] = existing
     
+    return anotar_hashes(tree)
+
+
+def construir_arvore_ef(registros, pdf=None, tree=None, estado=None, checkpoint=None, tabela=None):
+    """
+    Constrói a árvore do EF a partir de um fluxo de registros de página.
+    Com `tree`/`estado` (vindos de um checkpoint), continua a construção parcial.
+    """
+    if tree is None:
+        tree = nova_arvore_ef(pdf)
+        estado = novo_estado_ef()
+    processadas = 0
+    for evento in iter_page_events(pdf, etapa="ef", registros=registros):
+        aplicar_evento_ef(tree, estado, evento)
+        if isinstance(evento, PageEnd):
+            processadas += 1
+            if checkpoint and processadas % CHECKPOINT_A_CADA == 0:
+                salvar_checkpoint(checkpoint, {
+                    "etapa": "ef", "concluida": False,
+                    "proxima_pagina": evento.page + 1,
+                    "arvore": tree, "estado": estado,
+                })
+    tree = finalizar_arvore_ef(tree, estado, tabela)
+    if checkpoint:
+        salvar_checkpoint(checkpoint, {"etapa": "ef", "concluida": True, "saida": tree})
     return tree
 
 
+def _estado_ef_de_json(estado):
+    """Restaura o estado do EF lido de um checkpoint (JSON não preserva tuplas)."""
+    estado["context_unidades"] = [tuple(c) for c in estado["context_unidades"]]
+    estado["contexto_linha"] = tuple(estado.get("contexto_linha", ("", "", "")))
+    return estado
+
+
+def extract_ef_final(pdf=None, registros=None, checkpoint=None, retomar=False, tabela=None):
+    """
+    Extrai Ensino Fundamental com contexto correto de Unidade Temática e Objetos de Conhecimento.
+    
+    Estratégia: O PDF alterna entre tabelas de "contexto" (Unidades/Objetos) e tabelas de "habilidades".
+    Precisamos armazenar o contexto da tabela anterior para aplicar às habilidades.
+    Com `tabela` (TabelaHabilidades), as habilidades extraídas entram nela como linhas.
+    """
+    print("--- Processando Ensino Fundamental (Estrutura Completa) ---")
+    
+    tree = estado = None
+    inicio = EF_PAGE_RANGE.start
+    dados = carregar_checkpoint(checkpoint, "ef") if retomar else None
+    if dados and dados["concluida"]:
+        print("  Etapa já concluída no checkpoint; reutilizando a saída.")
+        if tabela is not None:
+            adicionar_ef(tabela, dados["saida"])
+        return dados["saida"]
+    if dados:
+        tree, estado = habilidades_de_json(dados["arvore"]), _estado_ef_de_json(dados["estado"])
+        inicio = dados["proxima_pagina"]
+        print(f"  Retomando do checkpoint a partir da página {inicio}")
+    
+    if registros is None:
+        registros = registros_etapa(pdf, "ef", range(inicio, EF_PAGE_RANGE.stop))
+    elif dados:
+        registros = (r for r in registros if r["pagina"] >= inicio)
+    return construir_arvore_ef(registros, pdf, tree, estado, checkpoint, tabela)
+
+
 # ========================================================================
 # EXTRAÇÃO ENSINO MÉDIO - ESTRUTURA HIERÁRQUICA
 # ========================================================================
 
-def extract_em_final(pdf):
+RE_CODE_EM13 = re.compile(r"\(?(EM13([A-Z]{2,4})(\d{2,3}))\)?")
+RE_COMP_ESP = re.compile(r"COMPETÊNCIA\s+ESPECÍFICA\s+(\d+)", re.IGNORECASE)
+
+
+def clean_text_em_final(text):
+    if not text:
+        return ""
+    # Remove hifenização de quebra de linha APENAS quando seguido de letra minúscula
+    # Ex: "artís- ticas" → "artísticas", "con- textos" → "contextos"
+    # Mas preserva: "sócio-econômico", "pós-graduação" (palavras compostas)
+    text = re.sub(r'-\s+([a-záéíóúãõâêîôûç])', r'\1', text)
+    return re.sub(r'\s+', ' ', unicodedata.normalize("NFKC", text)).strip()
+
+
+# =============================================================
+# Algoritmo probabilístico para detectar fim da competência
+# Combina múltiplos fatores indicativos
+# =============================================================
+def find_competencia_end(text):
     """
-    Extrai Ensino Médio em estrutura hierárquica:
-    - Áreas com Competências Específicas
-    - Habilidades agrupadas por Competência
-    - LP com Campos de Atuação e Competências Associadas
+    Encontra o ponto onde a competência termina e a explicação começa.
+    Usa combinação de fatores:
+    1. Frases explicativas (peso alto)
+    2. Comprimento típico de competência (150-450 chars)
+    3. Padrão de início de frase após ponto
     """
-    print("--- Processando Ensino Médio ---")
+    if not text or len(text) < 100:
+        return len(text)
+    
+    # Padrões que indicam início de explicação (peso alto: +10)
+    explanation_starters = [
+        r'Essa competência',
+        r'Nessa competência',
+        r'Esta competência',
+        r'O desenvolvimento',
+        r'Pretende-se',
+        r'Ao final do Ensino',
+        r'Ao reconhecerem',
+        r'Por fim,',
+        r'Além disso,',
+        r'Isso significa',
+        r'Para isso',
+        r'Trata-se de',
+        r'É importante',
+        r'Os jovens devem',
+        r'Os estudantes devem',
+        r'As habilidades indicadas',
+        r'As habilidades vinculadas',
+        r'As habilidades relacionadas',
+        r'No caso d[aeo]',
+        r'A partir d[aeo]',
+    ]
+    
+    # Encontra todos os pontos finais
+    period_positions = [m.end() for m in re.finditer(r'\.\s+', text)]
+    
+    if not period_positions:
+        return len(text)
+    
+    best_pos = len(text)
+    best_score = 0
+    
+    for pos in period_positions:
+        score = 0
+        remaining = text[pos:].strip()
+        text_before = text[:pos]
+        
+        # Fator 1: Frase explicativa após o ponto (peso alto)
+        for pattern in explanation_starters:
+            if re.match(pattern, remaining, re.IGNORECASE):
+                score += 10
+                break
+        
+        # Fator 2: Comprimento ideal (150-450 chars = bom)
+        if 150 <= len(text_before) <= 450:
+            score += 3
+        elif 100 <= len(text_before) <= 500:
+            score += 1
+        
+        # Fator 3: Texto antes termina completando ideia (termina em substantivo/verbo comum)
+        if text_before.rstrip().endswith(('.', 'es.', 'ão.', 'ar.', 'er.', 'ir.')):
+            score += 1
+        
+        # Fator 4: Próximo texto começa com artigo/pronome (típico de explicação)
+        if remaining and remaining[0] in 'AOEUIN':  # A, O, E, Um, Isso, Nessa
+            score += 1
+        
+        if score > best_score:
+            best_score = score
+            best_pos = pos
     
-    # Regex patterns
-    RE_CODE_EM = re.compile(r"\(?(EM13([A-Z]{2,4})(\d{2,3}))\)?")
-    RE_COMP_ESP = re.compile(r"COMPETÊNCIA\s+ESPECÍFICA\s+(\d+)", re.IGNORECASE)
-    RE_CAMPO = re.compile(r"^(TODOS OS CAMPOS|CAMPO\s+D[AEO]\s+[A-ZÁÉÍÓÚÃÕÊ\s]+)", re.IGNORECASE)
+    # Só corta se tiver alta confiança (score >= 5)
+    if best_score >= 5:
+        return best_pos - 1  # Remove o espaço após o ponto
     
-    def clean_text(text):
-        if not text:
-            return ""
-        # Remove hifenização de quebra de linha APENAS quando seguido de letra minúscula
-        # Ex: "artís- ticas" → "artísticas", "con- textos" → "contextos"
-        # Mas preserva: "sócio-econômico", "pós-graduação" (palavras compostas)
-        text = re.sub(r'-\s+([a-záéíóúãõâêîôûç])', r'\1', text)
-        return re.sub(r'\s+', ' ', unicodedata.normalize("NFKC", text)).strip()
+    return len(text)
+
+
+def novo_estado_em():
+    """
+    Estado do EM entre páginas. Como o do EF, fica fora da árvore para que a
+    extração possa ser interrompida e retomada de um checkpoint.
+    """
+    return {
+        "current_area": "",
+        "current_comp_esp": None,
+        "current_campo": "Todos os Campos de Atuação Social",
+        "current_praticas": "",
+        "comp_esp_temp": {},  # {(area, numero): CompetenciaEspecifica}
+        "lp_habilidades": [],  # Lista de HabilidadeLP (com campo e competências associadas)
+        "habilidade_aberta": None,  # Habilidade cuja descrição ainda pode continuar
+    }
+
+
+def _detectar_area_em(upper_text, page_num, current_area):
+    # Linguagens só vale até o fim das páginas de LP
+    excluir = ("Linguagens e suas Tecnologias",) if page_num >= EM_LP_PAGE_RANGE.stop else ()
+    return detectar_area_em(upper_text, excluir) or current_area
+
+
+def _texto_competencia(text):
+    """Texto da competência específica: linhas após o título, até a primeira habilidade."""
+    lines = text.split('\n')
+    comp_text = ""
+    capture = False
+    for line in lines:
+        if RE_COMP_ESP.search(line):
+            capture = True
+            continue
+        if capture:
+            clean_line = clean_text_em_final(line)
+            # Para quando encontra habilidade ou próxima competência
+            if RE_CODE_EM13.search(clean_line) or RE_COMP_ESP.search(clean_line):
+                break
+            if len(clean_line) > 10:
+                comp_text += " " + clean_line
+    
+    comp_text = clean_text_em_final(comp_text)
+    
+    end_pos = find_competencia_end(comp_text)
+    if end_pos < len(comp_text):
+        comp_text = comp_text[:end_pos].strip()
+    return comp_text
+
+
+# Cabeçalhos/rodapés corridos das páginas do EM (não fazem parte das descrições)
+RE_CABECALHO_EM = re.compile(r"(?:LINGUAGENS E SUAS TECNOLOGIAS|MATEMÁTICA E SUAS TECNOLOGIAS|"
+                             r"CIÊNCIAS DA NATUREZA E SUAS TECNOLOGIAS|CIÊNCIAS HUMANAS E SOCIAIS APLICADAS|"
+                             r"BASE NACIONAL COMUM CURRICULAR|ENSINO MÉDIO)\b")
+RE_TITULO_COMPETENCIA = re.compile(r"COMPETÊNCIA\s+ESPECÍFICA\s+\d+$")  # Linha de título, em maiúsculas
+# Descrição terminada assim está completa; sem isso, continua na página seguinte
+FINAIS_DESCRICAO = (".", "!", "?")
+
+
+def _eventos_habilidades_em(text, page):
+    """
+    Linhas de habilidades do texto corrido: SkillStart no código, SkillLine
+    para as linhas que podem continuar a descrição aberta e SkillEnd no título
+    de uma competência. A descrição aberta fica no estado, então atravessa a
+    quebra de página (ver aplicar_evento_em).
+    """
+    for line in text.split('\n'):
+        clean_line = clean_text_em_final(line)
+        match = RE_CODE_EM13.search(clean_line)
+        
+        if match:
+            start_desc = clean_line[match.end():].strip()
+            start_desc = re.sub(r"^[\s\.\-\)]+", "", start_desc)
+            yield SkillStart(match.group(1), match.group(2), start_desc, page)
+        elif RE_TITULO_COMPETENCIA.match(clean_line):
+            yield SkillEnd()
+        elif len(clean_line) > 3 and not clean_line.isdigit() and not RE_CABECALHO_EM.match(clean_line):
+            # Continua descrição
+            yield SkillLine(clean_line)
+
+
+def _eventos_lp(tabelas, page):
+    """Linhas das tabelas de LP: Campos de Atuação, práticas e habilidades com competências associadas."""
+    for table in tabelas:
+        if not table or len(table) < 2:
+            continue
+        
+        for row in table:
+            if not row or len(row) < 1:
+                continue
+            
+            col0 = clean_text_em_final(row[0]) if row[0] else ""
+            col1 = clean_text_em_final(row[1]) if len(row) > 1 and row[1] else ""
+            col0_upper = col0.upper()
+            
+            # Detecta Campo de Atuação (REGRAS_CAMPO_LP_EM)
+            campo = detectar_campo_lp_em(col0_upper)
+            if campo:
+                yield ContextLabel("campo", campo)
+            
+            # Detecta Práticas
+            if "PRÁTICAS" in col0_upper and len(col0) < 200:
+                yield ContextLabel("praticas", col0)
+            
+            # Extrai habilidade LP
+            lp_match = RE_CODE_EM13.search(col0)
+            if lp_match and lp_match.group(2) == "LP":
+                code = lp_match.group(1)
+                # Descrição é o resto da célula após o código
+                desc_start = col0[lp_match.end():].strip()
+                desc_start = re.sub(r"^[\s\.\-\)]+", "", desc_start)
+                
+                # Competências associadas (números na col1)
+                comp_assoc = []
+                if col1:
+                    nums = re.findall(r"\d+", col1)
+                    comp_assoc = [int(n) for n in nums if 1 <= int(n) <= 7]
+                
+                yield SkillCell(code, desc_start, page, 0, "LP", competencias=tuple(comp_assoc))
+
+
+def eventos_pagina_em(registro):
+    """
+    Eventos de uma página do EM, na ordem em que o estado os consome: área
+    (ComponentDetected), competência (CompetencyHeading) e habilidades do texto
+    corrido, depois campos, práticas e habilidades (SkillCell) das tabelas de LP.
+    """
+    page = registro["pagina"]
+    if "texto" in registro:
+        text = registro["texto"]
+        area = _detectar_area_em(text.upper(), page, None)
+        if area:
+            yield ComponentDetected(area, page)
+        comp_match = RE_COMP_ESP.search(text)
+        if comp_match:
+            yield CompetencyHeading(int(comp_match.group(1)), _texto_competencia(text))
+        yield from _eventos_habilidades_em(text, page)
+    if "tabelas" in registro:
+        yield from _eventos_lp(registro["tabelas"], page)
+
+
+def aplicar_evento_em(estado, evento):
+    """Máquina de estados do EM: aplica um evento de página ao estado."""
+    if isinstance(evento, ComponentDetected):
+        # Uma habilidade aberta não continua em outra área (ex: texto de abertura da área seguinte)
+        aberta = estado["habilidade_aberta"]
+        if aberta and aberta["area"] != evento.nome:
+            _fechar_habilidade_em(estado)
+        estado["current_area"] = evento.nome
+    elif isinstance(evento, CompetencyHeading):
+        comp_num, comp_text = evento.numero, evento.text
+        estado["current_comp_esp"] = comp_num
+        current_area = estado["current_area"]
+        if comp_text and current_area:
+            # Vale o primeiro texto encontrado; a competência pode já existir,
+            # sem texto, criada por uma habilidade de página anterior
+            comp = estado["comp_esp_temp"].get((current_area, comp_num))
+            if comp is None:
+                estado["comp_esp_temp"][(current_area, comp_num)] = CompetenciaEspecifica(comp_num, comp_text)
+            elif not comp.texto:
+                comp.texto = comp_text
+    elif isinstance(evento, SkillStart):
+        _fechar_habilidade_em(estado)
+        # Área e competência da página onde a habilidade começa
+        estado["habilidade_aberta"] = {
+            "codigo": evento.code, "sigla": evento.sigla,
+            "descricao": [evento.text] if evento.text else [],
+            "area": estado["current_area"], "competencia": estado["current_comp_esp"],
+        }
+    elif isinstance(evento, SkillLine):
+        if estado["habilidade_aberta"]:
+            estado["habilidade_aberta"]["descricao"].append(evento.text)
+    elif isinstance(evento, SkillEnd):
+        _fechar_habilidade_em(estado)
+    elif isinstance(evento, PageEnd):
+        # Descrição vazia ou sem ponto final continua nas primeiras linhas da próxima página
+        aberta = estado["habilidade_aberta"]
+        if aberta and aberta["descricao"] and aberta["descricao"][-1].endswith(FINAIS_DESCRICAO):
+            _fechar_habilidade_em(estado)
+    elif isinstance(evento, ContextLabel):
+        estado["current_" + evento.tipo] = evento.text
+    elif isinstance(evento, SkillCell):
+        estado["lp_habilidades"].append(HabilidadeLP(
+            sys.intern(evento.code), evento.text, estado["current_campo"], estado["current_praticas"],
+            list(evento.competencias)))
+
+
+def _fechar_habilidade_em(estado):
+    aberta = estado["habilidade_aberta"]
+    estado["habilidade_aberta"] = None
+    if aberta and aberta["descricao"]:
+        desc = clean_text_em_final(" ".join(aberta["descricao"]))
+        _add_em_habilidade(estado["comp_esp_temp"], aberta["area"], aberta["competencia"],
+                           aberta["codigo"], aberta["sigla"], desc)
+
+
+def _estado_em_para_json(estado):
+    """comp_esp_temp tem chaves (area, numero); em JSON vira lista de [area, numero, dados]."""
+    return {
+        **estado,
+        "comp_esp_temp": [[area, num, campos(comp)] for (area, num), comp in estado["comp_esp_temp"].items()],
+        "lp_habilidades": [campos(hab) for hab in estado["lp_habilidades"]],
+    }
+
+
+def _estado_em_de_json(estado):
+    return {
+        "habilidade_aberta": None,  # Checkpoints anteriores à continuação entre páginas
+        **estado,
+        "comp_esp_temp": {(area, num): CompetenciaEspecifica.de_dict(dados)
+                          for area, num, dados in estado["comp_esp_temp"]},
+        "lp_habilidades": [HabilidadeLP.de_dict(hab) for hab in estado["lp_habilidades"]],
+    }
+
+
+def montar_arvore_em(estado, tabela=None):
+    """
+    Monta a estrutura final a partir do estado acumulado nas páginas e passa
+    as habilidades para a tabela colunar (`tabela`, ou uma só para as estatísticas).
+    """
+    _fechar_habilidade_em(estado)  # Última habilidade do fluxo
+    comp_esp_temp = estado["comp_esp_temp"]
     
     # Estrutura de saída
     tree = {
@@ -1465,341 +2816,108 @@ def extract_em_final(pdf):
         }
     }
     
-    # Estado de processamento
-    current_area = ""
-    current_comp_esp = None
-    current_campo = ""
-    current_praticas = ""
-    
-    # Dicionário temporário para competências
-    comp_esp_temp = {}  # {(area, numero): {"texto": str, "habilidades": []}}
-    lp_habilidades = []  # Lista de habilidades LP com competências associadas
-    
-    # ========================================================================
-    # FASE 1: Extrair Competências Específicas e suas descrições
-    # ========================================================================
-    
-    for page_num in range(480, 600):
-        if page_num >= len(pdf.pages):
-            break
-        
-        page = pdf.pages[page_num]
-        text = page.extract_text() or ""
-        upper_text = text.upper()
-        
-        # Detecta área atual
-        if "LINGUAGENS E SUAS TECNOLOGIAS" in upper_text and page_num < 530:
-            current_area = "Linguagens e suas Tecnologias"
-        elif "MATEMÁTICA E SUAS TECNOLOGIAS" in upper_text:
-            current_area = "Matemática e suas Tecnologias"
-        elif "CIÊNCIAS DA NATUREZA E SUAS TECNOLOGIAS" in upper_text:
-            current_area = "Ciências da Natureza e suas Tecnologias"
-        elif "CIÊNCIAS HUMANAS E SOCIAIS APLICADAS" in upper_text:
-            current_area = "Ciências Humanas e Sociais Aplicadas"
-        
-        # Detecta Competência Específica
-        comp_match = RE_COMP_ESP.search(text)
-        if comp_match and current_area:
-            comp_num = int(comp_match.group(1))
-            
-            # Extrai texto da competência (próximas linhas após o título)
-            lines = text.split('\n')
-            comp_text = ""
-            capture = False
-            for line in lines:
-                if RE_COMP_ESP.search(line):
-                    capture = True
-                    continue
-                if capture:
-                    clean_line = clean_text(line)
-                    # Para quando encontra habilidade ou próxima competência
-                    if RE_CODE_EM.search(clean_line) or RE_COMP_ESP.search(clean_line):
-                        break
-                    if len(clean_line) > 10:
-                        comp_text += " " + clean_line
-            
-            comp_text = clean_text(comp_text)
-            
-            # =============================================================
-            # Algoritmo probabilístico para detectar fim da competência
-            # Combina múltiplos fatores indicativos
-            # =============================================================
-            def find_competencia_end(text):
-                """
-                Encontra o ponto onde a competência termina e a explicação começa.
-                Usa combinação de fatores:
-                1. Frases explicativas (peso alto)
-                2. Comprimento típico de competência (150-450 chars)
-                3. Padrão de início de frase após ponto
-                """
-                if not text or len(text) < 100:
-                    return len(text)
-                
-                # Padrões que indicam início de explicação (peso alto: +10)
-                explanation_starters = [
-                    r'Essa competência',
-                    r'Nessa competência',
-                    r'Esta competência',
-                    r'O desenvolvimento',
-                    r'Pretende-se',
-                    r'Ao final do Ensino',
-                    r'Ao reconhecerem',
-                    r'Por fim,',
-                    r'Além disso,',
-                    r'Isso significa',
-                    r'Para isso',
-                    r'Trata-se de',
-                    r'É importante',
-                    r'Os jovens devem',
-                    r'Os estudantes devem',
-                    r'As habilidades indicadas',
-                    r'As habilidades vinculadas',
-                    r'As habilidades relacionadas',
-                    r'No caso d[aeo]',
-                    r'A partir d[aeo]',
-                ]
-                
-                # Encontra todos os pontos finais
-                period_positions = [m.end() for m in re.finditer(r'\.\s+', text)]
-                
-                if not period_positions:
-                    return len(text)
-                
-                best_pos = len(text)
-                best_score = 0
-                
-                for pos in period_positions:
-                    score = 0
-                    remaining = text[pos:].strip()
-                    text_before = text[:pos]
-                    
-                    # Fator 1: Frase explicativa após o ponto (peso alto)
-                    for pattern in explanation_starters:
-                        if re.match(pattern, remaining, re.IGNORECASE):
-                            score += 10
-                            break
-                    
-                    # Fator 2: Comprimento ideal (150-450 chars = bom)
-                    if 150 <= len(text_before) <= 450:
-                        score += 3
-                    elif 100 <= len(text_before) <= 500:
-                        score += 1
-                    
-                    # Fator 3: Texto antes termina completando ideia (termina em substantivo/verbo comum)
-                    if text_before.rstrip().endswith(('.', 'es.', 'ão.', 'ar.', 'er.', 'ir.')):
-                        score += 1
-                    
-                    # Fator 4: Próximo texto começa com artigo/pronome (típico de explicação)
-                    if remaining and remaining[0] in 'AOEUIN':  # A, O, E, Um, Isso, Nessa
-                        score += 1
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_pos = pos
-                
-                # Só corta se tiver alta confiança (score >= 5)
-                if best_score >= 5:
-                    return best_pos - 1  # Remove o espaço após o ponto
-                
-                return len(text)
-            
-            end_pos = find_competencia_end(comp_text)
-            if end_pos < len(comp_text):
-                comp_text = comp_text[:end_pos].strip()
-            
-            if comp_text:
-                key = (current_area, comp_num)
-                if key not in comp_esp_temp:
-                    comp_esp_temp[key] = {"texto": comp_text, "habilidades": []}
-            
-            current_comp_esp = comp_num
-    
-    # ========================================================================
-    # FASE 2: Extrair Habilidades e associá-las às Competências
-    # ========================================================================
-    
-    current_area = ""
-    current_comp_esp = None
-    
-    for page_num in range(480, 600):
-        if page_num >= len(pdf.pages):
-            break
-        
-        page = pdf.pages[page_num]
-        text = page.extract_text() or ""
-        upper_text = text.upper()
-        
-        # Detecta área
-        if "LINGUAGENS E SUAS TECNOLOGIAS" in upper_text and page_num < 530:
-            current_area = "Linguagens e suas Tecnologias"
-        elif "MATEMÁTICA E SUAS TECNOLOGIAS" in upper_text:
-            current_area = "Matemática e suas Tecnologias"
-        elif "CIÊNCIAS DA NATUREZA E SUAS TECNOLOGIAS" in upper_text:
-            current_area = "Ciências da Natureza e suas Tecnologias"
-        elif "CIÊNCIAS HUMANAS E SOCIAIS APLICADAS" in upper_text:
-            current_area = "Ciências Humanas e Sociais Aplicadas"
-        
-        # Detecta Competência Específica
-        comp_match = RE_COMP_ESP.search(text)
-        if comp_match:
-            current_comp_esp = int(comp_match.group(1))
-        
-        # Extrai habilidades
-        lines = text.split('\n')
-        buffer_code = None
-        buffer_desc = []
-        buffer_sigla = ""
-        
-        for line in lines:
-            clean_line = clean_text(line)
-            match = RE_CODE_EM.search(clean_line)
-            
-            if match:
-                # Salva habilidade anterior
-                if buffer_code and buffer_desc:
-                    desc = clean_text(" ".join(buffer_desc))
-                    _add_em_habilidade(comp_esp_temp, current_area, current_comp_esp, 
-                                       buffer_code, buffer_sigla, desc)
-                
-                # Nova habilidade
-                buffer_code = match.group(1)
-                buffer_sigla = match.group(2)
-                start_desc = clean_line[match.end():].strip()
-                start_desc = re.sub(r"^[\s\.\-\)]+", "", start_desc)
-                buffer_desc = [start_desc] if start_desc else []
-                
-            elif buffer_code:
-                # Continua descrição
-                if len(clean_line) > 3 and not clean_line.isdigit():
-                    buffer_desc.append(clean_line)
-        
-        # Última habilidade da página
-        if buffer_code and buffer_desc:
-            desc = clean_text(" ".join(buffer_desc))
-            _add_em_habilidade(comp_esp_temp, current_area, current_comp_esp,
-                               buffer_code, buffer_sigla, desc)
-    
-    # ========================================================================
-    # FASE 3: Processar LP com tabelas (Campos de Atuação + Competências Associadas)
-    # ========================================================================
-    
-    current_campo = "Todos os Campos de Atuação Social"
-    current_praticas = ""
-    
-    for page_num in range(506, 530):
-        if page_num >= len(pdf.pages):
-            break
-        
-        page = pdf.pages[page_num]
-        tables = page.extract_tables()
-        
-        for table in tables:
-            if not table or len(table) < 2:
-                continue
-            
-            for row in table:
-                if not row or len(row) < 1:
-                    continue
-                
-                col0 = clean_text(row[0]) if row[0] else ""
-                col1 = clean_text(row[1]) if len(row) > 1 and row[1] else ""
-                
-                # Detecta Campo de Atuação
-                if "TODOS OS CAMPOS" in col0.upper():
-                    current_campo = "Todos os Campos de Atuação Social"
-                elif "CAMPO DA VIDA PESSOAL" in col0.upper():
-                    current_campo = "Campo da Vida Pessoal"
-                elif "CAMPO DE ATUAÇÃO NA VIDA PÚBLICA" in col0.upper():
-                    current_campo = "Campo de Atuação na Vida Pública"
-                elif "CAMPO DAS PRÁTICAS DE ESTUDO" in col0.upper():
-                    current_campo = "Campo das Práticas de Estudo e Pesquisa"
-                elif "CAMPO JORNALÍSTICO" in col0.upper():
-                    current_campo = "Campo Jornalístico-Midiático"
-                elif "CAMPO ARTÍSTICO" in col0.upper():
-                    current_campo = "Campo Artístico-Literário"
-                
-                # Detecta Práticas
-                if "PRÁTICAS" in col0.upper() and len(col0) < 200:
-                    current_praticas = col0
-                
-                # Extrai habilidade LP
-                lp_match = RE_CODE_EM.search(col0)
-                if lp_match and lp_match.group(2) == "LP":
-                    code = lp_match.group(1)
-                    # Descrição é o resto da célula após o código
-                    desc_start = col0[lp_match.end():].strip()
-                    desc_start = re.sub(r"^[\s\.\-\)]+", "", desc_start)
-                    
-                    # Competências associadas (números na col1)
-                    comp_assoc = []
-                    if col1:
-                        nums = re.findall(r"\d+", col1)
-                        comp_assoc = [int(n) for n in nums if 1 <= int(n) <= 7]
-                    
-                    lp_habilidades.append({
-                        "codigo": code,
-                        "descricao": desc_start,
-                        "campo": current_campo,
-                        "praticas": current_praticas,
-                        "competencias_associadas": comp_assoc
-                    })
-    
-    # ========================================================================
-    # FASE 4: Montar estrutura final
-    # ========================================================================
     
     # Adiciona competências específicas às áreas
     for (area, num), data in sorted(comp_esp_temp.items(), key=lambda x: (x[0][0], x[0][1])):
         if area in tree:
             # Filtra habilidades LGG/MAT/CNT/CHS (não LP)
-            habilidades_filtradas = [h for h in data["habilidades"] if "LP" not in h["codigo"]]
+            habilidades_filtradas = [h for h in data.habilidades if "LP" not in h.codigo]
             
-            tree[area]["competencias_especificas"].append({
-                "numero": num,
-                "texto": data["texto"] if data["texto"] else "",
-                "habilidades": habilidades_filtradas
-            })
+            tree[area]["competencias_especificas"].append(
+                CompetenciaEspecifica(num, data.texto if data.texto else "", habilidades_filtradas))
     
     # Adiciona habilidades LP aos campos de atuação
     lp_data = tree["Linguagens e suas Tecnologias"]["componentes"]["Língua Portuguesa"]
-    for hab in lp_habilidades:
-        campo = hab["campo"]
+    for hab in estado["lp_habilidades"]:
+        campo = hab.campo
         if campo not in lp_data["campos_de_atuacao"]:
             lp_data["campos_de_atuacao"][campo] = {
                 "habilidades": []
             }
         
-        lp_data["campos_de_atuacao"][campo]["habilidades"].append({
-            "codigo": hab["codigo"],
-            "descricao": hab["descricao"],
-            "competencias_associadas": hab["competencias_associadas"]
-        })
+        lp_data["campos_de_atuacao"][campo]["habilidades"].append(hab)
+    
+    tree = para_json(tree)
+    tabela = TabelaHabilidades() if tabela is None else tabela
+    adicionar_em(tabela, tree)
     
     # ========================================================================
     # ESTATÍSTICAS
     # ========================================================================
     
+    # Linhas do EM por área (competências específicas + campos de atuação de LP)
+    por_area = tabela.contar("area", tabela.filtrar(etapa="EM"))
     total_hab = 0
-    for area, area_data in tree.items():
-        area_count = 0
-        for comp in area_data.get("competencias_especificas", []):
-            area_count += len(comp.get("habilidades", []))
-        
-        # Conta LP separadamente
-        if "componentes" in area_data:
-            for comp_name, comp_data in area_data["componentes"].items():
-                for campo, campo_data in comp_data.get("campos_de_atuacao", {}).items():
-                    area_count += len(campo_data.get("habilidades", []))
-        
+    for area in tree:
+        area_count = por_area.get(area, 0)
         if area_count > 0:
             print(f"  {area}: {area_count} habilidades")
         total_hab += area_count
     
     print(f"\n  TOTAL EM: {total_hab} habilidades extraídas")
     
+    return anotar_hashes(tree)
+
+
+
+def construir_arvore_em(registros, estado=None, checkpoint=None, tabela=None):
+    """
+    Constrói a árvore do EM a partir de um fluxo de registros de página, numa
+    só passada. Com `estado` (vindo de um checkpoint), continua a construção.
+    """
+    if estado is None:
+        estado = novo_estado_em()
+    processadas = 0
+    for evento in iter_page_events(None, etapa="em", registros=registros):
+        aplicar_evento_em(estado, evento)
+        if isinstance(evento, PageEnd):
+            processadas += 1
+            if checkpoint and processadas % CHECKPOINT_A_CADA == 0:
+                salvar_checkpoint(checkpoint, {
+                    "etapa": "em", "concluida": False,
+                    "proxima_pagina": evento.page + 1,
+                    "estado": _estado_em_para_json(estado),
+                })
+    
+    tree = montar_arvore_em(estado, tabela)
+    if checkpoint:
+        salvar_checkpoint(checkpoint, {"etapa": "em", "concluida": True, "saida": tree})
     return tree
 
 
+def extract_em_final(pdf=None, registros=None, checkpoint=None, retomar=False, tabela=None):
+    """
+    Extrai Ensino Médio em estrutura hierárquica:
+    - Áreas com Competências Específicas
+    - Habilidades agrupadas por Competência
+    - LP com Campos de Atuação e Competências Associadas
+    Com `tabela` (TabelaHabilidades), as habilidades extraídas entram nela como linhas.
+    """
+    print("--- Processando Ensino Médio ---")
+    
+    estado = None
+    inicio = min(EM_FINAL_PAGE_RANGE.start, EM_LP_PAGE_RANGE.start)
+    dados = carregar_checkpoint(checkpoint, "em") if retomar else None
+    if dados and "fase" in dados.get("estado", {}):
+        print("  Checkpoint do formato antigo (uma passada por fase); recomeçando a etapa.")
+        dados = None
+    if dados and dados["concluida"]:
+        print("  Etapa já concluída no checkpoint; reutilizando a saída.")
+        if tabela is not None:
+            adicionar_em(tabela, dados["saida"])
+        return dados["saida"]
+    if dados:
+        estado = _estado_em_de_json(dados["estado"])
+        inicio = dados["proxima_pagina"]
+        print(f"  Retomando do checkpoint a partir da página {inicio}")
+    
+    if registros is None:
+        registros = registros_etapa(pdf, "em", range(inicio, paginas_etapa("em").stop))
+    elif dados:
+        registros = (r for r in registros if r["pagina"] >= inicio)
+    return construir_arvore_em(registros, estado, checkpoint, tabela)
+
+
 def _add_em_habilidade(comp_esp_temp, area, comp_num, code, sigla, desc):
     """Adiciona habilidade à competência específica correspondente."""
     if not area or not comp_num:
@@ -1822,15 +2940,12 @@ def _add_em_habilidade(comp_esp_temp, area, comp_num, code, sigla, desc):
     
     key = (area, derived_comp)
     if key not in comp_esp_temp:
-        comp_esp_temp[key] = {"texto": "", "habilidades": []}
+        comp_esp_temp[key] = CompetenciaEspecifica(derived_comp)
     
     # Evita duplicatas
-    existing_codes = [h["codigo"] for h in comp_esp_temp[key]["habilidades"]]
+    existing_codes = [h.codigo for h in comp_esp_temp[key].habilidades]
     if code not in existing_codes:
-        comp_esp_temp[key]["habilidades"].append({
-            "codigo": code,
-            "descricao": desc
-        })
+        comp_esp_temp[key].habilidades.append(Habilidade(sys.intern(code), desc))
 
 
 def extract_em(pdf):
@@ -1841,9 +2956,10 @@ def extract_em(pdf):
     def clean_text_em(text): return re.sub(r'\s+', ' ', unicodedata.normalize("NFKC", text)).strip()
     RE_CODE_EM = re.compile(r"(EM\d{2,3}[A-Z]{2,4}\d{2,3})")
     
+    acessor = paginas(pdf)
     for page_num in EM_PAGE_RANGE:
-        if page_num >= len(pdf.pages): break
-        page = pdf.pages[page_num]
+        if page_num >= len(acessor): break
+        page = acessor[page_num]
         text = page.extract_text() or ""
         upper_text = text.upper()
         if "LINGUAGENS" in upper_text: current_area = "Linguagens e suas Tecnologias"
@@ -1873,22 +2989,105 @@ def extract_em(pdf):
 # --- EXECUÇÃO ---
 
 def main():
-    print(f"Abrindo PDF: {PDF_PATH}")
-    if not os.path.exists(PDF_PATH): print("Arquivo PDF não encontrado."); return
-    try: pdf = pdfplumber.open(PDF_PATH)
-    except Exception as e: print(f"Erro: {e}"); return
+    global CHECKPOINT_A_CADA, WORKERS, COMPARTILHAR_PDF, CAPACIDADE_PAGINAS
+    parser = argparse.ArgumentParser(description="Extrai a BNCC (EI, EF e EM) do PDF oficial para JSON.")
+    parser.add_argument("--gravar-registros", metavar="ARQUIVO",
+                        help="Grava os registros de página (texto, tabelas, itálicos) em JSONL.gz")
+    parser.add_argument("--replay", metavar="ARQUIVO",
+                        help="Reconstrói as árvores a partir de registros gravados, sem abrir o PDF")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continua a partir dos checkpoints de uma execução interrompida")
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR,
+                        help=f"Diretório dos checkpoints (padrão: {CHECKPOINT_DIR})")
+    parser.add_argument("--checkpoint-a-cada", type=int, default=CHECKPOINT_A_CADA, metavar="N",
+                        help=f"Páginas entre checkpoints (padrão: {CHECKPOINT_A_CADA})")
+    parser.add_argument("--workers", type=int, default=WORKERS, metavar="N",
+                        help="Processos que leem as páginas enquanto a árvore é montada (padrão: 1)")
+    parser.add_argument("--sem-pdf-compartilhado", action="store_true",
+                        help="Com --workers, cada worker lê o PDF do disco em vez da memória compartilhada")
+    parser.add_argument("--paginas-residentes", type=int, default=CAPACIDADE_PAGINAS, metavar="N",
+                        help=f"Páginas com layout mantido em memória (LRU; 0 = todas; padrão: {CAPACIDADE_PAGINAS})")
+    parser.add_argument("--sem-memoizacao", action="store_true",
+                        help="Desliga o cache (LRU) das funções de normalização de texto")
+    parser.add_argument("--shard", metavar="I/N",
+                        help="Processa só a i-ésima de n fatias do EF e grava o shard (junção: shards_bncc.py)")
+    parser.add_argument("--tabela", metavar="ARQUIVO",
+                        help="Grava também a tabela colunar de habilidades (.csv, ou .parquet com pyarrow)")
+    parser.add_argument("--verificar-cabecalhos", action="store_true",
+                        help="Só compara, página a página do EF, o componente detectado pelas faixas de "
+                             "cabeçalho/rodapé com o detectado no texto da página inteira")
+    args = parser.parse_args()
 
-    ei_data = extract_ei_final(pdf)
-    ef_data = extract_ef_final(pdf) # Nova versão estruturada
-    em_data = extract_em_final(pdf)  # Nova versão estruturada
-    
-    pdf.close()
+    CHECKPOINT_A_CADA = max(1, args.checkpoint_a_cada)
+    WORKERS = max(1, args.workers)
+    COMPARTILHAR_PDF = not args.sem_pdf_compartilhado
+    CAPACIDADE_PAGINAS = max(0, args.paginas_residentes)
+    configurar_memoizacao(not args.sem_memoizacao)
+    checkpoints = {etapa: os.path.join(args.checkpoint_dir, f"{etapa}.json") for etapa in ("ei", "ef", "em")}
+    if args.resume:
+        print(f"Retomando dos checkpoints em {args.checkpoint_dir}")
+
+    pdf = None
+    registros = {"ei": None, "ef": None, "em": None}  # None: lê as páginas direto do PDF
+    if args.replay:
+        print(f"Replay de registros: {args.replay}")
+        registros = carregar_registros(args.replay)
+    else:
+        print(f"Abrindo PDF: {PDF_PATH}")
+        if not os.path.exists(PDF_PATH): print("Arquivo PDF não encontrado."); return
+        import pdfplumber  # Só aqui: --replay e o uso como biblioteca não carregam o pdfminer
+        try: pdf = pdfplumber.open(PDF_PATH)
+        except Exception as e: print(f"Erro: {e}"); return
+        if args.verificar_cabecalhos:
+            divergencias = divergencias_cabecalho(pdf)
+            fechar_pdf(pdf)
+            for page_num, pelas_faixas, pela_pagina in divergencias:
+                print(f"  ❌ Página {page_num}: faixas={pelas_faixas!r}, página inteira={pela_pagina!r}")
+            print(f"{len(divergencias)} páginas do EF com componente divergente" if divergencias
+                  else "✅ Componente das faixas igual ao da página inteira em todas as páginas do EF")
+            return 1 if divergencias else 0
+        if args.gravar_registros:
+            registros = coletar_registros(pdf)
+            gravar_registros(args.gravar_registros, registros)
+            print(f"Registros de página gravados em {args.gravar_registros}")
+
+    if args.shard:
+        from shards_bncc import caminho_shard, executar_shard, parse_shard, salvar_shard
+        try: i, n = parse_shard(args.shard)
+        except ValueError as e: print(f"Erro: {e}"); return
+        shard = executar_shard(i, n, pdf, registros["ef"])
+        if pdf:
+            fechar_pdf(pdf)
+        salvar_shard(caminho_shard(i, n), shard)
+        print(f"Shard salvo em {caminho_shard(i, n)}")
+        return
+
+    tabela = TabelaHabilidades()  # Preenchida por etapa, à medida que cada árvore fica pronta
+    ei_data = extract_ei_final(pdf, registros["ei"], checkpoints["ei"], args.resume, tabela)
+    ef_data = extract_ef_final(pdf, registros["ef"], checkpoints["ef"], args.resume, tabela) # Nova versão estruturada
+    em_data = extract_em_final(pdf, registros["em"], checkpoints["em"], args.resume, tabela)  # Nova versão estruturada
+    
+    if pdf:
+        print(f"\n{resumo_paginas(pdf)}")
+        fechar_pdf(pdf)
+    print(f"\n{resumo_memoizacao()}")
 
     print("\n--- Salvando Arquivos ---")
     with open("bncc_ei.json", "w", encoding="utf-8") as f: json.dump(ei_data, f, ensure_ascii=False, indent=2)
     with open("bncc_ef.json", "w", encoding="utf-8") as f: json.dump(ef_data, f, ensure_ascii=False, indent=2)
     with open("bncc_em.json", "w", encoding="utf-8") as f: json.dump(em_data, f, ensure_ascii=False, indent=2)
+    salvar_manifesto({"ei": ei_data, "ef": ef_data, "em": em_data})
+    if args.tabela:
+        from tabela_bncc import salvar_tabela
+        try:
+            salvar_tabela(tabela, args.tabela)
+            print(f"Tabela de habilidades salva em {args.tabela}")
+        except RuntimeError as e: print(f"Erro: {e}")
+    # Saídas gravadas: os checkpoints não são mais necessários
+    for caminho in checkpoints.values():
+        if os.path.exists(caminho): os.remove(caminho)
+    if os.path.isdir(args.checkpoint_dir) and not os.listdir(args.checkpoint_dir): os.rmdir(args.checkpoint_dir)
     print("Processo concluído.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,599 @@
+#!/usr/bin/env python3
+"""
+GERADOR DE PDF SINTÉTICO - Documento no formato da BNCC para benchmarks
+Produz um PDF que imita as estruturas que os extratores de extrair_bncc.py
+consomem (tabelas desenhadas com linhas, códigos EI/EF/EM, tabelas de contexto
+com Unidades/Objetos, cabeçalhos de componente, palavras em itálico e
+habilidades do EM que continuam na página seguinte ou terminam sem ponto final
+antes da abertura de outra área), sem depender do documento oficial.
+
+Junto com o PDF é gravado um arquivo de layout (.layout.json) com as faixas de
+páginas de cada etapa e as contagens esperadas no formato de
+EXPECTED_COUNTS (audit_bncc.py).
+
+Uso:
+    python gerar_pdf_sintetico.py --paginas 600 --habilidades-por-pagina 6
+"""
+
+import argparse
+import json
+import random
+
+# --- CONFIGURAÇÃO DA PÁGINA ---
+LARGURA_PAGINA = 595
+ALTURA_PAGINA = 842
+MARGEM = 40
+TAMANHO_FONTE = 8
+ENTRELINHA = 10
+PADDING_CELULA = 4
+Y_CABECALHO = ALTURA_PAGINA - 30  # Faixa superior onde ficam os cabeçalhos de componente/área
+MAX_HABILIDADES_POR_PAGINA = 12
+
+FONTES = {"normal": "F1", "italico": "F2", "negrito": "F3"}
+
+# --- VOCABULÁRIO ---
+CAMPOS_EI = {
+    "EO": "O eu, o outro e o nós",
+    "CG": "Corpo, gestos e movimentos",
+    "TS": "Traços, sons, cores e formas",
+    "EF": "Escuta, fala, pensamento e imaginação",
+    "ET": "Espaços, tempos, quantidades, relações e transformações"
+}
+
+# Ordem, cabeçalho e peso (contagem real) de cada componente do EF
+COMPONENTES_EF = [
+    ("LP", "LINGUAGENS – LÍNGUA PORTUGUESA", 391),
+    ("AR", "LINGUAGENS – ARTE", 61),
+    ("EF", "LINGUAGENS – EDUCAÇÃO FÍSICA", 69),
+    ("LI", "LINGUAGENS – LÍNGUA INGLESA", 88),
+    ("MA", "MATEMÁTICA – ENSINO FUNDAMENTAL", 247),
+    ("CI", "CIÊNCIAS DA NATUREZA – CIÊNCIAS", 111),
+    ("GE", "CIÊNCIAS HUMANAS – GEOGRAFIA", 123),
+    ("HI", "CIÊNCIAS HUMANAS – HISTÓRIA", 151),
+    ("ER", "ENSINO RELIGIOSO – ENSINO FUNDAMENTAL", 63),
+]
+
+# Prefixos de ano (incluindo faixas como EF15, EF69) usados por componente
+ANOS_EF = {
+    "LP": ["15", "12", "01", "02", "35", "03", "04", "05", "69", "67", "06", "07", "89", "08", "09"],
+    "AR": ["15", "69"],
+    "EF": ["12", "35", "67", "89"],
+    "LI": ["06", "07", "08", "09"],
+}
+ANOS_EF_PADRAO = ["01", "02", "03", "04", "05", "06", "07", "08", "09"]
+
+UNIDADES_EF = {
+    "AR": ["Artes visuais", "Dança", "Música", "Teatro", "Artes integradas"],
+    "EF": ["Brincadeiras e jogos", "Esportes", "Ginásticas", "Danças", "Lutas"],
+    "LI": ["Interação discursiva", "Compreensão oral", "Produção oral"],
+    "MA": ["Números", "Álgebra", "Geometria", "Grandezas e medidas", "Probabilidade e estatística"],
+    "CI": ["Matéria e energia", "Vida e evolução", "Terra e Universo"],
+    "GE": ["O sujeito e seu lugar no mundo", "Conexões e escalas", "Mundo do trabalho"],
+    "HI": ["Mundo pessoal: meu lugar no mundo", "A comunidade e seus registros", "O lugar em que vive"],
+    "ER": ["Identidades e alteridades", "Manifestações religiosas", "Crenças religiosas e filosofias de vida"],
+}
+
+CAMPOS_LP = [
+    "CAMPO DA VIDA COTIDIANA – Campo de atuação relativo à participação em situações de leitura próprias de atividades vivenciadas cotidianamente",
+    "CAMPO ARTÍSTICO-LITERÁRIO – Campo de atuação relativo à participação em situações de leitura, fruição e produção de textos literários",
+    "CAMPO DAS PRÁTICAS DE ESTUDO E PESQUISA – Campo de atuação relativo à participação em situações de leitura e escrita de textos expositivos",
+    "CAMPO DA VIDA PÚBLICA – Campo de atuação relativo à participação em situações de leitura e escrita de textos normativos e legais",
+]
+PRATICAS_LP = ["Leitura/escuta (compartilhada e autônoma)", "Escrita (compartilhada e autônoma)",
+               "Oralidade", "Análise linguística/semiótica"]
+EIXOS_LI = ["EIXO ORALIDADE – Práticas de compreensão e produção oral de língua inglesa",
+            "EIXO LEITURA – Práticas de leitura de textos diversos em língua inglesa",
+            "EIXO ESCRITA – Práticas de produção de textos em língua inglesa"]
+
+VERBOS = ["Identificar", "Reconhecer", "Analisar", "Comparar", "Descrever", "Explorar",
+          "Produzir", "Planejar", "Relacionar", "Compreender", "Utilizar", "Elaborar"]
+OBJETOS = ["diferentes gêneros textuais", "práticas culturais da comunidade", "relações entre grandezas",
+           "fenômenos naturais do cotidiano", "formas de organização social", "manifestações artísticas",
+           "estratégias de leitura e escrita", "representações cartográficas", "processos históricos locais"]
+COMPLEMENTOS = ["considerando o contexto de produção e circulação", "em situações significativas de uso",
+                "com apoio de recursos tecnológicos e digitais", "valorizando a diversidade de saberes",
+                "para ampliar as possibilidades de participação social", "por meio de registros variados"]
+TERMOS_ITALICO = ["podcast", "blog", "software", "playlist", "fanfic", "vlog", "e-mail"]
+NOMES_OBJETO = ["Sistema de numeração decimal", "Leitura de imagens", "Contextos e práticas",
+                "Elementos da linguagem", "Materiais e processos", "Ciclos da natureza",
+                "Paisagens naturais e antrópicas", "Formas de registro", "Grafias e acentuação"]
+
+AREAS_EM = [
+    ("LGG", "LINGUAGENS E SUAS TECNOLOGIAS"),
+    ("MAT", "MATEMÁTICA E SUAS TECNOLOGIAS"),
+    ("CNT", "CIÊNCIAS DA NATUREZA E SUAS TECNOLOGIAS"),
+    ("CHS", "CIÊNCIAS HUMANAS E SOCIAIS APLICADAS"),
+]
+CAMPOS_LP_EM = ["CAMPO DA VIDA PESSOAL", "CAMPO DE ATUAÇÃO NA VIDA PÚBLICA",
+                "CAMPO DAS PRÁTICAS DE ESTUDO E PESQUISA", "CAMPO JORNALÍSTICO-MIDIÁTICO",
+                "CAMPO ARTÍSTICO-LITERÁRIO"]
+
+
+# --- ESCRITOR DE PDF MÍNIMO ---
+
+def _escapar_pdf(texto):
+    dados = texto.encode("cp1252", errors="replace")
+    return dados.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+class _EscritorPDF:
+    """
+    Escritor de PDF mínimo (fontes padrão Helvetica, sem dependências).
+    Grava as páginas à medida que são produzidas, mantendo em memória apenas
+    os offsets da tabela xref — permite gerar documentos com milhares de páginas.
+    """
+    ID_CATALOGO = 1
+    ID_PAGINAS = 2
+    IDS_FONTES = {"F1": (3, "Helvetica"), "F2": (4, "Helvetica-Oblique"), "F3": (5, "Helvetica-Bold")}
+
+    def __init__(self, caminho):
+        self.fp = open(caminho, "wb")
+        self.offsets = {}
+        self.proximo_id = 6
+        self.paginas = []
+        self.fp.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        for nome, (obj_id, base) in self.IDS_FONTES.items():
+            self._objeto(obj_id, (f"<< /Type /Font /Subtype /Type1 /BaseFont /{base} "
+                                  f"/Encoding /WinAnsiEncoding >>").encode("ascii"))
+
+    def _objeto(self, obj_id, corpo):
+        self.offsets[obj_id] = self.fp.tell()
+        self.fp.write(f"{obj_id} 0 obj\n".encode("ascii") + corpo + b"\nendobj\n")
+
+    def _novo_id(self):
+        obj_id = self.proximo_id
+        self.proximo_id += 1
+        return obj_id
+
+    def adicionar_pagina(self, conteudo):
+        id_conteudo = self._novo_id()
+        self._objeto(id_conteudo, f"<< /Length {len(conteudo)} >>\nstream\n".encode("ascii") +
+                     conteudo + b"\nendstream")
+        id_pagina = self._novo_id()
+        fontes = " ".join(f"/{nome} {obj_id} 0 R" for nome, (obj_id, _) in self.IDS_FONTES.items())
+        self._objeto(id_pagina, (f"<< /Type /Page /Parent {self.ID_PAGINAS} 0 R "
+                                 f"/MediaBox [0 0 {LARGURA_PAGINA} {ALTURA_PAGINA}] "
+                                 f"/Resources << /Font << {fontes} >> >> "
+                                 f"/Contents {id_conteudo} 0 R >>").encode("ascii"))
+        self.paginas.append(id_pagina)
+
+    def fechar(self):
+        kids = " ".join(f"{p} 0 R" for p in self.paginas)
+        self._objeto(self.ID_PAGINAS, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.paginas)} >>".encode("ascii"))
+        self._objeto(self.ID_CATALOGO, f"<< /Type /Catalog /Pages {self.ID_PAGINAS} 0 R >>".encode("ascii"))
+        inicio_xref = self.fp.tell()
+        total = self.proximo_id
+        linhas = [f"xref\n0 {total}\n", "0000000000 65535 f \n"]
+        for obj_id in range(1, total):
+            linhas.append(f"{self.offsets[obj_id]:010d} 00000 n \n")
+        linhas.append(f"trailer\n<< /Size {total} /Root {self.ID_CATALOGO} 0 R >>\n")
+        linhas.append(f"startxref\n{inicio_xref}\n%%EOF\n")
+        self.fp.write("".join(linhas).encode("ascii"))
+        self.fp.close()
+
+
+class _Pagina:
+    """Acumula os operadores de conteúdo de uma página."""
+
+    def __init__(self):
+        self.ops = []
+
+    def texto(self, x, y, segmentos, tamanho=TAMANHO_FONTE):
+        """Escreve uma linha formada por segmentos [(texto, fonte)] a partir de (x, y)."""
+        partes = [b"BT", f"{x:.2f} {y:.2f} Td".encode("ascii")]
+        for texto, fonte in segmentos:
+            partes.append(f"/{FONTES[fonte]} {tamanho} Tf".encode("ascii"))
+            partes.append(b"(" + _escapar_pdf(texto) + b") Tj")
+        partes.append(b"ET")
+        self.ops.append(b" ".join(partes))
+
+    def retangulo(self, x, y, largura, altura):
+        self.ops.append(f"{x:.2f} {y:.2f} {largura:.2f} {altura:.2f} re S".encode("ascii"))
+
+    def conteudo(self):
+        return b"0.5 w\n" + b"\n".join(self.ops)
+
+
+def _largura_texto(texto, tamanho=TAMANHO_FONTE):
+    # Aproximação conservadora da largura média dos glifos Helvetica
+    return len(texto) * tamanho * 0.56
+
+
+def _quebrar_linhas(runs, largura):
+    """
+    Quebra uma sequência de runs [(texto, fonte)] em linhas que cabem na largura.
+    Linhas explícitas ("\\n") são preservadas. Retorna lista de linhas de segmentos.
+    """
+    # Palavras como listas de (caractere, fonte): uma palavra pode mudar de fonte
+    # no meio (ex: "*blog*."), então as fronteiras de run não são fronteiras de palavra
+    blocos = [[[]]]
+    for texto, fonte in runs:
+        for ch in texto:
+            if ch == "\n":
+                blocos.append([[]])
+            elif ch == " ":
+                blocos[-1].append([])
+            else:
+                blocos[-1][-1].append((ch, fonte))
+
+    linhas = []
+    for palavras in blocos:
+        linhas.append([])
+        largura_atual = 0.0
+        for palavra in palavras:
+            if not palavra:
+                continue
+            w = _largura_texto("".join(ch for ch, _ in palavra) + " ")
+            if linhas[-1] and largura_atual + w > largura:
+                linhas.append([])
+                largura_atual = 0.0
+            linhas[-1].append(palavra)
+            largura_atual += w
+
+    resultado = []
+    for linha in linhas:
+        segmentos = []
+        for j, palavra in enumerate(linha):
+            chars = palavra + ([(" ", palavra[-1][1])] if j < len(linha) - 1 else [])
+            for ch, fonte in chars:
+                if segmentos and segmentos[-1][1] == fonte:
+                    segmentos[-1] = (segmentos[-1][0] + ch, fonte)
+                else:
+                    segmentos.append((ch, fonte))
+        resultado.append(segmentos)
+    return [l for l in resultado if l]
+
+
+def _desenhar_tabela(pagina, y_topo, larguras, linhas):
+    """
+    Desenha uma tabela com bordas (detectável pela estratégia "lines" do pdfplumber).
+    Cada célula é uma lista de runs [(texto, fonte)]. Retorna o y da borda inferior.
+    """
+    y = y_topo
+    for linha in linhas:
+        celulas_quebradas = [_quebrar_linhas(runs, w - 2 * PADDING_CELULA) if runs else []
+                             for runs, w in zip(linha, larguras)]
+        n_linhas = max([len(c) for c in celulas_quebradas] + [1])
+        altura = n_linhas * ENTRELINHA + 2 * PADDING_CELULA
+        x = MARGEM
+        for conteudo, w in zip(celulas_quebradas, larguras):
+            pagina.retangulo(x, y - altura, w, altura)
+            y_texto = y - PADDING_CELULA - TAMANHO_FONTE
+            for segmentos in conteudo:
+                pagina.texto(x + PADDING_CELULA, y_texto, segmentos)
+                y_texto -= ENTRELINHA
+            x += w
+        y -= altura
+    return y
+
+
+def _escrever_paragrafo(pagina, y, runs, largura=LARGURA_PAGINA - 2 * MARGEM):
+    for segmentos in _quebrar_linhas(runs, largura):
+        pagina.texto(MARGEM, y, segmentos)
+        y -= ENTRELINHA
+    return y
+
+
+# --- CONTEÚDO SINTÉTICO ---
+
+class _GeradorConteudo:
+    """Gera descrições e códigos determinísticos a partir de uma semente."""
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+
+    def descricao(self, com_italico=False):
+        rng = self.rng
+        runs = [(f"{rng.choice(VERBOS)} {rng.choice(OBJETOS)}, {rng.choice(COMPLEMENTOS)}", "normal")]
+        if com_italico:
+            runs.append((", incluindo ", "normal"))
+            runs.append((rng.choice(TERMOS_ITALICO), "italico"))
+            runs.append((" e outros recursos", "normal"))
+        runs.append((".", "normal"))
+        return runs
+
+    def texto_minusculo(self):
+        rng = self.rng
+        return f"{rng.choice(OBJETOS)} {rng.choice(COMPLEMENTOS)}"
+
+
+def _distribuir(total, pesos):
+    """Distribui `total` páginas proporcionalmente aos pesos (maiores restos)."""
+    soma = sum(pesos)
+    cotas = [total * p / soma for p in pesos]
+    base = [int(c) for c in cotas]
+    restos = sorted(range(len(pesos)), key=lambda i: cotas[i] - base[i], reverse=True)
+    for i in restos[:total - sum(base)]:
+        base[i] += 1
+    return base
+
+
+def _planejar_layout(paginas):
+    """Divide o total de páginas entre EI, EF e EM (incluindo LP do EM)."""
+    if paginas < 8:
+        raise ValueError("São necessárias pelo menos 8 páginas (EI, EF e as 5 seções do EM).")
+    paginas_ei = max(2, round(paginas * 0.04))
+    paginas_em = max(5, round(paginas * 0.20))
+    paginas_ef = paginas - paginas_ei - paginas_em
+    if paginas_ef < 1:
+        paginas_em -= 1 - paginas_ef
+        paginas_ef = 1
+    paginas_lp_em = max(1, paginas_em // 5)
+    por_area_em = _distribuir(paginas_em - paginas_lp_em, [1, 1, 1, 1])
+    # Garante ao menos uma página por área do EM
+    for i, n in enumerate(por_area_em):
+        if n == 0:
+            maior = por_area_em.index(max(por_area_em))
+            por_area_em[maior] -= 1
+            por_area_em[i] = 1
+    return paginas_ei, paginas_ef, paginas_lp_em, por_area_em
+
+
+def gerar_pdf_sintetico(caminho, paginas=600, habilidades_por_pagina=6, seed=0):
+    """
+    Gera o PDF sintético e retorna o layout (faixas de páginas e contagens esperadas).
+    As faixas seguem a convenção de extrair_bncc.py (índices de página base 0).
+    """
+    if not 1 <= habilidades_por_pagina <= MAX_HABILIDADES_POR_PAGINA:
+        raise ValueError(f"habilidades_por_pagina deve estar entre 1 e {MAX_HABILIDADES_POR_PAGINA}.")
+
+    paginas_ei, paginas_ef, paginas_lp_em, por_area_em = _planejar_layout(paginas)
+    conteudo = _GeradorConteudo(seed)
+    escritor = _EscritorPDF(caminho)
+    k = habilidades_por_pagina
+
+    contagens = {
+        "EF": {sigla: 0 for sigla, _, _ in COMPONENTES_EF},
+        "EM": {"LGG": 0, "LP": 0, "MAT": 0, "CNT": 0, "CHS": 0},
+        "EI": {"objetivos": 0, "sintese": 0},
+    }
+
+    # ------------------------------------------------------------------
+    # EDUCAÇÃO INFANTIL: objetivos (3 faixas por linha) + síntese
+    # ------------------------------------------------------------------
+    inicio_ei = 0
+    contadores_ei = {}
+    siglas_ei = list(CAMPOS_EI)
+    for p in range(paginas_ei - 1):
+        pagina = _Pagina()
+        pagina.texto(MARGEM, Y_CABECALHO, [("EDUCAÇÃO INFANTIL", "negrito")])
+        larguras = [(LARGURA_PAGINA - 2 * MARGEM) / 3] * 3
+        linhas = [[[("BEBÊS (ZERO A 1 ANO E 6 MESES)", "negrito")],
+                   [("CRIANÇAS BEM PEQUENAS (1 ANO E 7 MESES A 3 ANOS E 11 MESES)", "negrito")],
+                   [("CRIANÇAS PEQUENAS (4 ANOS A 5 ANOS E 11 MESES)", "negrito")]]]
+        for r in range(max(1, k // 3)):
+            sigla = siglas_ei[(p * 3 + r) % len(siglas_ei)]
+            linha = []
+            for faixa in ("01", "02", "03"):
+                n = contadores_ei.get((faixa, sigla), 0) % 99 + 1
+                contadores_ei[(faixa, sigla)] = n
+                linha.append([(f"(EI{faixa}{sigla}{n:02d}) ", "normal")] + conteudo.descricao())
+                contagens["EI"]["objetivos"] += 1
+            linhas.append(linha)
+        _desenhar_tabela(pagina, Y_CABECALHO - 20, larguras, linhas)
+        escritor.adicionar_pagina(pagina.conteudo())
+
+    pagina = _Pagina()
+    pagina.texto(MARGEM, Y_CABECALHO, [("EDUCAÇÃO INFANTIL", "negrito")])
+    linhas = [[[("CAMPOS DE EXPERIÊNCIA", "negrito")], [("SÍNTESE DAS APRENDIZAGENS", "negrito")]]]
+    for sigla, nome in CAMPOS_EI.items():
+        itens = []
+        for _ in range(max(2, k // 2)):
+            itens.append(f"• Reconhecer {conteudo.texto_minusculo()}.")
+            contagens["EI"]["sintese"] += 1
+        linhas.append([[(nome, "normal")], [("\n".join(itens), "normal")]])
+    _desenhar_tabela(pagina, Y_CABECALHO - 20, [150, LARGURA_PAGINA - 2 * MARGEM - 150], linhas)
+    escritor.adicionar_pagina(pagina.conteudo())
+
+    # ------------------------------------------------------------------
+    # ENSINO FUNDAMENTAL: tabela de contexto + tabela de habilidades
+    # ------------------------------------------------------------------
+    inicio_ef = paginas_ei
+    codigos_ef = {sigla: set() for sigla, _, _ in COMPONENTES_EF}
+    contadores_ef = {}
+    paginas_por_comp = _distribuir(paginas_ef, [peso for _, _, peso in COMPONENTES_EF])
+    numero_pagina = inicio_ef
+    for (sigla, cabecalho, _), n_paginas in zip(COMPONENTES_EF, paginas_por_comp):
+        anos = ANOS_EF.get(sigla, ANOS_EF_PADRAO)
+        for j in range(n_paginas):
+            prefixo = anos[j * len(anos) // n_paginas]
+            pagina = _Pagina()
+            pagina.texto(MARGEM, Y_CABECALHO, [(cabecalho, "negrito")])
+            largura_util = LARGURA_PAGINA - 2 * MARGEM
+
+            # Tabela de contexto (Unidades/Campos + Objetos)
+            if sigla == "LP":
+                contexto = [[[("PRÁTICAS DE LINGUAGEM", "negrito")], [("OBJETOS DE CONHECIMENTO", "negrito")]]]
+                primeiro_col0 = CAMPOS_LP[j % len(CAMPOS_LP)]
+                demais_col0 = PRATICAS_LP
+            elif sigla == "LI":
+                contexto = [[[("EIXOS", "negrito")], [("OBJETOS DE CONHECIMENTO", "negrito")]]]
+                primeiro_col0 = EIXOS_LI[j % len(EIXOS_LI)]
+                demais_col0 = UNIDADES_EF["LI"]
+            else:
+                contexto = [[[("UNIDADES TEMÁTICAS", "negrito")], [("OBJETOS DE CONHECIMENTO", "negrito")]]]
+                unidades = UNIDADES_EF[sigla]
+                primeiro_col0 = unidades[j % len(unidades)]
+                demais_col0 = unidades
+            for r in range(k):
+                if r == 0:
+                    col0 = primeiro_col0
+                elif sigla in ("LP", "LI") and r % 2 == 1:
+                    col0 = demais_col0[(j + r) % len(demais_col0)]
+                else:
+                    col0 = ""
+                objeto = NOMES_OBJETO[(j * k + r) % len(NOMES_OBJETO)]
+                contexto.append([[(col0, "normal")] if col0 else [], [(objeto, "normal")]])
+            y = _desenhar_tabela(pagina, Y_CABECALHO - 20, [largura_util * 0.45, largura_util * 0.55], contexto)
+
+            # Tabela de habilidades
+            habilidades = [[[("HABILIDADES", "negrito")]]]
+            if j % 3 == 0:
+                habilidades.append([[(f"{int(prefixo[0])}º ANO", "negrito")]])
+            for r in range(k):
+                codigos_cel = []
+                for _ in range(2 if r % 5 == 4 else 1):
+                    # Códigos têm no máximo 3 dígitos finais: acima de 999 o contador recomeça
+                    n = contadores_ef.get((prefixo, sigla), 0) % 999 + 1
+                    contadores_ef[(prefixo, sigla)] = n
+                    codigos_cel.append(n)
+                runs = []
+                for n_cod in codigos_cel:
+                    codigo = f"EF{prefixo}{sigla}{n_cod:02d}"
+                    codigos_ef[sigla].add(codigo)
+                    if runs:
+                        runs.append(("\n", "normal"))
+                    runs.append((f"({codigo}) ", "normal"))
+                    runs.extend(conteudo.descricao(com_italico=(n_cod % 3 == 0)))
+                habilidades.append([runs])
+            if sigla == "LP" and j % 4 == 3:
+                habilidades.append([[("Trata-se também de ampliar o contato dos estudantes com "
+                                      "diferentes gêneros textuais, considerando as práticas de "
+                                      "linguagem do campo e suas especificidades.", "normal")]])
+            _desenhar_tabela(pagina, y - 20, [largura_util], habilidades)
+            escritor.adicionar_pagina(pagina.conteudo())
+            numero_pagina += 1
+
+    for sigla, codigos in codigos_ef.items():
+        contagens["EF"][sigla] = len(codigos)
+
+    # ------------------------------------------------------------------
+    # ENSINO MÉDIO: competências + habilidades em texto corrido, LP em tabela
+    # ------------------------------------------------------------------
+    inicio_em = paginas_ei + paginas_ef
+    codigos_em = {sigla: set() for sigla in contagens["EM"]}
+    contadores_em = {}
+    fim_lp = None
+    numero_pagina = inicio_em
+    for idx_area, ((sigla, cabecalho), n_paginas) in enumerate(zip(AREAS_EM, por_area_em)):
+        continuacao = []  # Linhas da última habilidade da página anterior que passam para esta
+        for j in range(n_paginas):
+            comp = j % 7 + 1
+            pagina = _Pagina()
+            pagina.texto(MARGEM, Y_CABECALHO, [(cabecalho, "negrito")])
+            y = Y_CABECALHO - 30
+            for segmentos in continuacao:
+                pagina.texto(MARGEM, y, segmentos)
+                y -= ENTRELINHA
+            continuacao = []
+            if j == 0 and idx_area > 1:
+                # Texto de abertura da área logo após a página da área anterior,
+                # cuja última habilidade termina sem ponto final
+                y = _escrever_paragrafo(pagina, y, [(
+                    "Nesta área, o Ensino Médio propõe aprofundar "
+                    "as aprendizagens desenvolvidas no Ensino Fundamental", "normal")])
+                y -= ENTRELINHA
+            pagina.texto(MARGEM, y, [(f"COMPETÊNCIA ESPECÍFICA {comp}", "negrito")])
+            y -= 2 * ENTRELINHA
+            y = _escrever_paragrafo(pagina, y, [(
+                f"{VERBOS[(j + comp) % len(VERBOS)]} {conteudo.texto_minusculo()}, "
+                f"mobilizando conhecimentos da área para interpretar criticamente a realidade "
+                f"e continuar aprendendo ao longo da vida.", "normal")])
+            y = _escrever_paragrafo(pagina, y, [(
+                "Essa competência específica indica que os estudantes devem "
+                f"{conteudo.texto_minusculo()} em diferentes contextos.", "normal")])
+            y -= ENTRELINHA
+            for i in range(k):
+                n = contadores_em.get((sigla, comp), 0) % 99 + 1
+                contadores_em[(sigla, comp)] = n
+                codigo = f"EM13{sigla}{comp}{n:02d}"
+                codigos_em[sigla].add(codigo)
+                runs = [(f"({codigo}) ", "normal")] + conteudo.descricao()
+                if i == k - 1 and j < n_paginas - 1:
+                    # Descrição que continua no topo da página seguinte
+                    linhas = _quebrar_linhas(runs, (LARGURA_PAGINA - 2 * MARGEM) / 2)
+                    pagina.texto(MARGEM, y, linhas[0])
+                    y -= ENTRELINHA
+                    continuacao = linhas[1:]
+                    continue
+                if i == k - 1 and 0 < idx_area < len(AREAS_EM) - 1:
+                    runs = runs[:-1]  # Última habilidade da área sem ponto final
+                y = _escrever_paragrafo(pagina, y, runs)
+            escritor.adicionar_pagina(pagina.conteudo())
+            numero_pagina += 1
+
+        if idx_area == 0:
+            # LP do EM: tabela com Campos de Atuação e Competências associadas
+            inicio_lp = numero_pagina
+            for j in range(paginas_lp_em):
+                pagina = _Pagina()
+                pagina.texto(MARGEM, Y_CABECALHO, [("LINGUAGENS E SUAS TECNOLOGIAS – LÍNGUA PORTUGUESA", "negrito")])
+                linhas = [[[("HABILIDADES", "negrito")], [("COMPETÊNCIAS", "negrito")]],
+                          [[(CAMPOS_LP_EM[j % len(CAMPOS_LP_EM)], "normal")], []]]
+                for r in range(k):
+                    n = contadores_em.get(("LP", 0), 0) % 999 + 1
+                    contadores_em[("LP", 0)] = n
+                    codigo = f"EM13LP{n:02d}"
+                    # LP não é deduplicada pelo extrator: conta cada linha da tabela
+                    contagens["EM"]["LP"] += 1
+                    associadas = sorted({(n + i) % 7 + 1 for i in range(1 + r % 3)})
+                    linhas.append([[(f"({codigo}) ", "normal")] + conteudo.descricao(),
+                                   [(", ".join(str(a) for a in associadas), "normal")]])
+                largura_util = LARGURA_PAGINA - 2 * MARGEM
+                _desenhar_tabela(pagina, Y_CABECALHO - 20, [largura_util * 0.8, largura_util * 0.2], linhas)
+                escritor.adicionar_pagina(pagina.conteudo())
+                numero_pagina += 1
+            fim_lp = numero_pagina
+
+    escritor.fechar()
+
+    for sigla, codigos in codigos_em.items():
+        if sigla != "LP":
+            contagens["EM"][sigla] = len(codigos)
+
+    expected_counts = {
+        "EF": {"total_codes": sum(contagens["EF"].values()), **contagens["EF"]},
+        "EM": {"total": sum(contagens["EM"].values()), **contagens["EM"]},
+        "EI": contagens["EI"],
+    }
+    return {
+        "pdf": caminho,
+        "paginas": paginas,
+        "habilidades_por_pagina": habilidades_por_pagina,
+        "seed": seed,
+        "EI_PAGE_RANGE": [inicio_ei, inicio_ei + paginas_ei],
+        "EF_PAGE_RANGE": [inicio_ef, inicio_ef + paginas_ef],
+        "EM_FINAL_PAGE_RANGE": [inicio_em, paginas],
+        "EM_LP_PAGE_RANGE": [inicio_lp, fim_lp],
+        "expected_counts": expected_counts,
+    }
+
+
+def caminho_layout(caminho_pdf):
+    base = caminho_pdf[:-4] if caminho_pdf.lower().endswith(".pdf") else caminho_pdf
+    return base + ".layout.json"
+
+
+def aplicar_layout(layout, modulo=None):
+    """Ajusta as faixas de páginas de extrair_bncc para o layout de um PDF sintético."""
+    if modulo is None:
+        import extrair_bncc as modulo
+    for nome in ("EI_PAGE_RANGE", "EF_PAGE_RANGE", "EM_FINAL_PAGE_RANGE", "EM_LP_PAGE_RANGE"):
+        inicio, fim = layout[nome]
+        setattr(modulo, nome, range(inicio, fim))
+    return modulo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um PDF sintético no formato da BNCC para benchmarks.")
+    parser.add_argument("--paginas", type=int, default=600, help="Total de páginas (mínimo 8)")
+    parser.add_argument("--habilidades-por-pagina", type=int, default=6,
+                        help=f"Habilidades por página (1 a {MAX_HABILIDADES_POR_PAGINA})")
+    parser.add_argument("--seed", type=int, default=0, help="Semente do conteúdo gerado")
+    parser.add_argument("--saida", default="bncc_sintetico.pdf", help="Caminho do PDF gerado")
+    args = parser.parse_args()
+
+    layout = gerar_pdf_sintetico(args.saida, args.paginas, args.habilidades_por_pagina, args.seed)
+    with open(caminho_layout(args.saida), "w", encoding="utf-8") as f:
+        json.dump(layout, f, ensure_ascii=False, indent=2)
+
+    print(f"PDF sintético gerado: {args.saida} ({args.paginas} páginas)")
+    for nome in ("EI_PAGE_RANGE", "EF_PAGE_RANGE", "EM_FINAL_PAGE_RANGE", "EM_LP_PAGE_RANGE"):
+        print(f"  {nome}: {layout[nome]}")
+    counts = layout["expected_counts"]
+    print(f"  Esperado: EF {counts['EF']['total_codes']} códigos, EM {counts['EM']['total']} habilidades, "
+          f"EI {counts['EI']['objetivos']} objetivos")
+
+
+if __name__ == "__main__":
+    main()
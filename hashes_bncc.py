@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+HASHES - Hashes de conteúdo das árvores BNCC (estilo Merkle)
+O hash de cada nó (dict/lista) é calculado a partir das chaves e dos hashes
+dos filhos; valores escalares entram pela forma JSON. Dois nós com o mesmo
+hash têm o mesmo conteúdo, então quem compara árvores (ver diff_bncc.py) pode
+pular a subárvore inteira sem olhar registro por registro.
+
+Nas saídas da extração:
+- cada habilidade/objetivo traz "hash": código + descrição normalizados
+  (NFC, espaços colapsados), estável entre execuções e edições;
+- o manifesto bncc_hashes.json traz, por arquivo, o hash da raiz e o de cada
+  nó com habilidades (área, componente, ano, unidade...), indexados pelo
+  caminho de chaves. Quem sincroniza compara o manifesto com o anterior e só
+  desce nos caminhos cujo hash mudou.
+
+Uso:
+    python hashes_bncc.py                 # Anota bncc_*.json e grava o manifesto
+    python hashes_bncc.py --verificar     # Confere os arquivos contra o manifesto
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import unicodedata
+
+TAMANHO_HASH = 16  # Caracteres hexadecimais (64 bits)
+CAMPO_HASH = "hash"  # Chave ignorada no cálculo (para árvores que já tragam o hash)
+MANIFESTO = "bncc_hashes.json"
+ARQUIVOS = {"ei": "bncc_ei.json", "ef": "bncc_ef.json", "em": "bncc_em.json"}
+SEPARADOR_CAMINHO = " > "
+VERSAO_MANIFESTO = 1
+
+
+def _digest(partes):
+    return hashlib.sha256("\x1f".join(partes).encode("utf-8")).hexdigest()[:TAMANHO_HASH]
+
+
+def hashes_subarvores(arvore):
+    """Hash de todos os dicts/listas da árvore, numa só passada: {id(nó): hash}."""
+    hashes = {}
+
+    def visitar(obj):
+        if isinstance(obj, dict):
+            partes = ["{"]
+            for chave in sorted(obj):
+                if chave != CAMPO_HASH:
+                    partes.append(json.dumps(chave, ensure_ascii=False))
+                    partes.append(visitar(obj[chave]))
+        elif isinstance(obj, list):
+            partes = ["["]
+            partes.extend(visitar(valor) for valor in obj)
+        else:
+            return json.dumps(obj, ensure_ascii=False)
+        h = _digest(partes)
+        hashes[id(obj)] = h
+        return h
+
+    visitar(arvore)
+    return hashes
+
+
+# ============================================================================
+# HASH POR HABILIDADE
+# ============================================================================
+
+def normalizar_texto(texto):
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", texto)).strip()
+
+
+def hash_habilidade(codigo, descricao):
+    """Hash de conteúdo de uma habilidade/objetivo (código + descrição normalizados)."""
+    return _digest([normalizar_texto(codigo).upper(), normalizar_texto(descricao)])
+
+
+def _eh_registro(obj):
+    return isinstance(obj, dict) and "codigo" in obj and "descricao" in obj
+
+
+def anotar_hashes(arvore):
+    """Acrescenta "hash" a cada habilidade/objetivo da árvore (no lugar) e a retorna."""
+    if _eh_registro(arvore):
+        arvore[CAMPO_HASH] = hash_habilidade(arvore["codigo"], arvore["descricao"])
+    elif isinstance(arvore, dict):
+        for valor in arvore.values():
+            anotar_hashes(valor)
+    elif isinstance(arvore, list):
+        for item in arvore:
+            anotar_hashes(item)
+    return arvore
+
+
+# ============================================================================
+# MANIFESTO
+# ============================================================================
+
+def _tem_registros(obj):
+    if _eh_registro(obj):
+        return True
+    if isinstance(obj, dict):
+        return any(_tem_registros(v) for v in obj.values())
+    if isinstance(obj, list):
+        return any(_tem_registros(v) for v in obj)
+    return False
+
+
+def hashes_dos_nos(arvore, hashes=None):
+    """
+    {caminho: hash} dos nós com habilidades, descendo pelas chaves dos dicts.
+    As listas (unidades, campos de experiência, competências) são as folhas.
+    """
+    hashes = hashes_subarvores(arvore) if hashes is None else hashes
+    nos = {}
+
+    def visitar(obj, caminho):
+        for chave, valor in obj.items():
+            if not _tem_registros(valor):
+                continue
+            caminho_filho = caminho + (chave,)
+            nos[SEPARADOR_CAMINHO.join(caminho_filho)] = hashes[id(valor)]
+            if isinstance(valor, dict) and not _eh_registro(valor):
+                visitar(valor, caminho_filho)
+
+    visitar(arvore, ())
+    return nos
+
+
+def entrada_manifesto(arvore):
+    hashes = hashes_subarvores(arvore)
+    return {"raiz": hashes[id(arvore)], "nos": hashes_dos_nos(arvore, hashes)}
+
+
+def gerar_manifesto(saidas):
+    """Manifesto de um conjunto de saídas {etapa: árvore}."""
+    return {
+        "versao": VERSAO_MANIFESTO,
+        "algoritmo": f"sha256/{TAMANHO_HASH}",
+        "arquivos": {ARQUIVOS[etapa]: entrada_manifesto(arvore) for etapa, arvore in saidas.items()},
+    }
+
+
+def salvar_manifesto(saidas, diretorio="."):
+    """Grava bncc_hashes.json no diretório. Etapas ausentes de `saidas` mantêm a entrada anterior."""
+    caminho = os.path.join(diretorio, MANIFESTO)
+    manifesto = gerar_manifesto(saidas)
+    if os.path.exists(caminho):
+        with open(caminho, encoding="utf-8") as f:
+            anterior = json.load(f)
+        if anterior.get("versao") == VERSAO_MANIFESTO:
+            manifesto["arquivos"] = {**anterior.get("arquivos", {}), **manifesto["arquivos"]}
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    return manifesto
+
+
+def verificar_manifesto(diretorio="."):
+    """Lista de problemas ([] se os arquivos conferem com o manifesto)."""
+    with open(os.path.join(diretorio, MANIFESTO), encoding="utf-8") as f:
+        manifesto = json.load(f)
+    problemas = []
+    for arquivo, entrada in manifesto["arquivos"].items():
+        caminho = os.path.join(diretorio, arquivo)
+        if not os.path.exists(caminho):
+            problemas.append(f"{arquivo}: arquivo ausente")
+            continue
+        with open(caminho, encoding="utf-8") as f:
+            arvore = json.load(f)
+        atual = entrada_manifesto(arvore)
+        if atual["raiz"] != entrada["raiz"]:
+            alterados = [c for c in set(atual["nos"]) | set(entrada["nos"])
+                         if atual["nos"].get(c) != entrada["nos"].get(c)]
+            problemas.append(f"{arquivo}: hash da raiz difere ({len(alterados)} nós alterados)")
+    return problemas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hashes de conteúdo dos bncc_*.json.")
+    parser.add_argument("--dir", default=".", help="Diretório com os bncc_*.json")
+    parser.add_argument("--verificar", action="store_true", help="Só confere os arquivos contra o manifesto")
+    args = parser.parse_args()
+
+    if args.verificar:
+        problemas = verificar_manifesto(args.dir)
+        for problema in problemas:
+            print(f"❌ {problema}")
+        if not problemas:
+            print("✅ Arquivos conferem com o manifesto")
+        return 1 if problemas else 0
+
+    saidas = {}
+    for etapa, arquivo in ARQUIVOS.items():
+        caminho = os.path.join(args.dir, arquivo)
+        if not os.path.exists(caminho):
+            continue
+        with open(caminho, encoding="utf-8") as f:
+            saidas[etapa] = anotar_hashes(json.load(f))
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(saidas[etapa], f, ensure_ascii=False, indent=2)
+    manifesto = salvar_manifesto(saidas, args.dir)
+    for arquivo, entrada in manifesto["arquivos"].items():
+        print(f"  {arquivo}: {entrada['raiz']} ({len(entrada['nos'])} nós)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
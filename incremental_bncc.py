@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+RE-EXTRAÇÃO INCREMENTAL - Reprocessa apenas as páginas alteradas de uma nova edição
+Cada página das faixas de EI/EF/EM é identificada pelo hash do seu content stream.
+O cache guarda, por etapa, o registro de cada página (ver registro_pagina em
+extrair_bncc.py), os checkpoints do passe com estado (árvore + estado a cada
+CHECKPOINT_A_CADA páginas) e as saídas da última execução.
+
+Numa nova edição do PDF:
+    1. só as páginas cujo hash mudou são reparseadas (as demais vêm do cache);
+    2. o passe com estado de EF/EM recomeça do último checkpoint anterior à
+       primeira página alterada (EI, com ~25 páginas, é sempre reconstruída
+       a partir dos registros);
+    3. os códigos adicionados, removidos ou alterados são listados.
+
+Uso:
+    python incremental_bncc.py                                  # PDF oficial
+    python incremental_bncc.py --pdf nova_edicao.pdf --relatorio mudancas.json
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+
+import extrair_bncc
+from hashes_bncc import salvar_manifesto
+
+CACHE_PADRAO = "cache_incremental_bncc.json.gz"
+VERSAO_CACHE = 8
+ETAPAS = ("ei", "ef", "em")
+ARQUIVOS_SAIDA = {"ei": "bncc_ei.json", "ef": "bncc_ef.json", "em": "bncc_em.json"}
+
+
+# ============================================================================
+# HASH E REGISTROS DE PÁGINA
+# ============================================================================
+
+def hash_pagina(page):
+    """Hash do content stream da página (mais caixa, rotação e nomes das fontes)."""
+    from pdfminer.pdftypes import resolve1
+
+    h = hashlib.sha256()
+    page_obj = page.page_obj
+    h.update(repr((page_obj.mediabox, page_obj.rotate)).encode())
+    fontes = resolve1((page_obj.resources or {}).get("Font")) or {}
+    h.update(repr(sorted(str(nome) for nome in fontes)).encode())
+    for stream in page_obj.contents:
+        h.update(resolve1(stream).get_data())
+    return h.hexdigest()[:24]
+
+
+def _faixas():
+    return {nome: [getattr(extrair_bncc, nome).start, getattr(extrair_bncc, nome).stop]
+            for nome in ("EI_PAGE_RANGE", "EF_PAGE_RANGE", "EM_FINAL_PAGE_RANGE", "EM_LP_PAGE_RANGE")}
+
+
+def coletar_registros_incrementais(pdf, cache_paginas, hashes):
+    """
+    Monta os registros de uma etapa reaproveitando os do cache quando o hash da
+    página não mudou. Retorna (registros, novo cache da etapa, páginas alteradas,
+    páginas removidas). `hashes` é compartilhado entre as etapas (EF e EM se sobrepõem).
+    """
+    def coletar(etapa):
+        registros = []
+        novo_cache = {}
+        alteradas = []
+        antigo = cache_paginas.get(etapa, {})
+        acessor = extrair_bncc.paginas(pdf)
+        for page_num, campos in extrair_bncc.paginas_da_etapa(etapa):
+            if page_num >= len(acessor):
+                break
+            if page_num not in hashes:
+                hashes[page_num] = hash_pagina(acessor[page_num])
+            entrada = antigo.get(str(page_num))
+            if entrada and entrada["hash"] == hashes[page_num]:
+                registro = entrada["registro"]
+            else:
+                registro = extrair_bncc.registro_pagina(acessor[page_num], page_num, **campos)
+                alteradas.append(page_num)
+            registros.append(registro)
+            novo_cache[str(page_num)] = {"hash": hashes[page_num], "registro": registro}
+        removidas = sorted(int(p) for p in antigo if p not in novo_cache)
+        return registros, novo_cache, alteradas, removidas
+    return coletar
+
+
+# ============================================================================
+# REPLAY A PARTIR DO CHECKPOINT MAIS PRÓXIMO
+# ============================================================================
+
+def _posicao_checkpoint(registros, checkpoint):
+    """Índice do primeiro registro que o checkpoint ainda não processou."""
+    return next((i for i, r in enumerate(registros) if r["pagina"] >= checkpoint["proxima_pagina"]), len(registros))
+
+
+def reconstruir_etapa(etapa, registros, checkpoints, primeira_alterada):
+    """
+    Refaz o passe com estado da etapa a partir do último checkpoint válido
+    (anterior à primeira página alterada). Retorna (saída, checkpoints, passos
+    reexecutados, total de passos).
+    """
+    limite = len(registros)
+    if primeira_alterada is not None:
+        limite = next((i for i, r in enumerate(registros) if r["pagina"] >= primeira_alterada), len(registros))
+
+    validos = []
+    for checkpoint in checkpoints:
+        posicao = _posicao_checkpoint(registros, checkpoint)
+        if posicao <= limite:
+            validos.append((posicao, checkpoint))
+    base_posicao, base = max(validos, key=lambda x: x[0]) if validos else (0, None)
+    novos = [c for posicao, c in validos if posicao <= base_posicao]
+
+    if base:
+        base = json.loads(json.dumps(base, ensure_ascii=False))  # O passe altera a árvore/estado restaurados
+
+    def coletor(dados):
+        if not dados["concluida"]:
+            novos.append(dados)
+
+    if etapa == "ei":
+        saida = extrair_bncc.extract_ei_final(registros=registros)
+        return saida, [], len(registros), len(registros)
+    restantes = registros[base_posicao:]
+    if etapa == "ef":
+        if base:
+            tree = extrair_bncc.habilidades_de_json(base["arvore"])
+            estado = extrair_bncc._estado_ef_de_json(base["estado"])
+            saida = extrair_bncc.construir_arvore_ef(restantes, None, tree, estado, coletor)
+        else:
+            saida = extrair_bncc.construir_arvore_ef(registros, None, checkpoint=coletor)
+    else:
+        estado = extrair_bncc._estado_em_de_json(base["estado"]) if base else None
+        saida = extrair_bncc.construir_arvore_em(restantes, estado, coletor)
+    return saida, novos, len(registros) - base_posicao, len(registros)
+
+
+# ============================================================================
+# CÓDIGOS ALTERADOS
+# ============================================================================
+
+def indexar_codigos(arvore):
+    """
+    {código: conjunto de ocorrências serializadas}. Cada ocorrência inclui o
+    caminho de chaves até o item (e os objetos/número do grupo), de modo que
+    uma habilidade que muda de unidade ou de competência também conta como alterada.
+    """
+    codigos = {}
+
+    def visitar(obj, caminho):
+        if isinstance(obj, dict):
+            if "codigo" in obj:
+                ocorrencia = json.dumps([caminho, obj], ensure_ascii=False, sort_keys=True)
+                codigos.setdefault(obj["codigo"], set()).add(ocorrencia)
+                return
+            rotulo = obj.get("numero", obj.get("objetos"))
+            if rotulo is not None:
+                caminho = caminho + (str(rotulo),)
+            for chave, valor in obj.items():
+                visitar(valor, caminho + (chave,))
+        elif isinstance(obj, list):
+            for item in obj:
+                visitar(item, caminho)
+
+    visitar(arvore, ())
+    return codigos
+
+
+def comparar_codigos(antes, depois):
+    codigos_antes = indexar_codigos(antes) if antes is not None else {}
+    codigos_depois = indexar_codigos(depois)
+    return {
+        "adicionados": sorted(c for c in codigos_depois if c not in codigos_antes),
+        "removidos": sorted(c for c in codigos_antes if c not in codigos_depois),
+        "alterados": sorted(c for c in codigos_depois
+                            if c in codigos_antes and codigos_antes[c] != codigos_depois[c]),
+    }
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+def carregar_cache(caminho):
+    """Carrega o cache; descarta-o se for de outra versão ou de outras faixas de páginas."""
+    vazio = {"versao": VERSAO_CACHE, "faixas": _faixas(), "paginas": {}, "checkpoints": {}, "saidas": {}}
+    if not os.path.exists(caminho):
+        return vazio
+    with gzip.open(caminho, "rt", encoding="utf-8") as f:
+        cache = json.load(f)
+    if cache.get("versao") != VERSAO_CACHE or cache.get("faixas") != _faixas():
+        print("  Cache de outra versão ou com outras faixas de páginas; ignorando.")
+        return vazio
+    return cache
+
+
+def salvar_cache(caminho, cache):
+    temporario = caminho + ".tmp"
+    with gzip.open(temporario, "wt", encoding="utf-8", compresslevel=6) as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def executar(pdf, cache, etapas=ETAPAS):
+    """Re-extração incremental das etapas pedidas. Retorna (saídas, relatório, novo cache)."""
+    novo_cache = {"versao": VERSAO_CACHE, "faixas": _faixas(), "paginas": {}, "checkpoints": {}, "saidas": {}}
+    coletar = coletar_registros_incrementais(pdf, cache["paginas"], {})
+    saidas = {}
+    relatorio = {}
+    for etapa in etapas:
+        registros, novo_cache["paginas"][etapa], alteradas, removidas = coletar(etapa)
+        mudancas = alteradas + removidas
+        primeira_alterada = min(mudancas) if mudancas else None
+        anterior = cache["saidas"].get(etapa)
+
+        if primeira_alterada is None and anterior is not None:
+            saida, checkpoints = anterior, cache["checkpoints"].get(etapa, [])
+            passos, total = 0, len(registros)
+        else:
+            saida, checkpoints, passos, total = reconstruir_etapa(
+                etapa, registros, cache["checkpoints"].get(etapa, []), primeira_alterada)
+            saida = json.loads(json.dumps(saida, ensure_ascii=False))  # Tuplas -> listas, como no arquivo
+
+        saidas[etapa] = saida
+        novo_cache["checkpoints"][etapa] = checkpoints
+        novo_cache["saidas"][etapa] = saida
+        relatorio[etapa] = {
+            "paginas": len(registros),
+            "paginas_reparseadas": alteradas,
+            "paginas_removidas": removidas,
+            "passos_reexecutados": passos,
+            "passos_total": total,
+            "codigos": comparar_codigos(anterior, saida),
+        }
+    return saidas, relatorio, novo_cache
+
+
+def imprimir_relatorio(relatorio, limite=20):
+    print("\n--- Re-extração Incremental ---")
+    for etapa, dados in relatorio.items():
+        print(f"  {etapa.upper()}: {len(dados['paginas_reparseadas'])}/{dados['paginas']} páginas reparseadas, "
+              f"passe com estado refeito em {dados['passos_reexecutados']}/{dados['passos_total']} passos")
+        if dados["paginas_removidas"]:
+            print(f"      Páginas que deixaram de existir: {dados['paginas_removidas']}")
+        for tipo, codigos in dados["codigos"].items():
+            if codigos:
+                extra = f" (+{len(codigos) - limite})" if len(codigos) > limite else ""
+                print(f"      {tipo}: {', '.join(codigos[:limite])}{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-extração incremental da BNCC guiada por hash de página.")
+    parser.add_argument("--pdf", default=extrair_bncc.PDF_PATH, help="PDF de entrada (nova edição)")
+    parser.add_argument("--cache", default=CACHE_PADRAO, help=f"Cache de registros/checkpoints (padrão: {CACHE_PADRAO})")
+    parser.add_argument("--saida-dir", default=".", help="Diretório onde gravar bncc_ei/ef/em.json")
+    parser.add_argument("--relatorio", help="Grava em JSON as páginas reparseadas e os códigos alterados")
+    parser.add_argument("--checkpoint-a-cada", type=int, default=extrair_bncc.CHECKPOINT_A_CADA, metavar="N",
+                        help="Páginas entre checkpoints do passe com estado")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.pdf):
+        print(f"Arquivo PDF não encontrado: {args.pdf}")
+        return 1
+    from gerar_pdf_sintetico import aplicar_layout, caminho_layout
+    layout_path = caminho_layout(args.pdf)
+    if os.path.exists(layout_path):
+        with open(layout_path, encoding="utf-8") as f:
+            aplicar_layout(json.load(f), extrair_bncc)
+        print(f"Layout sintético: {layout_path}")
+    extrair_bncc.CHECKPOINT_A_CADA = max(1, args.checkpoint_a_cada)
+
+    import pdfplumber
+
+    cache = carregar_cache(args.cache)
+    pdf = pdfplumber.open(args.pdf)
+    try:
+        saidas, relatorio, novo_cache = executar(pdf, cache)
+        print(extrair_bncc.resumo_paginas(pdf))
+    finally:
+        extrair_bncc.fechar_pdf(pdf)
+
+    os.makedirs(args.saida_dir, exist_ok=True)
+    for etapa, arquivo in ARQUIVOS_SAIDA.items():
+        with open(os.path.join(args.saida_dir, arquivo), "w", encoding="utf-8") as f:
+            json.dump(saidas[etapa], f, ensure_ascii=False, indent=2)
+    salvar_manifesto(saidas, args.saida_dir)
+    salvar_cache(args.cache, novo_cache)
+
+    imprimir_relatorio(relatorio)
+    if args.relatorio:
+        with open(args.relatorio, "w", encoding="utf-8") as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        print(f"\nRelatório salvo em {args.relatorio}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
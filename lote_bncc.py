@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+LOTE - Extração de vários PDFs curriculares num pool de processos
+Lê um manifesto JSON com os documentos (edições da BNCC, o documento do EM,
+currículos estaduais com o mesmo esquema de códigos), cada um com suas faixas
+de páginas e mapeamentos, e processa-os em paralelo. Cada documento tem seu
+diretório de saída com bncc_*.json, o log da extração e o cache incremental
+(ver incremental_bncc.py): numa nova execução só as páginas alteradas são
+reparseadas. Um documento com erro não interrompe os demais.
+
+Manifesto:
+    {
+      "documentos": [
+        {"id": "bncc_2018", "pdf": "BNCC_EI_EF_110518_versaofinal_site.pdf"},
+        {"id": "curriculo_sp", "pdf": "curriculo_sp.pdf",
+         "etapas": ["ei", "ef"],
+         "faixas": {"EI_PAGE_RANGE": [20, 44], "EF_PAGE_RANGE": [44, 390]},
+         "mapeamentos": {"MAPA_EF_ESTRUTURA": {...}}},
+        {"id": "sintetico", "pdf": "bncc_sintetico.pdf", "layout": "bncc_sintetico.layout.json"}
+      ]
+    }
+Caminhos relativos são resolvidos a partir do diretório do manifesto.
+
+Uso:
+    python lote_bncc.py manifesto.json --saida lote_saida --workers 4
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import extrair_bncc
+import incremental_bncc
+from hashes_bncc import salvar_manifesto
+
+FAIXAS = ("EI_PAGE_RANGE", "EF_PAGE_RANGE", "EM_FINAL_PAGE_RANGE", "EM_LP_PAGE_RANGE")
+MAPEAMENTOS = ("CAMPOS_EXPERIENCIA", "DIREITOS_APRENDIZAGEM", "MAPA_EF_ESTRUTURA")
+SAIDA_PADRAO = "lote_saida"
+
+
+# ============================================================================
+# CONFIGURAÇÃO POR DOCUMENTO
+# ============================================================================
+
+def carregar_manifesto(caminho):
+    """Lê o manifesto e resolve os caminhos relativos ao diretório dele."""
+    with open(caminho, encoding="utf-8") as f:
+        manifesto = json.load(f)
+    base = os.path.dirname(os.path.abspath(caminho))
+    documentos = []
+    for i, doc in enumerate(manifesto.get("documentos", [])):
+        doc = dict(doc)
+        doc.setdefault("id", os.path.splitext(os.path.basename(doc.get("pdf", f"documento_{i}")))[0])
+        for chave in ("pdf", "layout"):
+            if doc.get(chave) and not os.path.isabs(doc[chave]):
+                doc[chave] = os.path.join(base, doc[chave])
+        documentos.append(doc)
+    ids = [doc["id"] for doc in documentos]
+    repetidos = sorted({i for i in ids if ids.count(i) > 1})
+    if repetidos:
+        raise ValueError(f"ids repetidos no manifesto: {', '.join(repetidos)}")
+    return documentos
+
+
+def _sobrescritas(doc):
+    """Faixas e mapeamentos do documento (o layout sintético entra como faixas)."""
+    faixas = {}
+    if doc.get("layout"):
+        with open(doc["layout"], encoding="utf-8") as f:
+            layout = json.load(f)
+        faixas.update({nome: layout[nome] for nome in FAIXAS if nome in layout})
+    faixas.update(doc.get("faixas", {}))
+    desconhecidas = [nome for nome in faixas if nome not in FAIXAS]
+    desconhecidas += [nome for nome in doc.get("mapeamentos", {}) if nome not in MAPEAMENTOS]
+    if desconhecidas:
+        raise ValueError(f"configurações desconhecidas: {', '.join(desconhecidas)}")
+    return faixas, doc.get("mapeamentos", {})
+
+
+@contextlib.contextmanager
+def configuracao_documento(doc):
+    """
+    Aplica as faixas/mapeamentos do documento aos globais de extrair_bncc e
+    restaura os originais ao sair (o processo do pool é reaproveitado).
+    """
+    faixas, mapeamentos = _sobrescritas(doc)
+    originais = {nome: getattr(extrair_bncc, nome) for nome in FAIXAS + MAPEAMENTOS}
+    try:
+        for nome, (inicio, fim) in faixas.items():
+            setattr(extrair_bncc, nome, range(inicio, fim))
+        for nome, valor in mapeamentos.items():
+            setattr(extrair_bncc, nome, valor)
+        yield
+    finally:
+        for nome, valor in originais.items():
+            setattr(extrair_bncc, nome, valor)
+
+
+def _impressao_digital(doc):
+    """Identifica a configuração do documento; se mudar, o cache incremental é descartado."""
+    faixas, mapeamentos = _sobrescritas(doc)
+    conteudo = json.dumps({"faixas": faixas, "mapeamentos": mapeamentos, "etapas": doc.get("etapas")},
+                          sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()[:16]
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+def processar_documento(doc, saida_dir, usar_cache=True):
+    """
+    Extrai um documento no diretório <saida_dir>/<id>. Executado nos processos
+    do pool; nunca propaga exceções, o erro vai no resultado.
+    """
+    import pdfplumber
+
+    inicio = time.perf_counter()
+    resultado = {"id": doc["id"], "pdf": doc.get("pdf"), "ok": False, "erro": None,
+                 "segundos": 0.0, "paginas": 0, "paginas_reparseadas": 0, "codigos": 0}
+    dir_doc = os.path.join(saida_dir, doc["id"])
+    try:
+        os.makedirs(dir_doc, exist_ok=True)
+        if not doc.get("pdf") or not os.path.exists(doc["pdf"]):
+            raise FileNotFoundError(f"PDF não encontrado: {doc.get('pdf')}")
+        etapas = tuple(doc.get("etapas") or incremental_bncc.ETAPAS)
+
+        cache_path = os.path.join(dir_doc, incremental_bncc.CACHE_PADRAO)
+        config_path = os.path.join(dir_doc, "configuracao.json")
+        digital = _impressao_digital(doc)
+        if os.path.exists(config_path):
+            with open(config_path, encoding="utf-8") as f:
+                if json.load(f).get("impressao_digital") != digital and os.path.exists(cache_path):
+                    os.remove(cache_path)
+        if not usar_cache and os.path.exists(cache_path):
+            os.remove(cache_path)
+
+        with configuracao_documento(doc), \
+                open(os.path.join(dir_doc, "extracao.log"), "w", encoding="utf-8") as log, \
+                contextlib.redirect_stdout(log):
+            cache = incremental_bncc.carregar_cache(cache_path)
+            pdf = pdfplumber.open(doc["pdf"])
+            try:
+                saidas, relatorio, novo_cache = incremental_bncc.executar(pdf, cache, etapas)
+            finally:
+                extrair_bncc.fechar_pdf(pdf)
+            incremental_bncc.imprimir_relatorio(relatorio)
+
+        for etapa, dados in saidas.items():
+            with open(os.path.join(dir_doc, incremental_bncc.ARQUIVOS_SAIDA[etapa]), "w", encoding="utf-8") as f:
+                json.dump(dados, f, ensure_ascii=False, indent=2)
+        salvar_manifesto(saidas, dir_doc)
+        incremental_bncc.salvar_cache(cache_path, novo_cache)
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump({"impressao_digital": digital, "documento": doc}, f, ensure_ascii=False, indent=2)
+
+        resultado["ok"] = True
+        resultado["paginas"] = sum(r["paginas"] for r in relatorio.values())
+        resultado["paginas_reparseadas"] = sum(len(r["paginas_reparseadas"]) for r in relatorio.values())
+        resultado["codigos"] = sum(len(incremental_bncc.indexar_codigos(s)) for s in saidas.values())
+    except Exception as e:
+        resultado["erro"] = f"{type(e).__name__}: {e}"
+        with open(os.path.join(dir_doc, "erro.log"), "w", encoding="utf-8") as f:
+            f.write(traceback.format_exc())
+    resultado["segundos"] = time.perf_counter() - inicio
+    return resultado
+
+
+# ============================================================================
+# LOTE
+# ============================================================================
+
+def executar_lote(documentos, saida_dir, workers=None, usar_cache=True):
+    """Agenda os documentos no pool e retorna os resultados na ordem do manifesto."""
+    resultados = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = {pool.submit(processar_documento, doc, saida_dir, usar_cache): doc for doc in documentos}
+        for futuro in as_completed(futuros):
+            doc = futuros[futuro]
+            try:
+                resultado = futuro.result()
+            except Exception as e:  # Processo do worker morreu (ex: falta de memória)
+                resultado = {"id": doc["id"], "pdf": doc.get("pdf"), "ok": False,
+                             "erro": f"{type(e).__name__}: {e}", "segundos": 0.0,
+                             "paginas": 0, "paginas_reparseadas": 0, "codigos": 0}
+            status = "✅" if resultado["ok"] else f"❌ {resultado['erro']}"
+            print(f"  [{len(resultados) + 1}/{len(documentos)}] {resultado['id']}: "
+                  f"{resultado['segundos']:.1f}s {status}")
+            resultados[doc["id"]] = resultado
+    return [resultados[doc["id"]] for doc in documentos]
+
+
+def resumo_lote(resultados, segundos):
+    ok = [r for r in resultados if r["ok"]]
+    paginas = sum(r["paginas"] for r in ok)
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "documentos": len(resultados),
+        "ok": len(ok),
+        "falhas": len(resultados) - len(ok),
+        "segundos": segundos,
+        "paginas": paginas,
+        "paginas_reparseadas": sum(r["paginas_reparseadas"] for r in ok),
+        "paginas_por_segundo": paginas / segundos if segundos else 0.0,
+        "documentos_por_minuto": 60 * len(resultados) / segundos if segundos else 0.0,
+        "resultados": resultados,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extrai vários PDFs curriculares listados num manifesto.")
+    parser.add_argument("manifesto", help="JSON com a lista de documentos")
+    parser.add_argument("--saida", default=SAIDA_PADRAO, help=f"Diretório de saída (padrão: {SAIDA_PADRAO})")
+    parser.add_argument("--workers", type=int, help="Processos no pool (padrão: número de CPUs)")
+    parser.add_argument("--sem-cache", action="store_true", help="Ignora o cache incremental de cada documento")
+    parser.add_argument("--limpar", action="store_true", help="Apaga o diretório de saída antes de começar")
+    args = parser.parse_args()
+
+    try:
+        documentos = carregar_manifesto(args.manifesto)
+    except (OSError, ValueError) as e:
+        print(f"Erro no manifesto: {e}")
+        return 1
+    if args.limpar and os.path.isdir(args.saida):
+        shutil.rmtree(args.saida)
+    os.makedirs(args.saida, exist_ok=True)
+
+    print(f"Lote: {len(documentos)} documentos, saída em {args.saida}")
+    inicio = time.perf_counter()
+    resultados = executar_lote(documentos, args.saida, args.workers, not args.sem_cache)
+    resumo = resumo_lote(resultados, time.perf_counter() - inicio)
+
+    with open(os.path.join(args.saida, "resumo_lote.json"), "w", encoding="utf-8") as f:
+        json.dump(resumo, f, ensure_ascii=False, indent=2)
+
+    print(f"\n{'Documento':<24} {'Tempo':>8} {'Páginas':>9} {'Reparse':>8} {'Códigos':>8}  Status")
+    print("-" * 72)
+    for r in resultados:
+        status = "OK" if r["ok"] else "FALHA"
+        print(f"{r['id'][:24]:<24} {r['segundos']:>7.1f}s {r['paginas']:>9} "
+              f"{r['paginas_reparseadas']:>8} {r['codigos']:>8}  {status}")
+    print("-" * 72)
+    print(f"{resumo['ok']}/{resumo['documentos']} documentos em {resumo['segundos']:.1f}s "
+          f"({resumo['paginas_por_segundo']:.1f} páginas/s, {resumo['documentos_por_minuto']:.1f} documentos/min)")
+    if resumo["falhas"]:
+        print("\n❌ Falhas:")
+        for r in resultados:
+            if not r["ok"]:
+                print(f"  {r['id']}: {r['erro']} (detalhes em {os.path.join(args.saida, r['id'], 'erro.log')})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
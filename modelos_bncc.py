@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+MODELOS - Registros tipados da BNCC usados durante a extração
+Habilidades, objetivos e competências são guardados na árvore como objetos com
+__slots__ (sem o dict por instância), com códigos e chaves internados. Ao fim
+de cada etapa, para_json() converte a árvore para o formato de sempre dos
+arquivos bncc_*.json.
+
+Quem consome os JSON pode reconstruir os registros com de_dict(), ex:
+    Habilidade.de_dict({"codigo": "EF01LP01", "descricao": "...", "anos_aplicaveis": ["1º Ano"]})
+"""
+
+import sys
+from dataclasses import asdict, dataclass, field
+
+intern = sys.intern
+
+
+@dataclass(slots=True)
+class Habilidade:
+    """Habilidade do EF (com anos_aplicaveis) ou do EM (sem)."""
+    codigo: str
+    descricao: str
+    anos_aplicaveis: tuple | None = None
+
+    def para_dict(self):
+        dados = {"codigo": self.codigo, "descricao": self.descricao}
+        if self.anos_aplicaveis is not None:
+            dados["anos_aplicaveis"] = list(self.anos_aplicaveis)
+        return dados
+
+    @classmethod
+    def de_dict(cls, dados):
+        anos = dados.get("anos_aplicaveis")
+        return cls(intern(dados["codigo"]), dados["descricao"], tuple(anos) if anos is not None else None)
+
+
+@dataclass(slots=True)
+class ObjetivoEI:
+    codigo: str
+    descricao: str
+
+    def para_dict(self):
+        return {"codigo": self.codigo, "descricao": self.descricao}
+
+    @classmethod
+    def de_dict(cls, dados):
+        return cls(intern(dados["codigo"]), dados["descricao"])
+
+
+@dataclass(slots=True)
+class CompetenciaEspecifica:
+    """Competência específica de área do EM, com as habilidades vinculadas."""
+    numero: int
+    texto: str = ""
+    habilidades: list = field(default_factory=list)
+
+    def para_dict(self):
+        return {
+            "numero": self.numero,
+            "texto": self.texto,
+            "habilidades": [h.para_dict() for h in self.habilidades],
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        return cls(dados["numero"], dados["texto"], [Habilidade.de_dict(h) for h in dados["habilidades"]])
+
+
+@dataclass(slots=True)
+class HabilidadeLP:
+    """Habilidade de LP do EM. Campo e práticas viram o nível acima no JSON."""
+    codigo: str
+    descricao: str
+    campo: str = ""
+    praticas: str = ""
+    competencias_associadas: list = field(default_factory=list)
+
+    def para_dict(self):
+        return {
+            "codigo": self.codigo,
+            "descricao": self.descricao,
+            "competencias_associadas": list(self.competencias_associadas),
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        return cls(intern(dados["codigo"]), dados["descricao"], dados.get("campo", ""),
+                   dados.get("praticas", ""), list(dados.get("competencias_associadas", [])))
+
+
+def para_json(obj):
+    """Converte uma árvore com registros para dicts/listas (o formato dos bncc_*.json)."""
+    if isinstance(obj, dict):
+        return {chave: para_json(valor) for chave, valor in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [para_json(valor) for valor in obj]
+    if hasattr(obj, "para_dict"):
+        return obj.para_dict()
+    return obj
+
+
+def json_default(obj):
+    """Para json.dump(..., default=json_default) de árvores parciais (checkpoints)."""
+    if hasattr(obj, "para_dict"):
+        return obj.para_dict()
+    raise TypeError(f"Objeto do tipo {type(obj).__name__} não é serializável em JSON")
+
+
+def campos(registro):
+    """Todos os campos do registro (inclusive os omitidos em para_dict), para checkpoints."""
+    return asdict(registro)
+
+
+def habilidades_de_json(obj):
+    """
+    Em uma árvore lida de JSON (ex: checkpoint do EF), troca os dicts das listas
+    "habilidades" por registros Habilidade. Altera a árvore no lugar.
+    """
+    if isinstance(obj, dict):
+        for chave, valor in obj.items():
+            if chave == "habilidades" and isinstance(valor, list):
+                obj[chave] = [Habilidade.de_dict(h) if isinstance(h, dict) else h for h in valor]
+            else:
+                habilidades_de_json(valor)
+    elif isinstance(obj, list):
+        for item in obj:
+            habilidades_de_json(item)
+    return obj
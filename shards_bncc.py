@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+SHARDS - Extração do EF dividida entre máquinas
+Cada shard (extrair_bncc.py --shard i/n) lê uma fatia contígua das páginas do
+EF e faz o passe com estado a partir do estado inicial, sem saber o contexto
+(context_unidades, last_unidade...) que vem das páginas anteriores. Por página,
+o shard guarda o registro, as operações sobre a árvore (habilidades com o
+contexto já resolvido e continuações de campo) e o digest do contexto ao fim
+dela; ao fim da fatia, o contexto em aberto.
+
+A junção percorre os shards em ordem, com o contexto verdadeiro (o do fim do
+shard anterior). Se ele difere do que o shard assumiu, as páginas de fronteira
+são reexecutadas a partir dos registros até o contexto coincidir com o que o
+shard registrou; dali em diante as operações do shard valem como estão.
+Aplicadas na ordem das páginas, as operações dão a mesma árvore de uma
+execução única.
+
+Uso:
+    python extrair_bncc.py --shard 1/4      # Em cada máquina: grava bncc_ef.shard-1-de-4.json.gz
+    python shards_bncc.py bncc_ef.shard-*-de-4.json.gz --saida-dir saida
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+
+import extrair_bncc
+from hashes_bncc import salvar_manifesto
+
+VERSAO_SHARD = 1
+# Estado do EF que atravessa páginas (contexto_linha vale só dentro da página;
+# campo_desc_extra é acumulado pelas operações)
+CHAVES_CONTEXTO = ("current_comp", "current_area", "context_unidades", "last_campo", "last_unidade", "last_objeto")
+
+
+def parse_shard(texto):
+    """"i/n" -> (i, n), com 1 <= i <= n."""
+    try:
+        i, n = (int(parte) for parte in texto.split("/"))
+    except ValueError:
+        raise ValueError(f"Shard inválido: {texto!r} (esperado i/n, ex: 2/4)") from None
+    if not 1 <= i <= n:
+        raise ValueError(f"Shard inválido: {texto!r} (i deve estar entre 1 e n)")
+    return i, n
+
+
+def caminho_shard(i, n):
+    return f"bncc_ef.shard-{i}-de-{n}.json.gz"
+
+
+def contexto(estado):
+    return {chave: estado[chave] for chave in CHAVES_CONTEXTO}
+
+
+def digest_contexto(estado):
+    dados = json.dumps([estado[chave] for chave in CHAVES_CONTEXTO], ensure_ascii=False)
+    return hashlib.sha256(dados.encode("utf-8")).hexdigest()[:16]
+
+
+def operacoes_pagina(estado, registro):
+    """Passe com estado sobre uma página: operações na ordem em que a árvore as recebe."""
+    operacoes = []
+    for evento in extrair_bncc.eventos_pagina_ef(registro):
+        operacao = extrair_bncc.resolver_evento_ef(estado, evento)
+        if operacao:
+            operacoes.append(operacao)
+    return operacoes
+
+
+# ============================================================================
+# EXECUÇÃO DE UM SHARD
+# ============================================================================
+
+def executar_shard(i, n, pdf=None, registros=None):
+    """
+    Processa a i-ésima de n fatias das páginas do EF (do PDF ou de registros
+    gravados) e retorna o shard serializável em JSON.
+    """
+    if registros is None:
+        paginas = [p for p, _ in extrair_bncc.paginas_da_etapa("ef") if p < len(pdf.pages)]
+    else:
+        registros = list(registros)
+        paginas = [r["pagina"] for r in registros]
+    inicio, fim = (i - 1) * len(paginas) // n, i * len(paginas) // n
+    if registros is None:
+        fatia = extrair_bncc.registros_etapa(pdf, "ef", paginas[inicio:fim]) if fim > inicio else []
+    else:
+        fatia = registros[inicio:fim]
+
+    estado = extrair_bncc.novo_estado_ef()
+    shard = {
+        "versao": VERSAO_SHARD,
+        "etapa": "ef",
+        "shard": [i, n],
+        "total_paginas": len(paginas),
+        "estado_inicial": digest_contexto(estado),  # Contexto assumido no início da fatia
+        "paginas": [],
+    }
+    for registro in fatia:
+        operacoes = operacoes_pagina(estado, registro)
+        shard["paginas"].append({
+            "pagina": registro["pagina"],
+            "registro": registro,
+            "operacoes": operacoes,
+            "estado": digest_contexto(estado),
+        })
+    shard["estado_final"] = contexto(estado)  # Contexto em aberto para o shard seguinte
+    print(f"  Shard {i}/{n}: {len(shard['paginas'])} de {len(paginas)} páginas do EF")
+    return shard
+
+
+def salvar_shard(caminho, shard):
+    with gzip.open(caminho, "wt", encoding="utf-8") as f:
+        json.dump(shard, f, ensure_ascii=False, default=extrair_bncc.json_default)
+
+
+def carregar_shard(caminho):
+    with gzip.open(caminho, "rt", encoding="utf-8") as f:
+        shard = json.load(f)
+    if shard.get("versao") != VERSAO_SHARD or shard.get("etapa") != "ef":
+        raise ValueError(f"{caminho}: shard de versão/etapa incompatível")
+    return shard
+
+
+# ============================================================================
+# JUNÇÃO
+# ============================================================================
+
+def _validar_shards(shards):
+    shards = sorted(shards, key=lambda s: s["shard"][0])
+    totais = {s["shard"][1] for s in shards}
+    if len(totais) != 1:
+        raise ValueError(f"Shards de divisões diferentes: {sorted(totais)}")
+    n = totais.pop()
+    faltando = sorted(set(range(1, n + 1)) - {s["shard"][0] for s in shards})
+    if faltando or len(shards) != n:
+        raise ValueError(f"Shards ausentes ou repetidos (faltando: {faltando})")
+    if len({s["total_paginas"] for s in shards}) != 1:
+        raise ValueError("Shards gerados de documentos/faixas diferentes")
+    return shards
+
+
+def combinar_shards(shards, pdf=None):
+    """
+    Junta os shards na árvore do EF, reexecutando as páginas de fronteira cujo
+    contexto assumido estava errado. Retorna (árvore, {shard: páginas reexecutadas}).
+    """
+    shards = _validar_shards(shards)
+    tree = extrair_bncc.nova_arvore_ef(pdf)
+    estado = extrair_bncc.novo_estado_ef()
+    reexecutadas = {}
+
+    for shard in shards:
+        i, n = shard["shard"]
+        convergiu = digest_contexto(estado) == shard["estado_inicial"]
+        reexecutadas[f"{i}/{n}"] = []
+        for pagina in shard["paginas"]:
+            if convergiu:
+                operacoes = pagina["operacoes"]
+            else:
+                operacoes = operacoes_pagina(estado, pagina["registro"])
+                reexecutadas[f"{i}/{n}"].append(pagina["pagina"])
+                convergiu = digest_contexto(estado) == pagina["estado"]
+            for operacao in operacoes:
+                extrair_bncc.aplicar_operacao_ef(tree, estado["campo_desc_extra"], operacao)
+        if convergiu:
+            estado.update(shard["estado_final"])
+            estado = extrair_bncc._estado_ef_de_json(estado)
+
+    return extrair_bncc.finalizar_arvore_ef(tree, estado), reexecutadas
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Junta os shards do EF gerados por extrair_bncc.py --shard i/n.")
+    parser.add_argument("shards", nargs="+", help="Arquivos bncc_ef.shard-*-de-N.json.gz")
+    parser.add_argument("--saida-dir", default=".", help="Diretório onde gravar bncc_ef.json")
+    args = parser.parse_args()
+
+    try:
+        shards = [carregar_shard(caminho) for caminho in args.shards]
+        tree, reexecutadas = combinar_shards(shards)
+    except ValueError as e:
+        print(f"Erro: {e}")
+        return 1
+
+    os.makedirs(args.saida_dir, exist_ok=True)
+    caminho = os.path.join(args.saida_dir, "bncc_ef.json")
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(tree, f, ensure_ascii=False, indent=2)
+    salvar_manifesto({"ef": tree}, args.saida_dir)
+    for shard, paginas in reexecutadas.items():
+        detalhe = f" ({', '.join(map(str, paginas))})" if paginas else ""
+        print(f"  Shard {shard}: {len(paginas)} páginas de fronteira reexecutadas{detalhe}")
+    print(f"EF salvo em {caminho}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
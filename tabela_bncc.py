@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+TABELA DE HABILIDADES - Visão colunar das árvores EI/EF/EM
+Uma linha por ocorrência de habilidade/objetivo nas árvores (no EF, uma por
+ano). As colunas categóricas (código, etapa, área, componente, ano, campo,
+unidade, objeto) são codificadas por dicionário: valores distintos + array de
+ids. As descrições distintas ficam num único buffer de texto e cada linha
+guarda o início e o fim da sua.
+
+Contagens e filtros operam sobre os arrays de ids e sobre o índice das linhas
+de cada valor, sem percorrer as árvores. A extração preenche a tabela ao
+terminar cada etapa (e conta por ela); a auditoria conta pela tabela montada
+dos JSON.
+
+Uso:
+    python tabela_bncc.py --csv bncc_habilidades.csv
+    python tabela_bncc.py --parquet bncc_habilidades.parquet   # requer pyarrow
+"""
+
+import argparse
+import csv
+import json
+import sys
+from array import array
+from collections import Counter
+
+COLUNAS_CATEGORICAS = ("codigo", "etapa", "area", "componente", "ano", "campo", "unidade", "objeto")
+COLUNAS_CSV = COLUNAS_CATEGORICAS + ("competencia", "descricao")
+SEPARADOR_OBJETOS = " || "  # Mesmo separador usado na extração para células com vários objetos
+SIGLAS_EM_AREA = ("LGG", "MAT", "CNT", "CHS")
+
+
+class TabelaHabilidades:
+    """Tabela colunar com colunas codificadas por dicionário."""
+
+    def __init__(self):
+        self.valores = {nome: [] for nome in COLUNAS_CATEGORICAS}  # id -> valor
+        self.indices = {nome: {} for nome in COLUNAS_CATEGORICAS}  # valor -> id
+        self.ids = {nome: array("I") for nome in COLUNAS_CATEGORICAS}
+        self.linhas_valor = {nome: [] for nome in COLUNAS_CATEGORICAS}  # id -> linhas com o valor
+        self.competencia = array("B")  # Competência específica (EM); 0 quando não se aplica
+        self.desc_inicio = array("I")
+        self.desc_fim = array("I")
+        self._partes = []  # Descrições distintas, na ordem do buffer
+        self._posicoes = {}  # descrição -> (início, fim)
+        self._tamanho = 0
+        self._texto = None
+
+    def __len__(self):
+        return len(self.competencia)
+
+    def _codificar(self, nome, valor):
+        indice = self.indices[nome]
+        if valor not in indice:
+            indice[valor] = len(self.valores[nome])
+            self.valores[nome].append(valor)
+            self.linhas_valor[nome].append(array("I"))
+        return indice[valor]
+
+    def adicionar(self, codigo, etapa, descricao, area="", componente="", ano="",
+                  campo="", unidade="", objeto="", competencia=0):
+        linha = {"codigo": codigo, "etapa": etapa, "area": area, "componente": componente,
+                 "ano": ano, "campo": campo, "unidade": unidade, "objeto": objeto}
+        numero = len(self)
+        for nome in COLUNAS_CATEGORICAS:
+            id_valor = self._codificar(nome, linha[nome])
+            self.ids[nome].append(id_valor)
+            self.linhas_valor[nome][id_valor].append(numero)
+        self.competencia.append(competencia)
+
+        if descricao not in self._posicoes:
+            self._posicoes[descricao] = (self._tamanho, self._tamanho + len(descricao))
+            self._partes.append(descricao)
+            self._tamanho += len(descricao)
+            self._texto = None
+        inicio, fim = self._posicoes[descricao]
+        self.desc_inicio.append(inicio)
+        self.desc_fim.append(fim)
+
+    # --- Acesso ---
+
+    @property
+    def texto(self):
+        """Buffer com todas as descrições distintas (as linhas guardam offsets nele)."""
+        if self._texto is None:
+            self._texto = "".join(self._partes)
+        return self._texto
+
+    def descricao(self, linha):
+        return self.texto[self.desc_inicio[linha]:self.desc_fim[linha]]
+
+    def coluna(self, nome):
+        """Coluna decodificada (lista de valores, uma posição por linha)."""
+        if nome == "competencia":
+            return list(self.competencia)
+        if nome == "descricao":
+            return [self.descricao(i) for i in range(len(self))]
+        valores = self.valores[nome]
+        return [valores[i] for i in self.ids[nome]]
+
+    def linhas(self, indices=None):
+        """Linhas como dicts (todas, ou só as de `indices`)."""
+        if indices is None:
+            colunas = {nome: self.coluna(nome) for nome in COLUNAS_CSV}
+            for i in range(len(self)):
+                yield {nome: colunas[nome][i] for nome in COLUNAS_CSV}
+            return
+        for i in indices:
+            linha = {nome: self.valores[nome][self.ids[nome][i]] for nome in COLUNAS_CATEGORICAS}
+            linha["competencia"] = self.competencia[i]
+            linha["descricao"] = self.descricao(i)
+            yield linha
+
+    # --- Operações por coluna ---
+
+    def filtrar(self, linhas=None, **criterios):
+        """
+        Índices das linhas (em ordem) em que cada coluna tem o valor pedido
+        (ex: etapa="EF"): interseção das listas de linhas de cada valor, sem
+        visitar as linhas que não casam.
+        """
+        listas = []
+        for nome, valor in criterios.items():
+            alvo = self.indices[nome].get(valor)
+            if alvo is None:
+                return []
+            listas.append(self.linhas_valor[nome][alvo])
+        if not listas:
+            return list(range(len(self)) if linhas is None else linhas)
+        listas.sort(key=len)
+        if len(listas) == 1 and linhas is None:
+            return list(listas[0])
+        selecionadas = set(listas[0])
+        for lista in listas[1:]:
+            selecionadas.intersection_update(lista)
+        if linhas is not None:
+            selecionadas.intersection_update(linhas)
+        return sorted(selecionadas)
+
+    def contar(self, nome, linhas=None):
+        """Counter {valor: linhas} de uma coluna categórica."""
+        ids = self.ids[nome]
+        contagem = Counter(ids if linhas is None else (ids[i] for i in linhas))
+        valores = self.valores[nome]
+        return Counter({valores[i]: n for i, n in contagem.items()})
+
+    def codigos_unicos(self, linhas=None):
+        """Conjunto de códigos distintos (opera sobre os ids, não sobre as strings)."""
+        ids = self.ids["codigo"]
+        distintos = set(ids) if linhas is None else {ids[i] for i in linhas}
+        valores = self.valores["codigo"]
+        return {valores[i] for i in distintos}
+
+    def contagens(self):
+        """
+        Contagens no formato de EXPECTED_COUNTS (audit_bncc.py), feitas sobre
+        as colunas: EF conta códigos únicos por sigla; EM e EI contam linhas.
+        """
+        resultado = {}
+
+        ef = Counter(codigo[4:6] for codigo in self.codigos_unicos(self.filtrar(etapa="EF")))
+        if ef:
+            resultado["EF"] = dict(ef, total_codes=sum(ef.values()))
+
+        linhas_em = self.filtrar(etapa="EM")
+        if linhas_em:
+            em = {"LGG": 0, "LP": 0, "MAT": 0, "CNT": 0, "CHS": 0}
+            codigos = self.valores["codigo"]
+            ids_codigo, ids_componente = self.ids["codigo"], self.ids["componente"]
+            sem_componente = self.indices["componente"].get("")
+            for (id_componente, id_codigo), n in Counter(
+                    (ids_componente[i], ids_codigo[i]) for i in linhas_em).items():
+                if id_componente != sem_componente:
+                    em["LP"] += n
+                    continue
+                sigla = next((s for s in SIGLAS_EM_AREA if s in codigos[id_codigo]), None)
+                if sigla:
+                    em[sigla] += n
+            em["total"] = sum(em.values())
+            resultado["EM"] = em
+
+        linhas_ei = self.filtrar(etapa="EI")
+        if linhas_ei:
+            resultado["EI"] = {"objetivos": len(linhas_ei)}
+        return resultado
+
+
+# ============================================================================
+# CONSTRUÇÃO A PARTIR DAS ÁRVORES
+# ============================================================================
+
+def _adicionar_grupos(tabela, grupos, **contexto):
+    for grupo in grupos:
+        objeto = SEPARADOR_OBJETOS.join(grupo.get("objetos", []))
+        for hab in grupo.get("habilidades", []):
+            tabela.adicionar(hab["codigo"], "EF", hab["descricao"], objeto=objeto, **contexto)
+
+
+def adicionar_ef(tabela, arvore):
+    for area, area_data in arvore.items():
+        for componente, comp_data in area_data.get("componentes", {}).items():
+            for ano, ano_data in comp_data.get("anos", {}).items():
+                for chave, valor in ano_data.items():
+                    if isinstance(valor, dict):
+                        # LP/Inglês: ano → campo/eixo → prática/unidade → grupos
+                        for unidade, grupos in valor.items():
+                            _adicionar_grupos(tabela, grupos, area=area, componente=componente,
+                                              ano=ano, campo=chave, unidade=unidade)
+                    else:
+                        _adicionar_grupos(tabela, valor, area=area, componente=componente,
+                                          ano=ano, unidade=chave)
+
+
+def adicionar_em(tabela, arvore):
+    for area, area_data in arvore.items():
+        for comp in area_data.get("competencias_especificas", []):
+            for hab in comp.get("habilidades", []):
+                tabela.adicionar(hab["codigo"], "EM", hab["descricao"], area=area, competencia=comp["numero"])
+        for componente, comp_data in area_data.get("componentes", {}).items():
+            for campo, campo_data in comp_data.get("campos_de_atuacao", {}).items():
+                for hab in campo_data.get("habilidades", []):
+                    tabela.adicionar(hab["codigo"], "EM", hab["descricao"], area=area,
+                                     componente=componente, campo=campo)
+
+
+def adicionar_ei(tabela, arvore):
+    nomes = {c["sigla"]: c["nome"] for c in arvore.get("metadata", {}).get("campos_experiencia", [])}
+    for faixa, campos in arvore.get("objetivos_aprendizagem", {}).items():
+        for sigla, objetivos in campos.items():
+            for obj in objetivos:
+                tabela.adicionar(obj["codigo"], "EI", obj["descricao"], campo=nomes.get(sigla, sigla), ano=faixa)
+
+
+def tabela_de_arvores(ei=None, ef=None, em=None):
+    tabela = TabelaHabilidades()
+    if ei is not None:
+        adicionar_ei(tabela, ei)
+    if ef is not None:
+        adicionar_ef(tabela, ef)
+    if em is not None:
+        adicionar_em(tabela, em)
+    return tabela
+
+
+# ============================================================================
+# EXPORTAÇÃO
+# ============================================================================
+
+def salvar_csv(tabela, caminho):
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(COLUNAS_CSV)
+        for linha in tabela.linhas():
+            escritor.writerow([linha[nome] for nome in COLUNAS_CSV])
+
+
+def salvar_parquet(tabela, caminho):
+    """Exporta em Parquet com as colunas categóricas como dictionary arrays (requer pyarrow)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Exportação Parquet requer pyarrow (pip install pyarrow)") from None
+
+    colunas = {}
+    for nome in COLUNAS_CATEGORICAS:
+        colunas[nome] = pa.DictionaryArray.from_arrays(
+            pa.array(tabela.ids[nome], type=pa.uint32()), pa.array(tabela.valores[nome], type=pa.string()))
+    colunas["competencia"] = pa.array(tabela.competencia, type=pa.uint8())
+    colunas["descricao"] = pa.array(tabela.coluna("descricao"), type=pa.string())
+    pq.write_table(pa.table(colunas), caminho)
+
+
+def salvar_tabela(tabela, caminho):
+    """Grava em CSV ou Parquet, conforme a extensão do arquivo."""
+    if caminho.lower().endswith(".parquet"):
+        salvar_parquet(tabela, caminho)
+    else:
+        salvar_csv(tabela, caminho)
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera a tabela colunar de habilidades a partir dos JSON da BNCC.")
+    parser.add_argument("--ei", default="bncc_ei.json")
+    parser.add_argument("--ef", default="bncc_ef.json")
+    parser.add_argument("--em", default="bncc_em.json")
+    parser.add_argument("--csv", help="Exporta a tabela em CSV")
+    parser.add_argument("--parquet", help="Exporta a tabela em Parquet (requer pyarrow)")
+    args = parser.parse_args()
+
+    arvores = {}
+    for etapa in ("ei", "ef", "em"):
+        with open(getattr(args, etapa), encoding="utf-8") as f:
+            arvores[etapa] = json.load(f)
+    tabela = tabela_de_arvores(**arvores)
+
+    print(f"{len(tabela)} linhas, {len(tabela.valores['codigo'])} códigos distintos, "
+          f"{len(tabela.texto)} caracteres de descrição")
+    for etapa, valores in tabela.contagens().items():
+        print(f"  {etapa}: " + ", ".join(f"{k}={v}" for k, v in valores.items()))
+
+    try:
+        if args.csv:
+            salvar_csv(tabela, args.csv)
+            print(f"CSV salvo em {args.csv}")
+        if args.parquet:
+            salvar_parquet(tabela, args.parquet)
+            print(f"Parquet salvo em {args.parquet}")
+    except RuntimeError as e:
+        print(f"Erro: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())